@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
 
 from app.db import DB_PATH
+from app.index_check import index_report
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -28,3 +29,9 @@ def backup_db():
         filename=f"happyrentals_backup.db",
         media_type="application/octet-stream",
     )
+
+
+@router.get("/indexes")
+def indexes():
+    # Declared-vs-present indexes + query plans for the routers' hot lookups
+    return index_report()
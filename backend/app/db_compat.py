@@ -1,21 +1,18 @@
 from __future__ import annotations
 # backend/app/db_compat.py
 from pathlib import Path
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import MetaData
 from sqlalchemy.orm import sessionmaker
 
-# Always use an absolute DB path so cwd never changes which database you hit
-BACKEND_DIR = Path(__file__).resolve().parents[1]  # ...\backend
-DB_PATH = (BACKEND_DIR / "happyrentals.db").resolve()
+from app.db import SQLALCHEMY_DATABASE_URL, get_engine
 
-# SQLAlchemy wants forward slashes for sqlite absolute paths on Windows
-DB_URL = "sqlite:///" + str(DB_PATH).replace("\\", "/")
+# Core tables (units/leases/payments) live in the same file as the ORM tables,
+# so share app.db's engine + pool (and its WAL/pragma setup) instead of opening
+# a second pool against the same file.
+BACKEND_DIR = Path(__file__).resolve().parents[1]  # ...\backend
+DB_URL = SQLALCHEMY_DATABASE_URL
 
-engine = create_engine(
-    DB_URL,
-    connect_args={"check_same_thread": False},
-    future=True,
-)
+engine = get_engine()
 
 metadata = MetaData()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
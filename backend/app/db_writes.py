@@ -0,0 +1,101 @@
+from __future__ import annotations
+# backend/app/db_writes.py
+"""
+Single-statement writes for the local Core tables.
+
+Each helper issues one INSERT/UPDATE/DELETE ... RETURNING and hands back the
+affected row, so routers don't follow a write with a SELECT to build their
+response (and can't race another writer between the two). An empty result
+means the row didn't exist and becomes a 404.
+
+Tables with a `version` column (units, leases) get optimistic concurrency:
+every UPDATE bumps it, and a client that sends the version it read in
+If-Match only writes if nobody else has since (WHERE id = ? AND version = ?),
+otherwise it gets 409 with the current row. No lock, no re-read on success.
+
+SQLite >= 3.35 is required for RETURNING; the bulk endpoints already rely on it.
+Note that SQLite's RETURNING reports the row as the statement wrote it, before
+AFTER triggers run; tables that triggers rewrite (payments on DBs patched by
+scripts/handoff_db_patch.py) read the row back with rows_by_id() instead.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Table, and_, delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import ColumnElement
+
+
+IN_CHUNK = 500
+
+
+def insert_returning(db, table: Table, values: Dict[str, Any]) -> Row:
+    return db.execute(insert(table).values(**values).returning(*table.c)).one()
+
+
+def rows_by_id(db, table: Table, ids: Sequence[int]) -> List[Row]:
+    """Current rows for `ids`, in the order given (one chunked IN query)."""
+    found: Dict[int, Row] = {}
+    for n in range(0, len(ids), IN_CHUNK):
+        for r in db.execute(select(*table.c).where(table.c.id.in_(ids[n:n + IN_CHUNK]))).all():
+            found[r.id] = r
+    return [found[i] for i in ids if i in found]
+
+
+def if_match_version(if_match: Optional[str] = Header(default=None)) -> Optional[int]:
+    """Dependency: the row version from If-Match ("3" or W/"3"); None when absent or `*`."""
+    if if_match is None or if_match.strip() in ("", "*"):
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"If-Match must be a row version, got {if_match!r}")
+
+
+def update_returning(
+    db,
+    table: Table,
+    where: ColumnElement,
+    values: Dict[str, Any],
+    *,
+    not_found: str,
+    version: Optional[int] = None,
+    out: Optional[Callable[[Row], Any]] = None,
+) -> Row:
+    """
+    UPDATE ... RETURNING the full row; an empty patch just reads it.
+    `version` (from If-Match) makes the write conditional; on a mismatch the
+    409 body carries the current row, rendered with `out` when given.
+    """
+    versioned = "version" in table.c
+    cond = and_(where, table.c.version == version) if versioned and version is not None else where
+    if values:
+        if versioned:
+            values = {**values, "version": table.c.version + 1}
+        stmt = update(table).where(cond).values(**values).returning(*table.c)
+    else:
+        stmt = select(*table.c).where(cond)
+    row = db.execute(stmt).first()
+    if row is None:
+        current = db.execute(select(*table.c).where(where)).first() if cond is not where else None
+        if current is not None:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Version conflict: the row was changed by someone else",
+                    "current": jsonable_encoder(out(current) if out else dict(current._mapping), exclude_unset=True),
+                },
+            )
+        raise HTTPException(status_code=404, detail=not_found)
+    return row
+
+
+def delete_returning(db, table: Table, where: ColumnElement, *, not_found: str) -> Row:
+    row = db.execute(delete(table).where(where).returning(*table.c)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return row
@@ -0,0 +1,120 @@
+from __future__ import annotations
+# backend/app/etag.py
+"""
+Weak ETags for the local app's list/detail endpoints.
+
+Every committed INSERT/UPDATE/DELETE on the shared engine bumps a version for
+the table it wrote (ORM, Core and raw SQL alike, so routers, imports and the
+ledger need no changes). GET routes declare which tables their response is
+built from:
+
+    @router.get("", dependencies=[Depends(etag_guard("units"))])
+
+and answer a matching If-None-Match with 304 before running the query.
+
+Versions live in the `etag_versions` table (app.migrations 0008) and are
+bumped on the writer's own connection just before its COMMIT, so every
+uvicorn worker sees the same counters and a tag never runs ahead of the data
+(as app.saas.etag does with saas_resource_versions).
+"""
+import re
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.engine import Engine
+
+from app.db import get_engine
+
+VERSIONS_TABLE = "etag_versions"
+
+_BUMP_SQL = (
+    f"INSERT INTO {VERSIONS_TABLE} (tbl, version) VALUES (?, 1) "
+    "ON CONFLICT(tbl) DO UPDATE SET version = version + 1"
+)
+_READ_SQL = text(f"SELECT tbl, version FROM {VERSIONS_TABLE} WHERE tbl IN :tables").bindparams(
+    bindparam("tables", expanding=True)
+)
+
+# First table a write statement touches: INSERT [OR x] INTO t / REPLACE INTO t / UPDATE [OR x] t / DELETE FROM t
+_WRITE_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    m = _WRITE_RE.match(statement)
+    if m:
+        conn.info.setdefault("etag_dirty", set()).add(m.group(1).lower())
+
+
+_table_ready = False
+
+
+def _on_commit(conn) -> None:
+    # Fires before the DBAPI COMMIT, so the bump commits with the write. Raw
+    # cursor: a statement through `conn` here would re-enter its transaction.
+    global _table_ready
+    dirty = conn.info.pop("etag_dirty", None)
+    dirty = sorted(t for t in (dirty or ()) if t != VERSIONS_TABLE)
+    if not dirty:
+        return
+    cur = conn.connection.cursor()
+    try:
+        if not _table_ready:
+            # absent only while migrations before 0008 run
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (VERSIONS_TABLE,))
+            _table_ready = cur.fetchone() is not None
+        if _table_ready:
+            cur.executemany(_BUMP_SQL, [(t,) for t in dirty])
+    finally:
+        cur.close()
+
+
+def _on_rollback(conn) -> None:
+    conn.info.pop("etag_dirty", None)
+
+
+def install(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _on_execute):
+        event.listen(engine, "before_cursor_execute", _on_execute)
+        event.listen(engine, "commit", _on_commit)
+        event.listen(engine, "rollback", _on_rollback)
+
+
+def current_etag(tables: Iterable[str]) -> str:
+    tables = list(tables)
+    with get_engine().connect() as conn:
+        versions: Dict[str, int] = dict(conn.execute(_READ_SQL, {"tables": tables}).all())
+    return 'W/"' + "-".join(f"{t}.{versions.get(t, 0)}" for t in tables) + '"'
+
+
+def if_none_match(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes on either side
+    want = tag[2:] if tag.startswith("W/") else tag
+    return any((c.strip()[2:] if c.strip().startswith("W/") else c.strip()) == want for c in header.split(","))
+
+
+def etag_guard(*tables: str, extra: Optional[Callable[[Request], Iterable[str]]] = None):
+    """
+    Dependency: 304 when the client's copy is current, else tag the response.
+    `extra(request)` names more tables the response reads for this request
+    (e.g. app.includes.include_tables for ?include=).
+    """
+    def _dep(request: Request, response: Response) -> None:  # sync: reads the DB in the threadpool
+        more = [t for t in (extra(request) if extra else ()) if t not in tables]
+        tag = current_etag([*tables, *dict.fromkeys(more)])
+        headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+        if if_none_match(request, tag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return _dep
+
+
+install(get_engine())
@@ -0,0 +1,2 @@
+# backend/app/exports/__init__.py
+# CSV export feature package
@@ -0,0 +1,139 @@
+# backend/app/exports/router.py
+"""
+CSV exports streamed straight from the DB cursor.
+
+Rows are fetched in partitions (yield_per) on a connection owned by the
+response generator and written out as they arrive, so memory stays flat no
+matter how many rows match. ?gzip=true returns a .csv.gz instead.
+"""
+import csv
+import io
+import zlib
+from datetime import date
+from typing import Any, Iterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.db_compat import engine
+from app.leases.models import leases
+from app.payments.models import payments
+from app.payments.router import _payment_filters
+from app.units.models import units
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+YIELD_PER = 1000
+
+
+def _cell(v: Any) -> Any:
+    return "" if v is None else v
+
+
+def _csv_chunks(stmt) -> Iterator[bytes]:
+    # The request's Session is closed before a streamed body is sent, so the
+    # generator opens (and closes) its own connection.
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=YIELD_PER).execute(stmt)
+        w.writerow(result.keys())
+        for part in result.partitions():
+            w.writerows([_cell(v) for v in row] for row in part)
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def _stream(stmt, name: str, gzip: bool) -> StreamingResponse:
+    if gzip:
+        return StreamingResponse(
+            _gzipped(_csv_chunks(stmt)),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{name}.csv.gz"'},
+        )
+    return StreamingResponse(
+        _csv_chunks(stmt),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{name}.csv"'},
+    )
+
+
+@router.get("/payments.csv")
+def export_payments(
+    lease_id: Optional[int] = Query(default=None),
+    tenant_id: Optional[int] = Query(default=None),
+    unit_id: Optional[int] = Query(default=None),
+    property_id: Optional[int] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+    month: Optional[str] = Query(default=None, description="YYYY-MM"),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    gzip: bool = Query(default=False),
+):
+    # Same filters as GET /payments; oldest first, served by ix_payments_date_id
+    try:
+        conds = _payment_filters(
+            payments.c,
+            lease_id=lease_id,
+            tenant_id=tenant_id,
+            unit_id=unit_id,
+            property_id=property_id,
+            status=status,
+            month=month,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"export_payments invalid filter: {e}")
+    stmt = select(payments).where(*conds).order_by(payments.c.payment_date, payments.c.id)
+    return _stream(stmt, "payments", gzip)
+
+
+@router.get("/leases.csv")
+def export_leases(
+    tenant_id: Optional[int] = Query(default=None),
+    unit_id: Optional[int] = Query(default=None),
+    gzip: bool = Query(default=False),
+):
+    stmt = select(leases)
+    if tenant_id is not None:
+        stmt = stmt.where(leases.c.tenant_id == tenant_id)
+    if unit_id is not None:
+        stmt = stmt.where(leases.c.unit_id == unit_id)
+    return _stream(stmt.order_by(leases.c.id), "leases", gzip)
+
+
+@router.get("/units.csv")
+def export_units(
+    property_id: Optional[int] = Query(default=None),
+    gzip: bool = Query(default=False),
+):
+    stmt = select(units)
+    if property_id is not None:
+        stmt = stmt.where(units.c.property_id == property_id)
+    return _stream(stmt.order_by(units.c.id), "units", gzip)
+
+
+@router.get("/tenants.csv")
+def export_tenants(gzip: bool = Query(default=False)):
+    from app.tenants.router import _tenants_meta
+
+    try:
+        t, pk, _cols = _tenants_meta()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"export_tenants failed: {type(e).__name__}: {e}")
+    return _stream(select(*t.c).order_by(pk), "tenants", gzip)
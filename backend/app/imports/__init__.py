@@ -0,0 +1,2 @@
+# backend/app/imports/__init__.py
+# Bulk CSV/XLSX import feature package
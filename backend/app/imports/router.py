@@ -0,0 +1,63 @@
+# backend/app/imports/router.py
+import csv
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_compat import get_db
+from app.imports.schemas import ImportKind, ImportResult
+from app.imports.service import iter_upload, run_import
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+
+@router.post("/{kind}", response_model=ImportResult)
+def import_file(
+    kind: ImportKind,
+    file: UploadFile = File(...),
+    dry_run: bool = Query(default=False, description="Validate and resolve only; write nothing"),
+    batch_size: int = Query(default=1000, ge=1, le=10000),
+    max_errors: int = Query(default=1000, ge=0, le=100000),
+    report: str = Query(default="json", pattern="^(json|csv)$", description="csv = per-row error report download"),
+    db=Depends(get_db),
+):
+    """
+    Stream a CSV (or .xlsx, if openpyxl is installed) of tenants, leases or
+    payments into the database in batched transactions. Rows that fail
+    validation or reference lookup are skipped and reported by line number.
+    """
+    try:
+        result = run_import(
+            db,
+            kind,
+            iter_upload(file.file, file.filename),
+            batch_size=batch_size,
+            dry_run=dry_run,
+            max_errors=max_errors,
+        )
+    except HTTPException:
+        raise
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=422, detail=f"import {kind}: unreadable file: {type(e).__name__}: {e}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"import {kind} failed: {type(e).__name__}: {str(e)}")
+
+    if report == "csv":
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["row", "error"])
+        for err in result.errors:
+            w.writerow([err.row, err.error])
+        return Response(
+            content=buf.getvalue(),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f'attachment; filename="{kind}_import_errors.csv"',
+                "X-Import-Rows": str(result.rows),
+                "X-Import-Inserted": str(result.inserted),
+                "X-Import-Failed": str(result.failed),
+            },
+        )
+    return result
@@ -0,0 +1,21 @@
+# backend/app/imports/schemas.py
+from typing import List, Literal
+
+from pydantic import BaseModel
+
+ImportKind = Literal["tenants", "leases", "payments"]
+
+
+class ImportRowError(BaseModel):
+    row: int            # 1-based line/row number in the uploaded file (header = 1)
+    error: str
+
+
+class ImportResult(BaseModel):
+    kind: ImportKind
+    dry_run: bool = False
+    rows: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
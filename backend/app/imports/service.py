@@ -0,0 +1,413 @@
+# backend/app/imports/service.py
+"""
+Streaming import of tenants / leases (rent rolls) / payment history.
+
+Rows are read lazily from the upload (csv.DictReader over the spooled file, or
+openpyxl read-only mode for .xlsx), validated with the same schemas and value
+builders as the single-row endpoints, resolved against in-memory lookup maps
+loaded once per import, and inserted with one executemany per batch. Each batch
+is its own transaction; a batch that fails at the DB marks its rows as failed
+and the import carries on. Payment imports re-net the rent ledger once per
+touched lease at the end rather than per batch.
+
+Suggested order when migrating a portfolio: tenants -> leases -> payments.
+"""
+import csv
+import io
+from datetime import date
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.imports.schemas import ImportResult, ImportRowError
+from app.leases.models import leases
+from app.leases.router import _lease_values
+from app.leases.schemas import LeaseCreate
+from app.ledger.models import refresh_lease
+from app.payments.models import payments
+from app.payments.router import PaymentCreate, _coerce_date, _payment_values
+from app.properties.models import Property
+from app.tenants.router import _migrate_tenants_if_needed, _tenant_values, _tenants_meta
+from app.tenants.schemas import TenantCreate
+from app.units.models import units
+
+properties = Property.__table__
+
+# Header spellings seen in exports from other systems -> our field names
+HEADER_ALIASES = {
+    "property": "property_name",
+    "building": "property_name",
+    "unit": "unit_label",
+    "unit_number": "unit_label",
+    "unit_name": "unit_label",
+    "tenant": "tenant_name",
+    "tenant_full_name": "tenant_name",
+    "date": "payment_date",
+    "paid_on": "payment_date",
+    "reference": "external_reference",
+    "ref": "external_reference",
+    "memo": "notes",
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _norm_key(k: Any) -> str:
+    key = str(k or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _clean(raw: Dict[Any, Any]) -> Dict[str, Any]:
+    # Blank cells mean "not provided" so schema defaults apply
+    out: Dict[str, Any] = {}
+    for k, v in raw.items():
+        if k is None:
+            continue  # csv puts overflow cells under None
+        if isinstance(v, str):
+            v = v.strip()
+        if v is None or v == "":
+            continue
+        out[_norm_key(k)] = v
+    return out
+
+
+def _fmt_validation(e: ValidationError) -> str:
+    parts = []
+    for err in e.errors():
+        loc = ".".join(str(x) for x in err.get("loc", ()))
+        parts.append(f"{loc}: {err.get('msg')}" if loc else str(err.get("msg")))
+    return "; ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def iter_csv(fileobj: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for raw in reader:
+            yield reader.line_num, _clean(raw)
+    finally:
+        text.detach()  # leave the upload's file open for its owner
+
+
+def iter_xlsx(fileobj: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook  # optional dependency
+    except ImportError:
+        raise HTTPException(status_code=415, detail="XLSX import requires openpyxl; upload a CSV instead")
+
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        for n, values in enumerate(rows, start=2):
+            if values is None or all(v is None for v in values):
+                continue
+            yield n, _clean(dict(zip(header, values)))
+    finally:
+        wb.close()
+
+
+def iter_upload(fileobj: IO[bytes], filename: Optional[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if (filename or "").lower().endswith((".xlsx", ".xlsm")):
+        return iter_xlsx(fileobj)
+    return iter_csv(fileobj)
+
+
+# ---------------------------------------------------------------------------
+# Lookup maps (loaded once per import)
+# ---------------------------------------------------------------------------
+
+def _as_date(v: Any) -> Optional[date]:
+    if v is None or v == "":
+        return None
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+def _int(v: Any, field: str) -> int:
+    try:
+        return int(str(v).strip())
+    except ValueError:
+        raise RowError(f"{field}: not an integer ({v!r})")
+
+
+class Lookups:
+    def __init__(self, db):
+        t, pk, cols = _tenants_meta()
+        self.tenant_ids = set()
+        self.tenants_by_email: Dict[str, int] = {}
+        self.pending_emails: Set[str] = set()  # reserved by the unflushed batch
+        self.tenants_by_name: Dict[str, List[int]] = {}
+        for r in db.execute(select(*t.c)).fetchall():
+            self.add_tenant(r._mapping[pk.name], r._mapping)
+
+        self.properties_by_name: Dict[str, List[int]] = {}
+        for pid, name in db.execute(select(properties.c.id, properties.c.name)).fetchall():
+            self.properties_by_name.setdefault((name or "").strip().lower(), []).append(pid)
+
+        self.unit_ids = set()
+        self.units_by_label: Dict[Tuple[int, str], int] = {}
+        self.units_by_bare_label: Dict[str, List[int]] = {}
+        for uid, pid, label in db.execute(select(units.c.id, units.c.property_id, units.c.label)).fetchall():
+            label = ((label or "").strip() or f"Unit {uid}").lower()
+            self.unit_ids.add(uid)
+            self.units_by_label[(pid, label)] = uid
+            self.units_by_bare_label.setdefault(label, []).append(uid)
+
+        self.touched_leases = set()
+        self.leases_by_id: Dict[int, Tuple[int, int]] = {}
+        self.leases_by_unit: Dict[int, List[Tuple[Optional[date], Optional[date], int, int]]] = {}
+        stmt = select(leases.c.id, leases.c.tenant_id, leases.c.unit_id, leases.c.start_date, leases.c.end_date)
+        for r in db.execute(stmt).fetchall():
+            self.add_lease(r.id, r.tenant_id, r.unit_id, r.start_date, r.end_date)
+
+    def add_tenant(self, tid: int, m: Dict[str, Any]) -> None:
+        self.tenant_ids.add(tid)
+        email = (m.get("email") or "").strip().lower()
+        if email:
+            self.tenants_by_email[email] = tid
+        name = (m.get("full_name") or "").strip() or f"{m.get('first_name') or ''} {m.get('last_name') or ''}".strip()
+        if name:
+            self.tenants_by_name.setdefault(" ".join(name.lower().split()), []).append(tid)
+
+    def release_pending(self, committed: bool) -> None:
+        # A failed batch wrote nothing: free its emails so a later row may use them
+        if not committed:
+            for email in self.pending_emails:
+                self.tenants_by_email.pop(email, None)
+        self.pending_emails.clear()
+
+    def add_lease(self, lid: int, tenant_id: int, unit_id: int, start: Any, end: Any) -> None:
+        self.leases_by_id[lid] = (tenant_id, unit_id)
+        self.leases_by_unit.setdefault(unit_id, []).append((_as_date(start), _as_date(end), lid, tenant_id))
+
+    def tenant(self, row: Dict[str, Any]) -> Optional[int]:
+        if "tenant_id" in row:
+            tid = _int(row["tenant_id"], "tenant_id")
+            if tid not in self.tenant_ids:
+                raise RowError(f"tenant_id {tid} not found")
+            return tid
+        if "tenant_email" in row:
+            tid = self.tenants_by_email.get(str(row["tenant_email"]).lower())
+            if tid is None:
+                raise RowError(f"no tenant with email {row['tenant_email']!r}")
+            return tid
+        if "tenant_name" in row:
+            ids = self.tenants_by_name.get(" ".join(str(row["tenant_name"]).lower().split()), [])
+            if len(ids) != 1:
+                raise RowError(f"tenant_name {row['tenant_name']!r} matches {len(ids)} tenants")
+            return ids[0]
+        return None
+
+    def unit(self, row: Dict[str, Any]) -> Optional[int]:
+        if "unit_id" in row:
+            uid = _int(row["unit_id"], "unit_id")
+            if uid not in self.unit_ids:
+                raise RowError(f"unit_id {uid} not found")
+            return uid
+        if "unit_label" not in row:
+            return None
+
+        label = str(row["unit_label"]).strip().lower()
+        if "property_id" in row:
+            pid = _int(row["property_id"], "property_id")
+        elif "property_name" in row:
+            pids = self.properties_by_name.get(str(row["property_name"]).strip().lower(), [])
+            if len(pids) != 1:
+                raise RowError(f"property_name {row['property_name']!r} matches {len(pids)} properties")
+            pid = pids[0]
+        else:
+            ids = self.units_by_bare_label.get(label, [])
+            if len(ids) != 1:
+                raise RowError(f"unit_label {row['unit_label']!r} matches {len(ids)} units; add property_name")
+            return ids[0]
+
+        uid = self.units_by_label.get((pid, label))
+        if uid is None:
+            raise RowError(f"unit {row['unit_label']!r} not found in property {pid}")
+        return uid
+
+    def lease(self, row: Dict[str, Any], on: Optional[date]) -> int:
+        if "lease_id" in row:
+            lid = _int(row["lease_id"], "lease_id")
+            if lid not in self.leases_by_id:
+                raise RowError(f"lease_id {lid} not found")
+            return lid
+
+        uid = self.unit(row)
+        tid = self.tenant(row)
+        if uid is not None:
+            cands = self.leases_by_unit.get(uid, [])
+        elif tid is not None:
+            cands = [c for cs in self.leases_by_unit.values() for c in cs]
+        else:
+            raise RowError("need lease_id, or a unit/tenant reference to find the lease")
+        if tid is not None:
+            cands = [c for c in cands if c[3] == tid]
+
+        if on is not None:
+            # Prefer the lease in force on the payment date
+            live = [c for c in cands if (c[0] is None or c[0] <= on) and (c[1] is None or on < c[1])]
+            if live:
+                cands = live
+        if len(cands) != 1:
+            raise RowError(f"matched {len(cands)} leases; add lease_id")
+        return cands[0][2]
+
+
+# ---------------------------------------------------------------------------
+# Per-kind row preparation and batch writers
+# ---------------------------------------------------------------------------
+
+def _prepare_tenant(db, lk: Lookups, row: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(row)
+    if "first_name" not in row and "last_name" not in row:
+        full = str(row.get("full_name") or row.get("name") or row.get("tenant_name") or "").strip()
+        first, _, last = full.partition(" ")
+        row["first_name"], row["last_name"] = first, last.strip()
+    if "tenant_email" in row and "email" not in row:
+        row["email"] = row["tenant_email"]
+
+    payload = TenantCreate.model_validate(row)
+    if payload.email and payload.email.lower() in lk.tenants_by_email:
+        raise RowError(f"tenant with email {payload.email} already exists")
+    _t, _pk, cols = _tenants_meta()
+    values = _tenant_values(payload, cols)
+    if payload.email:
+        # reserve now so duplicates later in the same file are caught
+        lk.tenants_by_email[payload.email.lower()] = -1
+        lk.pending_emails.add(payload.email.lower())
+    return values
+
+
+def _write_tenants(db, lk: Lookups, batch: List[Dict[str, Any]]) -> None:
+    t, pk, _cols = _tenants_meta()
+    for r in db.execute(insert(t).returning(*t.c), batch).fetchall():
+        lk.add_tenant(r._mapping[pk.name], r._mapping)
+
+
+def _prepare_lease(db, lk: Lookups, row: Dict[str, Any]) -> Dict[str, Any]:
+    tid = lk.tenant(row)
+    uid = lk.unit(row)
+    if tid is None:
+        raise RowError("need tenant_id, tenant_email or tenant_name")
+    if uid is None:
+        raise RowError("need unit_id, or property_name + unit_label")
+    payload = LeaseCreate.model_validate({**row, "tenant_id": tid, "unit_id": uid})
+    return _lease_values(payload)
+
+
+def _write_leases(db, lk: Lookups, batch: List[Dict[str, Any]]) -> None:
+    c = leases.c
+    stmt = insert(leases).returning(c.id, c.tenant_id, c.unit_id, c.start_date, c.end_date)
+    for r in db.execute(stmt, batch).fetchall():
+        refresh_lease(db, r.id)
+        lk.add_lease(r.id, r.tenant_id, r.unit_id, r.start_date, r.end_date)
+
+
+def _prepare_payment(db, lk: Lookups, row: Dict[str, Any]) -> Dict[str, Any]:
+    if "payment_date" not in row:
+        raise RowError("payment_date is required")
+    on = _coerce_date(row["payment_date"] if isinstance(row["payment_date"], date) else str(row["payment_date"])[:10])
+    lid = lk.lease(row, on)
+
+    payload = PaymentCreate.model_validate({**row, "lease_id": lid, "payment_date": on})
+    values = _payment_values(payload)
+    values["status"] = str(values.get("status") or "completed").strip().lower()
+    values["tenant_id"], values["unit_id"] = lk.leases_by_id[lid]
+    values["external_reference"] = row.get("external_reference")
+    return values
+
+
+def _write_payments(db, lk: Lookups, batch: List[Dict[str, Any]]) -> None:
+    db.execute(insert(payments), batch)
+    # Ledger is re-netted once per lease at the end of the import, not per batch
+    lk.touched_leases.update(v["lease_id"] for v in batch)
+
+
+Prepare = Callable[[Any, Lookups, Dict[str, Any]], Dict[str, Any]]
+Write = Callable[[Any, Lookups, List[Dict[str, Any]]], None]
+
+KINDS: Dict[str, Tuple[Prepare, Write]] = {
+    "tenants": (_prepare_tenant, _write_tenants),
+    "leases": (_prepare_lease, _write_leases),
+    "payments": (_prepare_payment, _write_payments),
+}
+
+
+def run_import(
+    db,
+    kind: str,
+    rows: Iterator[Tuple[int, Dict[str, Any]]],
+    *,
+    batch_size: int = 1000,
+    dry_run: bool = False,
+    max_errors: int = 1000,
+) -> ImportResult:
+    prepare, write = KINDS[kind]
+    _migrate_tenants_if_needed(db)
+    lk = Lookups(db)
+    result = ImportResult(kind=kind, dry_run=dry_run)
+
+    def fail(line: int, msg: str) -> None:
+        result.failed += 1
+        if len(result.errors) < max_errors:
+            result.errors.append(ImportRowError(row=line, error=msg))
+        else:
+            result.errors_truncated = True
+
+    batch: List[Dict[str, Any]] = []
+    lines: List[int] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        if dry_run:
+            result.inserted += len(batch)
+            lk.release_pending(committed=True)
+        else:
+            try:
+                write(db, lk, batch)
+                db.commit()
+                result.inserted += len(batch)
+                lk.release_pending(committed=True)
+            except SQLAlchemyError as e:
+                db.rollback()
+                lk.release_pending(committed=False)
+                msg = f"batch insert failed: {type(e).__name__}: {str(e).splitlines()[0]}"
+                for line in lines:
+                    fail(line, msg)
+        batch.clear()
+        lines.clear()
+
+    try:
+        for line, row in rows:
+            result.rows += 1
+            try:
+                batch.append(prepare(db, lk, row))
+                lines.append(line)
+            except ValidationError as e:
+                fail(line, _fmt_validation(e))
+            except HTTPException as e:
+                fail(line, str(e.detail))
+            except (RowError, ValueError, TypeError) as e:
+                fail(line, str(e))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        # Committed batches stay committed even if the stream breaks; bring their ledger up to date
+        if lk.touched_leases:
+            db.rollback()
+            for lease_id in sorted(lk.touched_leases):
+                refresh_lease(db, lease_id)
+            db.commit()
+    return result
@@ -0,0 +1,128 @@
+from __future__ import annotations
+# backend/app/includes.py
+"""
+?include= for the local list endpoints: related tenant / unit / property
+labels attached to each row, so a table renders from one response.
+
+    GET /api/leases?include=tenant,unit,property
+    -> [{..., "tenant": {"id": 3, "name": "Ann Lee"},
+              "unit": {"id": 7, "label": "2B"},
+              "property": {"id": 1, "name": "Elm Court"}}]
+
+Each relation is resolved with one batched `WHERE id IN (...)` query over the
+page's distinct ids (chunked to stay under SQLite's bound-parameter limit),
+never one query per row. Payments reach tenant/unit/property through their
+lease. Rows without a match get null.
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.leases.models import leases
+from app.properties.models import Property
+from app.tenants.router import _migrate_tenants_if_needed, _tenants_meta
+from app.units.models import units
+
+IN_CHUNK = 500
+
+# Tables each relation reads, for the list endpoints' ETags
+RELATION_TABLES: Dict[str, Tuple[str, ...]] = {
+    "tenant": ("tenants",),
+    "unit": ("units",),
+    "property": ("units", "properties"),
+}
+
+
+def parse_include(include: Optional[str], allowed: Sequence[str]) -> FrozenSet[str]:
+    if not include:
+        return frozenset()
+    want = {s.strip().lower() for s in include.split(",") if s.strip()}
+    unknown = sorted(want - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"unknown include(s) {unknown}; allowed: {list(allowed)}")
+    return frozenset(want)
+
+
+def include_tables(allowed: Sequence[str], *, via_lease: bool = False) -> Callable[[Request], List[str]]:
+    """For etag_guard(extra=...): the tables the request's ?include= reads."""
+    def _tables(request: Request) -> List[str]:
+        want = parse_include(request.query_params.get("include"), allowed)
+        out = ["leases"] if want and via_lease else []
+        for rel in sorted(want):
+            out.extend(RELATION_TABLES[rel])
+        return out
+    return _tables
+
+
+def tenant_label(m: Dict[str, Any]) -> str:
+    full = (m.get("full_name") or "").strip()
+    return full or f"{m.get('first_name') or ''} {m.get('last_name') or ''}".strip()
+
+
+def _fetch_in(db: Session, cols: Sequence[Any], key: Any, ids: Iterable[int]) -> List[Any]:
+    ids = sorted({int(i) for i in ids if i is not None})
+    rows: List[Any] = []
+    for n in range(0, len(ids), IN_CHUNK):
+        rows.extend(db.execute(select(*cols).where(key.in_(ids[n:n + IN_CHUNK]))).all())
+    return rows
+
+
+def _tenant_names(db: Session, ids: Iterable[int]) -> Dict[int, str]:
+    # Tenants are reflected (column set varies by DB age); see app.tenants.router
+    _migrate_tenants_if_needed(db)
+    t, pk, cols = _tenants_meta()
+    name_cols = [t.c[c] for c in ("first_name", "last_name", "full_name") if c in cols]
+    return {r[0]: tenant_label(dict(r._mapping)) for r in _fetch_in(db, [pk, *name_cols], pk, ids)}
+
+
+def related(db: Session, want: FrozenSet[str], refs: Sequence[Dict[str, Optional[int]]]) -> List[Dict[str, Any]]:
+    """
+    refs: one {"tenant_id", "unit_id", "property_id", "lease_id"} dict per row
+    (any subset). Returns one dict of included objects per row, in order.
+    """
+    out: List[Dict[str, Any]] = [{} for _ in refs]
+    if not want:
+        return out
+    refs = [dict(r) for r in refs]
+
+    if any(r.get("lease_id") is not None for r in refs):
+        by_lease = {
+            r.id: r
+            for r in _fetch_in(db, [leases.c.id, leases.c.tenant_id, leases.c.unit_id], leases.c.id,
+                               (r.get("lease_id") for r in refs))
+        }
+        for r in refs:
+            lease = by_lease.get(r.get("lease_id"))
+            if lease is not None:
+                if r.get("tenant_id") is None:
+                    r["tenant_id"] = lease.tenant_id
+                if r.get("unit_id") is None:
+                    r["unit_id"] = lease.unit_id
+
+    if "tenant" in want:
+        names = _tenant_names(db, (r.get("tenant_id") for r in refs))
+        for o, r in zip(out, refs):
+            tid = r.get("tenant_id")
+            o["tenant"] = {"id": tid, "name": names[tid]} if tid in names else None
+
+    if want & {"unit", "property"}:
+        by_unit = {
+            u.id: u
+            for u in _fetch_in(db, [units.c.id, units.c.label, units.c.property_id], units.c.id,
+                               (r.get("unit_id") for r in refs))
+        }
+        for o, r in zip(out, refs):
+            u = by_unit.get(r.get("unit_id"))
+            if "unit" in want:
+                o["unit"] = {"id": u.id, "label": (u.label or "").strip() or f"Unit {u.id}"} if u is not None else None
+            if u is not None and r.get("property_id") is None:
+                r["property_id"] = u.property_id
+
+    if "property" in want:
+        names = dict(_fetch_in(db, [Property.id, Property.name], Property.id, (r.get("property_id") for r in refs)))
+        for o, r in zip(out, refs):
+            pid = r.get("property_id")
+            o["property"] = {"id": pid, "name": names[pid]} if pid in names else None
+    return out
@@ -0,0 +1,110 @@
+from __future__ import annotations
+# backend/app/index_check.py
+"""
+Index health for the local Core tables.
+
+- missing_indexes(): indexes declared on the Table objects but absent in the DB
+- explain_hot_queries(): EXPLAIN QUERY PLAN for the lookups the routers run,
+  flagging full-table scans and temp B-tree sorts
+
+Run from backend/:  python -m app.index_check
+"""
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, literal, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db_compat import engine as default_engine
+from app.leases.models import clause_value, leases
+from app.payments.models import payment_month_key, payments
+from app.units.models import units
+
+CORE_TABLES = (units, leases, payments)
+
+
+def index_names(conn: Connection, table: str) -> Set[str]:
+    # Not inspect().get_indexes(): SQLite reflection skips expression indexes
+    rows = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"), {"t": table})
+    return {r[0] for r in rows}
+
+
+def _hot_queries() -> List[Tuple[str, Any]]:
+    # Keep in sync with the WHERE/ORDER BY shapes used by the routers
+    p = payments.c
+    return [
+        ("list_units(property_id)", select(units).where(units.c.property_id == 1).order_by(units.c.id.desc())),
+        ("delete_property guard", select(literal(1)).select_from(units).where(units.c.property_id == 1).limit(1)),
+        ("list_leases(tenant_id)", select(leases).where(leases.c.tenant_id == 1).order_by(leases.c.id.desc())),
+        ("list_leases(unit_id)", select(leases).where(leases.c.unit_id == 1).order_by(leases.c.id.desc())),
+        ("list_leases(clause.pets)", select(leases).where(clause_value("pets") == 1).order_by(leases.c.id.desc())),
+        ("list_payments()", select(payments).order_by(p.payment_date.desc(), p.id.desc()).limit(101)),
+        (
+            "list_payments(lease_id)",
+            select(payments).where(p.lease_id == 1).order_by(p.payment_date.desc(), p.id.desc()),
+        ),
+        (
+            "list_payments(tenant_id)",
+            select(payments)
+            .where(p.lease_id.in_(select(leases.c.id).where(leases.c.tenant_id == 1)))
+            .order_by(p.payment_date.desc(), p.id.desc()),
+        ),
+        (
+            "list_payments(month)",
+            select(payments)
+            .where(payment_month_key() == "2026-01")
+            .order_by(p.payment_date.desc(), p.id.desc()),
+        ),
+        ("payments by tenant_id", select(payments).where(p.tenant_id == 1)),
+        ("payments by unit_id", select(payments).where(p.unit_id == 1)),
+        ("payments month/status", select(payments).where(p.payment_month == "2026-01", p.status == "completed")),
+    ]
+
+
+def missing_indexes(conn: Connection) -> List[Dict[str, Any]]:
+    insp = inspect(conn)
+    out: List[Dict[str, Any]] = []
+    for table in CORE_TABLES:
+        if not insp.has_table(table.name):
+            continue
+        present = index_names(conn, table.name)
+        for idx in sorted(table.indexes, key=lambda i: i.name):
+            if idx.name not in present:
+                cols = [c.name for c in idx.columns] or [str(e) for e in idx.expressions]
+                out.append({"table": table.name, "index": idx.name, "columns": cols})
+    return out
+
+
+def explain_hot_queries(conn: Connection) -> List[Dict[str, Any]]:
+    if conn.dialect.name != "sqlite":
+        return []
+    out: List[Dict[str, Any]] = []
+    for name, stmt in _hot_queries():
+        sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        plan = [str(r[-1]) for r in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()]
+        # "SCAN t" = full table scan; "SCAN t USING [COVERING] INDEX" is an ordered index walk
+        full_scans = [d for d in plan if d.startswith("SCAN") and "INDEX" not in d]
+        temp_sorts = [d for d in plan if "TEMP B-TREE" in d]
+        out.append({
+            "query": name,
+            "plan": plan,
+            "full_scan": bool(full_scans),
+            "temp_sort": bool(temp_sorts),
+        })
+    return out
+
+
+def index_report(engine: Optional[Engine] = None) -> Dict[str, Any]:
+    eng = engine or default_engine
+    with eng.connect() as conn:
+        missing = missing_indexes(conn)
+        plans = explain_hot_queries(conn)
+    return {
+        "ok": not missing and not any(q["full_scan"] for q in plans),
+        "missing_indexes": missing,
+        "queries": plans,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(index_report(), indent=2))
@@ -1,7 +1,11 @@
 # backend/app/leases/models.py
-from sqlalchemy import Table, Column, Integer, String, Date, Numeric, Text, DateTime
+import calendar
+from datetime import date
+
+from sqlalchemy import Table, Column, Index, Integer, String, Date, Numeric, Text, DateTime, case, literal_column
 from sqlalchemy.sql import func
-from app.db_compat import metadata, engine
+from app.db_compat import metadata
+from app.lease_builder.state_rules import STATE_RULES
 
 leases = Table(
     "leases",
@@ -30,10 +34,50 @@ leases = Table(
 
     Column("created_at", DateTime(timezone=False), server_default=func.now(), nullable=False),
     Column("notes", Text, nullable=True),
+    # Optimistic concurrency: bumped by every UPDATE (app.db_writes.update_returning)
+    Column("version", Integer, nullable=False, server_default="1"),
+
+    # list_leases(tenant_id=/unit_id=) and payment filters resolved via lease
+    Index("ix_leases_tenant_id", "tenant_id"),
+    Index("ix_leases_unit_id", "unit_id"),
 )
 
+
+def clause_value(key: str):
+    """
+    SQLite JSON1 lookup of one clauses_json key ("pets", "late_fee.amount").
+    NULL when the key is absent or the stored text isn't valid JSON (legacy
+    rows), so a filter never errors out on a bad row.
+
+    The path is inlined rather than bound: SQLite only uses an expression
+    index when the query repeats the indexed expression verbatim, constants
+    included. Callers must validate `key` (see app.leases.router.CLAUSE_KEY).
+    """
+    return case(
+        (
+            func.json_valid(leases.c.clauses_json),
+            func.json_extract(leases.c.clauses_json, literal_column(f"'$.{key}'")),
+        )
+    )
+
+
+# Clause keys the lease builder seeds every lease with; ?clause.<key>= on these
+# is served from an expression index instead of parsing every row's JSON
+INDEXED_CLAUSES = sorted({c["key"] for r in STATE_RULES.values() for c in r.get("default_clauses", [])})
+for _key in INDEXED_CLAUSES:
+    Index(f"ix_leases_clause_{_key}", clause_value(_key))
+
+def _add_months(d: date, months: int) -> date:
+    y = d.year + (d.month - 1 + months) // 12
+    m = (d.month - 1 + months) % 12 + 1
+    day = min(d.day, calendar.monthrange(y, m)[1])
+    return date(y, m, day)
+
 def init_leases_tables():
-    metadata.create_all(bind=engine)
+    # Versioned in app.migrations (no-op when current)
+    from app.migrations import run_migrations
+
+    run_migrations()
 
 # NOTE: could not auto-insert migration block; please add notes migration manually.
 
@@ -1,27 +1,24 @@
 ﻿# backend/app/leases/router.py
 import json
-import calendar
+import re
 from datetime import date, datetime
 from typing import List, Optional, Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlalchemy import select, insert, update, delete
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import literal_column, select, insert, delete
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db_compat import get_db
-from app.leases.models import leases, init_leases_tables
+from app.db_writes import delete_returning, if_match_version, insert_returning, update_returning
+from app.etag import etag_guard
+from app.includes import include_tables, parse_include, related
+from app.leases.models import leases, init_leases_tables, _add_months, clause_value
 from app.leases.schemas import LeaseCreate, LeaseUpdate, LeaseOut
+from app.ledger.models import refresh_lease, delete_lease_balances
 
 router = APIRouter(prefix="/leases", tags=["leases"])
 
 
-def _add_months(d: date, months: int) -> date:
-    y = d.year + (d.month - 1 + months) // 12
-    m = (d.month - 1 + months) % 12 + 1
-    day = min(d.day, calendar.monthrange(y, m)[1])
-    return date(y, m, day)
-
-
 def _parse_date(v: Any) -> Optional[date]:
     """
     Accepts:
@@ -65,8 +62,9 @@ def _safe_json_loads(v: Any) -> Dict[str, Any]:
 def _row_to_out(row) -> LeaseOut:
     m = dict(row._mapping)
 
-    # Convert stored JSON string -> dict for API
-    m["clauses_json"] = _safe_json_loads(m.get("clauses_json"))
+    # Convert stored JSON string -> dict for API (absent when the list skipped clauses)
+    if "clauses_json" in m:
+        m["clauses_json"] = _safe_json_loads(m["clauses_json"])
 
     # Ensure numeric types
     if m.get("monthly_rent") is not None:
@@ -82,80 +80,131 @@ def _startup():
     init_leases_tables()
 
 
-@router.get("", response_model=List[LeaseOut])
+LEASE_INCLUDES = ("tenant", "unit", "property")
+
+# ?clause.<key>=<value>; dotted keys reach nested values (clause.late_fee.amount=50)
+CLAUSE_PARAM = "clause."
+CLAUSE_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def _clause_filters(request: Request) -> List[Any]:
+    """
+    WHERE terms for the clause.* query params, evaluated in SQL (JSON1), so
+    rows are never loaded just to be discarded:
+      true / false  -> JSON boolean (json_extract yields 1 / 0)
+      null          -> key absent or null
+      *             -> key present
+      a number      -> numeric compare
+      anything else -> string compare
+    Values are inlined as SQL literals so SQLite can match the expression
+    indexes on the common keys (app.leases.models.INDEXED_CLAUSES).
+    """
+    terms: List[Any] = []
+    for name, raw in request.query_params.multi_items():
+        if not name.startswith(CLAUSE_PARAM):
+            continue
+        key = name[len(CLAUSE_PARAM):]
+        if not CLAUSE_KEY.match(key):
+            raise HTTPException(status_code=422, detail=f"invalid clause filter {name!r}")
+        col = clause_value(key)
+        v = raw.strip()
+        if v.lower() in ("true", "false"):
+            terms.append(col == literal_column("1" if v.lower() == "true" else "0"))
+        elif v.lower() == "null":
+            terms.append(col.is_(None))
+        elif v == "*":
+            terms.append(col.is_not(None))
+        elif re.fullmatch(r"-?\d+(\.\d+)?", v):
+            terms.append(col == literal_column(v))
+        else:
+            terms.append(col == literal_column("'" + v.replace("'", "''") + "'"))
+    return terms
+
+
+@router.get(
+    "",
+    response_model=List[LeaseOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(etag_guard("leases", extra=include_tables(LEASE_INCLUDES)))],
+)
 def list_leases(
+    request: Request,
     tenant_id: Optional[int] = Query(default=None),
     unit_id: Optional[int] = Query(default=None),
+    include: Optional[str] = Query(default=None, description="comma-separated: tenant,unit,property"),
+    clauses: bool = Query(default=True, description="false: omit clauses_json (skips reading/parsing it)"),
     db=Depends(get_db),
 ):
+    want = parse_include(include, LEASE_INCLUDES)
+    filters = _clause_filters(request)
     try:
-        stmt = select(leases)
+        cols = leases.c if clauses else [c for c in leases.c if c.name != "clauses_json"]
+        stmt = select(*cols).where(*filters)
         if tenant_id is not None:
             stmt = stmt.where(leases.c.tenant_id == tenant_id)
         if unit_id is not None:
             stmt = stmt.where(leases.c.unit_id == unit_id)
 
         rows = db.execute(stmt.order_by(leases.c.id.desc())).fetchall()
-        return [_row_to_out(r) for r in rows]
+        extras = related(db, want, [{"tenant_id": r.tenant_id, "unit_id": r.unit_id} for r in rows])
+        return [_row_to_out(r).model_copy(update=x) for r, x in zip(rows, extras)]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"/leases failed: {type(e).__name__}: {str(e)}")
 
 
-@router.post("", response_model=LeaseOut)
+def _lease_values(payload: LeaseCreate) -> Dict[str, Any]:
+    # Dates come in as strings from schema; parse to date
+    start = _parse_date(payload.start_date) or date.today()
+    end = _parse_date(payload.end_date)
+
+    lease_type = (payload.lease_type or "month_to_month").strip()
+    state = (payload.state or "MN").strip().upper()
+
+    term_months = payload.term_months
+
+    # Smart defaults:
+    if lease_type == "fixed_term":
+        months = int(term_months or 12)
+        term_months = months
+        if end is None:
+            end = _add_months(start, months)
+    elif lease_type in ("month_to_month", "open_ended"):
+        term_months = None
+        end = None
+
+    # Store clauses_json as a JSON string in DB
+    clauses_obj = payload.clauses_json or {}
+    clauses_json = json.dumps(clauses_obj) if isinstance(clauses_obj, dict) else json.dumps({})
+
+    # Defaults
+    security_deposit = payload.security_deposit
+    if security_deposit is None:
+        security_deposit = 0.0
+
+    return dict(
+        tenant_id=int(payload.tenant_id),
+        unit_id=int(payload.unit_id),
+        state=state,
+        lease_type=lease_type,
+        term_months=term_months,
+        start_date=start,
+        end_date=end,
+        monthly_rent=float(payload.monthly_rent),
+        security_deposit=float(security_deposit),
+        rent_due_day=int(payload.rent_due_day),
+        status=payload.status,
+        clauses_json=clauses_json,
+        notes=payload.notes,
+        created_at=datetime.utcnow(),
+    )
+
+
+@router.post("", response_model=LeaseOut, response_model_exclude_unset=True)
 def create_lease(payload: LeaseCreate, db=Depends(get_db)):
     try:
-        # Dates come in as strings from schema; parse to date
-        start = _parse_date(payload.start_date) or date.today()
-        end = _parse_date(payload.end_date)
-
-        lease_type = (payload.lease_type or "month_to_month").strip()
-        state = (payload.state or "MN").strip().upper()
-
-        term_months = payload.term_months
-
-        # Smart defaults:
-        if lease_type == "fixed_term":
-            months = int(term_months or 12)
-            term_months = months
-            if end is None:
-                end = _add_months(start, months)
-        elif lease_type in ("month_to_month", "open_ended"):
-            term_months = None
-            end = None
-
-        # Store clauses_json as a JSON string in DB
-        clauses_obj = payload.clauses_json or {}
-        clauses_json = json.dumps(clauses_obj) if isinstance(clauses_obj, dict) else json.dumps({})
-
-        # Defaults
-        security_deposit = payload.security_deposit
-        if security_deposit is None:
-            security_deposit = 0.0
-
-        created_at = datetime.utcnow()
-
-        res = db.execute(
-            insert(leases).values(
-                tenant_id=int(payload.tenant_id),
-                unit_id=int(payload.unit_id),
-                state=state,
-                lease_type=lease_type,
-                term_months=term_months,
-                start_date=start,
-                end_date=end,
-                monthly_rent=float(payload.monthly_rent),
-                security_deposit=float(security_deposit),
-                rent_due_day=int(payload.rent_due_day),
-                status=payload.status,
-                clauses_json=clauses_json,
-                notes=payload.notes,
-                created_at=created_at,
-            )
-        )
+        row = insert_returning(db, leases, _lease_values(payload))
+        refresh_lease(db, row.id)
         db.commit()
-
-        new_id = res.inserted_primary_key[0]
-        row = db.execute(select(leases).where(leases.c.id == new_id)).fetchone()
         return _row_to_out(row)
 
     except SQLAlchemyError as e:
@@ -164,6 +213,32 @@ def create_lease(payload: LeaseCreate, db=Depends(get_db)):
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"create_lease failed: {type(e).__name__}: {str(e)}")
+
+
+@router.post("/bulk", response_model=List[LeaseOut], response_model_exclude_unset=True)
+def create_leases_bulk(payload: List[LeaseCreate], db=Depends(get_db)):
+    """
+    Create many leases in one transaction (single executemany INSERT ... RETURNING);
+    ledger rows are materialized in the same transaction. Rows come back in request order.
+    """
+    if not payload:
+        return []
+    try:
+        rows = db.execute(
+            insert(leases).returning(*leases.c, sort_by_parameter_order=True),
+            [_lease_values(p) for p in payload],
+        ).fetchall()
+        for r in rows:
+            refresh_lease(db, r.id)
+        db.commit()
+        return [_row_to_out(r) for r in rows]
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"DB error creating Leases: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"create_leases_bulk failed: {type(e).__name__}: {str(e)}")
 # @router.delete("/{lease_id}", status_code=204)
 def delete_lease(lease_id: int, db=Depends(get_db)):
     Lease = db.query(Lease).filter(Lease.id == lease_id).first()
@@ -242,35 +317,49 @@ def delete_lease(lease_id: int, db=Depends(get_db)):
 @router.delete("/{lease_id}", status_code=204)
 def delete_lease(lease_id: int, db=Depends(get_db)):
     try:
-        res = db.execute(leases.delete().where(leases.c.id == lease_id))
+        delete_returning(db, leases, leases.c.id == lease_id, not_found="Lease not found")
+        delete_lease_balances(db, lease_id)
         db.commit()
-        if getattr(res, "rowcount", 0) == 0:
-            raise HTTPException(status_code=404, detail="Lease not found")
         return Response(status_code=204)
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"DB error: {str(e)}")
 # HAPPYRENTALS_CLEAN_DELETE_END
 
-@router.put("/{lease_id}", response_model=LeaseOut)
-def update_lease(lease_id: int, payload: LeaseUpdate, db=Depends(get_db)):
+def _lease_patch_values(payload: LeaseUpdate) -> Dict[str, Any]:
+    # Same storage shapes as _lease_values: real dates, upper-case state, JSON text
+    d = payload.model_dump(exclude_unset=True)
+    for k in ("start_date", "end_date"):
+        if k in d:
+            d[k] = _parse_date(d[k])
+    if d.get("state") is not None:
+        d["state"] = d["state"].strip().upper()
+    if "clauses_json" in d:
+        d["clauses_json"] = json.dumps(d["clauses_json"] or {})
+    return d
+
+
+@router.put("/{lease_id}", response_model=LeaseOut, response_model_exclude_unset=True)
+def update_lease(
+    lease_id: int,
+    payload: LeaseUpdate,
+    version: Optional[int] = Depends(if_match_version),
+    db=Depends(get_db),
+):
     try:
-        init_leases_tables()
-        d = payload.model_dump(exclude_unset=True)
-        if not d:
-            row = db.execute(select(leases).where(leases.c.id == lease_id)).first()
-            if not row:
-                raise HTTPException(status_code=404, detail="Lease not found")
-            return LeaseOut(**dict(getattr(row, "_mapping", row)))
-        res = db.execute(update(leases).where(leases.c.id == lease_id).values(**d))
+        d = _lease_patch_values(payload)
+        row = update_returning(
+            db, leases, leases.c.id == lease_id, d, not_found="Lease not found", version=version, out=_row_to_out
+        )
+        if d:
+            refresh_lease(db, lease_id)
         db.commit()
-        if res.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Lease not found")
-        row = db.execute(select(leases).where(leases.c.id == lease_id)).first()
-        return LeaseOut(**dict(getattr(row, "_mapping", row)))
+        return _row_to_out(row)
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"update_lease failed: {type(e).__name__}: {e}")
 
 
@@ -73,6 +73,12 @@ class LeaseOut(BaseModel):
     notes: Optional[str] = None
 
     created_at: Optional[datetime] = None
+    version: int = 1
+
+    # ?include=tenant,unit,property
+    tenant: Optional[Dict[str, Any]] = None
+    unit: Optional[Dict[str, Any]] = None
+    property: Optional[Dict[str, Any]] = None
 
 
 
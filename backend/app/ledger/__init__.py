@@ -0,0 +1,2 @@
+# backend/app/ledger/__init__.py
+# Ledger / balances feature package
@@ -0,0 +1,228 @@
+# backend/app/ledger/models.py
+"""
+Rent ledger: expected charges derived from `leases`, netted against completed
+`payments`, materialized per (lease_id, month) in `lease_balances`.
+
+Writers keep it current incrementally:
+  - lease create/update  -> refresh_lease()
+  - lease delete         -> delete_lease_balances()
+  - payment write/delete -> refresh_lease_month()
+Open-ended leases are materialized through the current month and extended
+lazily by ensure_through() when a later month is requested.
+"""
+import calendar
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table, Column, Index, Integer, String, Numeric, and_, delete, func, insert, or_, select, update
+
+from app.db_compat import metadata
+from app.leases.models import leases, _add_months
+from app.payments.models import payment_month_key, payments
+
+# Only what the schedule needs: migrations replay refresh_lease() against older
+# schemas, so don't select columns a later migration adds (e.g. leases.version)
+_LEASE_COLS = (
+    leases.c.id,
+    leases.c.tenant_id,
+    leases.c.unit_id,
+    leases.c.start_date,
+    leases.c.end_date,
+    leases.c.monthly_rent,
+    leases.c.rent_due_day,
+    leases.c.status,
+)
+
+lease_balances = Table(
+    "lease_balances",
+    metadata,
+    Column("lease_id", Integer, primary_key=True),
+    Column("month", String(7), primary_key=True),       # YYYY-MM
+
+    Column("tenant_id", Integer, nullable=True),
+    Column("unit_id", Integer, nullable=True),
+
+    Column("due_date", String(10), nullable=False),     # YYYY-MM-DD
+    Column("charge", Numeric(12, 2), nullable=False, default=0),
+    Column("paid", Numeric(12, 2), nullable=False, default=0),
+    Column("balance", Numeric(12, 2), nullable=False, default=0),  # charge - paid
+
+    # portfolio arrears: WHERE due_date <= :as_of GROUP BY lease_id
+    Index("ix_lease_balances_due_lease", "due_date", "lease_id"),
+    Index("ix_lease_balances_unit_id", "unit_id"),
+)
+
+# Leases in these statuses don't accrue rent
+NON_CHARGING_STATUSES = ("draft",)
+
+_MAX_MONTHS = 1200  # safety cap on schedule length
+
+
+def _as_date(v: Any) -> Optional[date]:
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    s = str(v).strip()
+    return date.fromisoformat(s[:10]) if s else None
+
+
+def _month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _month_end(month: str) -> date:
+    y, m = int(month[:4]), int(month[5:7])
+    return date(y, m, calendar.monthrange(y, m)[1])
+
+
+def charge_schedule(lease: Any, through_month: Optional[str] = None) -> Dict[str, Tuple[date, float]]:
+    """
+    month -> (due_date, rent) for a lease row/mapping.
+
+    Billing periods start at _add_months(start_date, k) and run while the period
+    start is before end_date (so a 12-month fixed term yields 12 charges). Open-
+    ended leases run through `through_month` (default: current month). Rent is
+    due on rent_due_day of each period's month, never before the lease starts.
+    """
+    m = getattr(lease, "_mapping", lease)
+    start = _as_date(m.get("start_date"))
+    if start is None or (m.get("status") or "") in NON_CHARGING_STATUSES:
+        return {}
+
+    end = _as_date(m.get("end_date"))
+    through = _month_end(through_month or _month_key(date.today()))
+    rent = float(m.get("monthly_rent") or 0)
+    due_day = max(1, int(m.get("rent_due_day") or 1))
+
+    out: Dict[str, Tuple[date, float]] = {}
+    for k in range(_MAX_MONTHS):
+        period = _add_months(start, k)
+        if end is not None and period >= end:
+            break
+        if end is None and period > through:
+            break
+        due = date(period.year, period.month, min(due_day, calendar.monthrange(period.year, period.month)[1]))
+        if due < start:
+            due = start
+        out[_month_key(period)] = (due, rent)
+    return out
+
+
+def _counted_payment():
+    # Only money actually received nets against rent; NULL status = legacy completed
+    return or_(payments.c.status.is_(None), payments.c.status == "completed")
+
+
+def _paid_by_month(conn, lease_id: int, month: Optional[str] = None) -> Dict[str, float]:
+    pm = payment_month_key()
+    stmt = (
+        select(pm.label("month"), func.sum(payments.c.amount).label("paid"))
+        .where(payments.c.lease_id == lease_id, _counted_payment())
+        .group_by(pm)
+    )
+    if month is not None:
+        stmt = stmt.where(pm == month)
+    return {r.month: float(r.paid or 0) for r in conn.execute(stmt).fetchall() if r.month}
+
+
+def delete_lease_balances(conn, lease_id: int) -> None:
+    conn.execute(delete(lease_balances).where(lease_balances.c.lease_id == lease_id))
+
+
+def refresh_lease(conn, lease_id: int, through_month: Optional[str] = None) -> int:
+    """
+    Recompute every month of one lease. Returns the number of rows written.
+    Runs on the caller's connection/session so it commits with the lease write.
+    """
+    lease = conn.execute(select(*_LEASE_COLS).where(leases.c.id == lease_id)).first()
+    delete_lease_balances(conn, lease_id)
+    if lease is None:
+        return 0
+
+    lm = lease._mapping
+    if through_month is None or through_month < _month_key(date.today()):
+        through_month = _month_key(date.today())
+
+    schedule = charge_schedule(lm, through_month)
+    paid = _paid_by_month(conn, lease_id)
+
+    rows: List[Dict[str, Any]] = []
+    for month in sorted(set(schedule) | set(paid)):
+        due, charge = schedule.get(month, (date.fromisoformat(f"{month}-01"), 0.0))
+        p = paid.get(month, 0.0)
+        rows.append({
+            "lease_id": lease_id,
+            "month": month,
+            "tenant_id": lm.get("tenant_id"),
+            "unit_id": lm.get("unit_id"),
+            "due_date": due.isoformat(),
+            "charge": charge,
+            "paid": p,
+            "balance": round(charge - p, 2),
+        })
+    if rows:
+        conn.execute(insert(lease_balances), rows)
+    return len(rows)
+
+
+def refresh_lease_month(conn, lease_id: int, month: Optional[str]) -> None:
+    """
+    Re-net one (lease, month) after a payment write. Falls back to a full
+    refresh_lease() when the month has no row yet (e.g. a prepayment).
+    """
+    if not lease_id or not month:
+        return
+    month = str(month)[:7]
+    p = _paid_by_month(conn, lease_id, month).get(month, 0.0)
+    res = conn.execute(
+        update(lease_balances)
+        .where(and_(lease_balances.c.lease_id == lease_id, lease_balances.c.month == month))
+        .values(paid=p, balance=lease_balances.c.charge - p)
+    )
+    if (getattr(res, "rowcount", 0) or 0) == 0 and p:
+        refresh_lease(conn, lease_id)
+
+
+def rebuild_all(conn) -> int:
+    conn.execute(delete(lease_balances))
+    n = 0
+    for (lease_id,) in conn.execute(select(leases.c.id)).fetchall():
+        n += refresh_lease(conn, lease_id)
+    return n
+
+
+_extended_through: Optional[str] = None
+
+
+def ensure_through(conn, month: str) -> int:
+    """
+    Make sure open-ended leases have charge rows through `month`.
+    One indexed probe per process per new month; returns leases extended.
+    """
+    global _extended_through
+    if _extended_through is not None and month <= _extended_through:
+        return 0
+
+    lb = lease_balances.c
+    last = (
+        select(lb.lease_id, func.max(lb.month).label("last_month"))
+        .group_by(lb.lease_id)
+        .subquery()
+    )
+    stale = conn.execute(
+        select(leases.c.id)
+        .select_from(leases.outerjoin(last, last.c.lease_id == leases.c.id))
+        .where(
+            leases.c.end_date.is_(None),
+            leases.c.status.notin_(NON_CHARGING_STATUSES),
+            or_(last.c.last_month.is_(None), last.c.last_month < month),
+        )
+    ).fetchall()
+    for (lease_id,) in stale:
+        refresh_lease(conn, lease_id, through_month=month)
+
+    _extended_through = month
+    return len(stale)
@@ -0,0 +1,108 @@
+# backend/app/ledger/router.py
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_compat import get_db
+from app.ledger.models import lease_balances, ensure_through, rebuild_all, _month_key
+from app.ledger.schemas import LeaseArrears, LedgerOut, LeaseBalanceMonth
+from app.units.models import units
+
+router = APIRouter(prefix="/ledger", tags=["ledger"])
+
+
+@router.get("", response_model=LedgerOut)
+def portfolio_ledger(
+    as_of: Optional[date] = Query(default=None),
+    tenant_id: Optional[int] = Query(default=None),
+    unit_id: Optional[int] = Query(default=None),
+    property_id: Optional[int] = Query(default=None),
+    arrears_only: bool = Query(default=True),
+    db=Depends(get_db),
+):
+    """
+    Per-lease charged / paid / balance for everything due on or before `as_of`
+    (default today), aggregated from lease_balances in one GROUP BY.
+    """
+    as_of = as_of or date.today()
+    try:
+        if ensure_through(db, _month_key(as_of)):
+            db.commit()
+
+        lb = lease_balances.c
+        balance = func.sum(lb.balance)
+        stmt = (
+            select(
+                lb.lease_id,
+                func.max(lb.tenant_id).label("tenant_id"),
+                func.max(lb.unit_id).label("unit_id"),
+                func.sum(lb.charge).label("charged"),
+                func.sum(lb.paid).label("paid"),
+                balance.label("balance"),
+                func.sum(case((lb.balance > 0, 1), else_=0)).label("months_open"),
+                func.min(case((lb.balance > 0, lb.due_date))).label("oldest_due_date"),
+            )
+            .where(lb.due_date <= as_of.isoformat())
+            .group_by(lb.lease_id)
+        )
+        if tenant_id is not None:
+            stmt = stmt.where(lb.tenant_id == tenant_id)
+        if unit_id is not None:
+            stmt = stmt.where(lb.unit_id == unit_id)
+        if property_id is not None:
+            stmt = stmt.where(lb.unit_id.in_(select(units.c.id).where(units.c.property_id == property_id)))
+        if arrears_only:
+            stmt = stmt.having(balance > 0.005)
+
+        rows = db.execute(stmt.order_by(balance.desc(), lb.lease_id)).fetchall()
+        items = [
+            LeaseArrears(
+                lease_id=r.lease_id,
+                tenant_id=r.tenant_id,
+                unit_id=r.unit_id,
+                charged=round(float(r.charged or 0), 2),
+                paid=round(float(r.paid or 0), 2),
+                balance=round(float(r.balance or 0), 2),
+                months_open=int(r.months_open or 0),
+                oldest_due_date=r.oldest_due_date,
+            )
+            for r in rows
+        ]
+        return LedgerOut(as_of=as_of, total_balance=round(sum(i.balance for i in items), 2), items=items)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"/ledger failed: {type(e).__name__}: {str(e)}")
+
+
+@router.get("/leases/{lease_id}", response_model=List[LeaseBalanceMonth])
+def lease_ledger(lease_id: int, db=Depends(get_db)):
+    lb = lease_balances.c
+    rows = db.execute(
+        select(lease_balances).where(lb.lease_id == lease_id).order_by(lb.month)
+    ).fetchall()
+    return [
+        LeaseBalanceMonth(
+            lease_id=r.lease_id,
+            month=r.month,
+            due_date=r.due_date,
+            charge=float(r.charge or 0),
+            paid=float(r.paid or 0),
+            balance=float(r.balance or 0),
+        )
+        for r in rows
+    ]
+
+
+@router.post("/rebuild")
+def rebuild(db=Depends(get_db)):
+    # Full recompute; normal writes keep lease_balances current incrementally
+    try:
+        n = rebuild_all(db)
+        db.commit()
+        return {"ok": True, "rows": n}
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"ledger rebuild failed: {type(e).__name__}: {str(e)}")
@@ -0,0 +1,31 @@
+# backend/app/ledger/schemas.py
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class LeaseArrears(BaseModel):
+    lease_id: int
+    tenant_id: Optional[int] = None
+    unit_id: Optional[int] = None
+    charged: float
+    paid: float
+    balance: float
+    months_open: int = 0
+    oldest_due_date: Optional[str] = None
+
+
+class LedgerOut(BaseModel):
+    as_of: date
+    total_balance: float
+    items: List[LeaseArrears]
+
+
+class LeaseBalanceMonth(BaseModel):
+    lease_id: int
+    month: str
+    due_date: str
+    charge: float
+    paid: float
+    balance: float
@@ -0,0 +1,2 @@
+# backend/app/lookups/__init__.py
+# Compact id -> label maps for form dropdowns
@@ -0,0 +1,67 @@
+# backend/app/lookups/router.py
+"""
+Compact id -> label maps for the SPA's <select> boxes, so the lease, payment
+and unit forms don't load the full /properties, /units and /tenants lists.
+
+    GET /api/lookups -> {"properties": {"1": "Elm Court"}, "units": {...}, "tenants": {...}}
+
+The built maps are cached in process for LOOKUPS_CACHE_TTL_SECONDS (0
+disables), keyed to the ETag versions of the three tables. Every committed
+write to them bumps that version (app.etag), so any property, unit or tenant
+write path invalidates the cache without calling into it, and an unchanged
+client copy gets a 304.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db_compat import get_db
+from app.etag import current_etag, etag_guard
+from app.includes import tenant_label
+from app.properties.models import Property
+from app.tenants.router import _migrate_tenants_if_needed, _tenants_meta
+from app.units.models import units
+
+router = APIRouter(prefix="/lookups", tags=["lookups"])
+
+TABLES = ("properties", "units", "tenants")
+CACHE_TTL_SECONDS = float(os.getenv("LOOKUPS_CACHE_TTL_SECONDS", "300"))
+
+# (etag, expires_at monotonic, maps); the local app is single-org, so one entry
+_cache: Optional[Tuple[str, float, Dict[str, Any]]] = None
+_lock = threading.Lock()
+
+
+def _build(db: Session) -> Dict[str, Any]:
+    _migrate_tenants_if_needed(db)
+    t, pk, cols = _tenants_meta()
+    tcols = [t.c[c] for c in ("first_name", "last_name", "full_name") if c in cols]
+
+    props = db.execute(select(Property.id, Property.name).order_by(Property.name)).all()
+    unit_rows = db.execute(select(units.c.id, units.c.label).order_by(units.c.label, units.c.id)).all()
+    tenant_rows = db.execute(select(pk, *tcols).order_by(pk)).all()
+    return {
+        "properties": {str(i): name for i, name in props},
+        "units": {str(i): (label or "").strip() or f"Unit {i}" for i, label in unit_rows},
+        "tenants": {str(r[0]): tenant_label(dict(r._mapping)) for r in tenant_rows},
+    }
+
+
+@router.get("", dependencies=[Depends(etag_guard(*TABLES))])
+def get_lookups(db: Session = Depends(get_db)):
+    global _cache
+    tag = current_etag(TABLES)
+    hit = _cache
+    if hit is not None and hit[0] == tag and hit[1] > time.monotonic():
+        return hit[2]
+
+    maps = _build(db)
+    if CACHE_TTL_SECONDS > 0:
+        with _lock:
+            _cache = (tag, time.monotonic() + CACHE_TTL_SECONDS, maps)
+    return maps
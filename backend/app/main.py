@@ -10,10 +10,13 @@ import app.tenants.router as tenants_routes
 import app.leases.router as leases_routes
 import app.payments.router as payments_routes
 import app.lease_builder.router as lease_builder_routes
+import app.ledger.router as ledger_routes
+import app.reports.router as reports_routes
+import app.imports.router as imports_routes
+import app.exports.router as exports_routes
+import app.lookups.router as lookups_routes
 
-from app.units.models import init_units_tables
-from app.leases.models import init_leases_tables
-from app.payments.models import init_payments_tables
+from app.migrations import run_migrations
 from app.db_compat import engine
 
 app = FastAPI(title="HappyRentals API")
@@ -36,10 +39,8 @@ app.add_middleware(
 
 @app.on_event("startup")
 def _startup_init():
-    # Force-create tables/columns (and ensure absolute DB path is used)
-    init_units_tables()
-    init_leases_tables()
-    init_payments_tables()
+    # Create/upgrade Core tables; O(1) when schema_version is already current
+    run_migrations()
 
 @app.exception_handler(Exception)
 async def _unhandled(request: Request, exc: Exception):
@@ -60,6 +61,11 @@ api_router.include_router(tenants_routes.router)
 api_router.include_router(leases_routes.router)
 api_router.include_router(payments_routes.router)
 api_router.include_router(lease_builder_routes.router)
+api_router.include_router(ledger_routes.router)
+api_router.include_router(reports_routes.router)
+api_router.include_router(imports_routes.router)
+api_router.include_router(exports_routes.router)
+api_router.include_router(lookups_routes.router)
 
 @app.get("/health")
 def health():
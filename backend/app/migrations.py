@@ -0,0 +1,370 @@
+﻿from __future__ import annotations
+# backend/app/migrations.py
+"""
+Versioned schema migrations for the local SQLite database (Core tables).
+
+Each migration runs once, in order, inside its own transaction, and is
+recorded in `schema_version`. When the DB is current, startup costs one
+CREATE TABLE IF NOT EXISTS plus one SELECT MAX(version). Processes starting
+at the same time serialize on SQLite's write lock (see _lock()).
+
+To change the schema: append a new (version, name, fn) to MIGRATIONS, with
+its DDL written out (not derived from the Table objects, which keep moving).
+Never edit or reorder a migration that has already shipped.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db import SQLITE_BUSY_TIMEOUT_MS
+from app.db_compat import engine as default_engine
+from app.ledger.models import rebuild_all
+
+
+def _has_col(conn: Connection, table: str, col: str) -> bool:
+    return any(c["name"] == col for c in inspect(conn).get_columns(table))
+
+
+def _add_col(conn: Connection, table: str, col: str, ddl: str) -> None:
+    if not _has_col(conn, table, col):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+def _m0001_core_tables(conn: Connection) -> None:
+    # The Core tables as they were when versioning started; later columns are
+    # added by later migrations. Spelled out rather than metadata.create_all()
+    # so this step doesn't change when the Table definitions do.
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS units (
+            id INTEGER NOT NULL,
+            property_id INTEGER NOT NULL,
+            label VARCHAR(64),
+            bedrooms INTEGER,
+            bathrooms NUMERIC(10, 2),
+            sqft INTEGER,
+            rent NUMERIC(12, 2),
+            status VARCHAR(32),
+            notes TEXT,
+            PRIMARY KEY (id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS leases (
+            id INTEGER NOT NULL,
+            tenant_id INTEGER NOT NULL,
+            unit_id INTEGER NOT NULL,
+            state VARCHAR(2) DEFAULT 'MN' NOT NULL,
+            lease_type VARCHAR(32) DEFAULT 'fixed_term' NOT NULL,
+            term_months INTEGER,
+            start_date DATE NOT NULL,
+            end_date DATE,
+            monthly_rent NUMERIC(12, 2) DEFAULT '0' NOT NULL,
+            security_deposit NUMERIC(12, 2),
+            rent_due_day INTEGER DEFAULT '1' NOT NULL,
+            status VARCHAR(32) DEFAULT 'draft' NOT NULL,
+            clauses_json TEXT,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+            notes TEXT,
+            PRIMARY KEY (id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER NOT NULL,
+            lease_id INTEGER NOT NULL,
+            tenant_id INTEGER,
+            unit_id INTEGER,
+            amount NUMERIC(12, 2) NOT NULL,
+            payment_date VARCHAR(10) NOT NULL,
+            payment_month VARCHAR(7),
+            method VARCHAR(32) NOT NULL,
+            channel VARCHAR(32) NOT NULL,
+            processor VARCHAR(64) NOT NULL,
+            external_reference VARCHAR(128),
+            payer_handle VARCHAR(128),
+            account_last4 VARCHAR(8),
+            fee NUMERIC(12, 2) NOT NULL,
+            currency VARCHAR(8) NOT NULL,
+            status VARCHAR(32) NOT NULL,
+            notes TEXT,
+            created_at VARCHAR(32),
+            PRIMARY KEY (id)
+        )
+    """))
+
+
+def _m0002_units_columns(conn: Connection) -> None:
+    # Older DBs predate these columns (was scripts/sqlite_migrate_v2.py + init_units_tables)
+    _add_col(conn, "units", "label", "label VARCHAR(64)")
+    _add_col(conn, "units", "bedrooms", "bedrooms INTEGER")
+    _add_col(conn, "units", "bathrooms", "bathrooms NUMERIC(10,2)")
+    _add_col(conn, "units", "sqft", "sqft INTEGER")
+    _add_col(conn, "units", "rent", "rent NUMERIC(12,2)")
+    _add_col(conn, "units", "status", "status VARCHAR(32)")
+    _add_col(conn, "units", "notes", "notes TEXT")
+
+    conn.execute(text("""
+        UPDATE units
+        SET label = COALESCE(NULLIF(TRIM(label), ''), 'Unit ' || id)
+        WHERE label IS NULL OR TRIM(label) = ''
+    """))
+
+
+def _m0003_leases_columns(conn: Connection) -> None:
+    # was scripts/sqlite_migrate_v2.py + scripts/fix_lease_nulls.py
+    _add_col(conn, "leases", "state", "state VARCHAR(2)")
+    _add_col(conn, "leases", "lease_type", "lease_type VARCHAR(32)")
+    _add_col(conn, "leases", "term_months", "term_months INTEGER")
+    _add_col(conn, "leases", "security_deposit", "security_deposit NUMERIC(12,2)")
+    _add_col(conn, "leases", "rent_due_day", "rent_due_day INTEGER")
+    _add_col(conn, "leases", "clauses_json", "clauses_json TEXT")
+    _add_col(conn, "leases", "notes", "notes TEXT")
+    _add_col(conn, "leases", "created_at", "created_at TEXT")
+
+    conn.execute(text("""
+        UPDATE leases
+        SET state = COALESCE(NULLIF(TRIM(state), ''), 'MN')
+        WHERE state IS NULL OR TRIM(state) = ''
+    """))
+    conn.execute(text("""
+        UPDATE leases
+        SET lease_type = COALESCE(NULLIF(TRIM(lease_type), ''), 'fixed_term')
+        WHERE lease_type IS NULL OR TRIM(lease_type) = ''
+    """))
+    conn.execute(text("""
+        UPDATE leases
+        SET rent_due_day = COALESCE(rent_due_day, 1)
+        WHERE rent_due_day IS NULL
+    """))
+    conn.execute(text("""
+        UPDATE leases
+        SET created_at = COALESCE(NULLIF(TRIM(created_at), ''), datetime('now'))
+        WHERE created_at IS NULL OR TRIM(created_at) = ''
+    """))
+
+
+def _m0004_payments_columns(conn: Connection) -> None:
+    # was init_payments_tables() on every startup
+    _add_col(conn, "payments", "channel", "channel TEXT")
+    _add_col(conn, "payments", "processor", "processor TEXT")
+    _add_col(conn, "payments", "external_reference", "external_reference TEXT")
+    _add_col(conn, "payments", "created_at", "created_at TEXT")
+    _add_col(conn, "payments", "tenant_id", "tenant_id INTEGER")
+    _add_col(conn, "payments", "unit_id", "unit_id INTEGER")
+    _add_col(conn, "payments", "payer_handle", "payer_handle TEXT")
+    _add_col(conn, "payments", "account_last4", "account_last4 TEXT")
+    _add_col(conn, "payments", "fee", "fee REAL")
+    _add_col(conn, "payments", "currency", "currency TEXT")
+    _add_col(conn, "payments", "payment_month", "payment_month TEXT")
+
+    conn.execute(text("""
+        UPDATE payments
+        SET channel = COALESCE(NULLIF(TRIM(channel), ''), 'manual')
+        WHERE channel IS NULL OR TRIM(channel) = ''
+    """))
+    conn.execute(text("""
+        UPDATE payments
+        SET processor = COALESCE(NULLIF(TRIM(processor), ''), 'none')
+        WHERE processor IS NULL OR TRIM(processor) = ''
+    """))
+    conn.execute(text("""
+        UPDATE payments
+        SET created_at = COALESCE(NULLIF(TRIM(created_at), ''), datetime('now'))
+        WHERE created_at IS NULL OR TRIM(created_at) = ''
+    """))
+    conn.execute(text("""
+        UPDATE payments
+        SET fee = COALESCE(fee, 0)
+        WHERE fee IS NULL
+    """))
+    conn.execute(text("""
+        UPDATE payments
+        SET currency = COALESCE(NULLIF(TRIM(currency), ''), 'USD')
+        WHERE currency IS NULL OR TRIM(currency) = ''
+    """))
+
+
+def _m0005_payments_backfill_links(conn: Connection) -> None:
+    # was scripts/migrate_backfill_payments.py: copy tenant/unit from the lease,
+    # and derive payment_month from payment_date for rows written before it existed
+    conn.execute(text("""
+        UPDATE payments
+        SET
+          tenant_id = COALESCE(tenant_id, (SELECT tenant_id FROM leases WHERE leases.id = payments.lease_id)),
+          unit_id   = COALESCE(unit_id,   (SELECT unit_id   FROM leases WHERE leases.id = payments.lease_id))
+        WHERE lease_id IS NOT NULL AND (tenant_id IS NULL OR unit_id IS NULL)
+    """))
+    conn.execute(text("""
+        UPDATE payments
+        SET payment_month = SUBSTR(payment_date, 1, 7)
+        WHERE (payment_month IS NULL OR TRIM(payment_month) = '') AND payment_date IS NOT NULL
+    """))
+
+
+def _m0006_core_indexes(conn: Connection) -> None:
+    # FK + sort-column indexes (also declared on the Table objects, for index_check)
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_units_property_id ON units (property_id)",
+        "CREATE INDEX IF NOT EXISTS ix_leases_tenant_id ON leases (tenant_id)",
+        "CREATE INDEX IF NOT EXISTS ix_leases_unit_id ON leases (unit_id)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_tenant_id ON payments (tenant_id)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_unit_id ON payments (unit_id)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_lease_date ON payments (lease_id, payment_date)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_month_status ON payments (payment_month, status)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_date_id ON payments (payment_date, id)",
+        # ?month= filters and the ledger's per-month sums (app.payments.models.payment_month_key)
+        "CREATE INDEX IF NOT EXISTS ix_payments_month_key ON payments "
+        "(coalesce(nullif(payment_month, ''), substr(payment_date, 1, 7)))",
+    ):
+        conn.execute(text(ddl))
+
+
+def _m0007_lease_balances(conn: Connection) -> None:
+    # Materialized rent ledger (app.ledger); seeded once here, then maintained by the writers
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS lease_balances (
+            lease_id INTEGER NOT NULL,
+            month VARCHAR(7) NOT NULL,
+            tenant_id INTEGER,
+            unit_id INTEGER,
+            due_date VARCHAR(10) NOT NULL,
+            charge NUMERIC(12, 2) NOT NULL,
+            paid NUMERIC(12, 2) NOT NULL,
+            balance NUMERIC(12, 2) NOT NULL,
+            PRIMARY KEY (lease_id, month)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lease_balances_due_lease ON lease_balances (due_date, lease_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lease_balances_unit_id ON lease_balances (unit_id)"))
+    rebuild_all(conn)
+
+
+def _m0008_etag_versions(conn: Connection) -> None:
+    # Per-table change counters behind the list ETags (app.etag), shared by all workers
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS etag_versions (
+            tbl TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """))
+
+
+def _m0009_row_versions(conn: Connection) -> None:
+    # Optimistic concurrency (If-Match on PUT /units/{id} and /leases/{id})
+    _add_col(conn, "units", "version", "version INTEGER NOT NULL DEFAULT 1")
+    _add_col(conn, "leases", "version", "version INTEGER NOT NULL DEFAULT 1")
+
+
+def _m0010_lease_clause_indexes(conn: Connection) -> None:
+    # JSON1 expression indexes behind /leases?clause.<key>= (app.leases.models.INDEXED_CLAUSES
+    # at the time: the STATE_RULES default clause keys)
+    for key in (
+        "entry_notice", "late_fee", "maintenance", "parking", "pets",
+        "renters_insurance", "smoking", "subletting", "utilities",
+    ):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_leases_clause_{key} ON leases "
+            f"(CASE WHEN json_valid(clauses_json) THEN json_extract(clauses_json, '$.{key}') END)"
+        ))
+
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "core_tables", _m0001_core_tables),
+    (2, "units_columns", _m0002_units_columns),
+    (3, "leases_columns", _m0003_leases_columns),
+    (4, "payments_columns", _m0004_payments_columns),
+    (5, "payments_backfill_links", _m0005_payments_backfill_links),
+    (6, "core_indexes", _m0006_core_indexes),
+    (7, "lease_balances", _m0007_lease_balances),
+    (8, "etag_versions", _m0008_etag_versions),
+    (9, "row_versions", _m0009_row_versions),
+    (10, "lease_clause_indexes", _m0010_lease_clause_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+_current = False
+
+# How long a process waits for another one's migration step to finish
+_LOCK_WAIT_MS = 10 * 60 * 1000
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """))
+
+
+def current_version(conn: Connection) -> int:
+    return int(conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar() or 0)
+
+
+def _lock(conn: Connection) -> None:
+    # BEGIN IMMEDIATE takes SQLite's write lock up front, so processes starting
+    # together apply a step one at a time; the one that waited re-checks the
+    # version. (pysqlite would otherwise begin lazily, at the first INSERT or
+    # UPDATE, leaving earlier DDL outside the transaction.)
+    conn.exec_driver_sql(f"PRAGMA busy_timeout = {_LOCK_WAIT_MS}")
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    conn.exec_driver_sql(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+
+
+def run_migrations(engine: Engine | None = None) -> int:
+    """
+    Apply pending migrations and return the resulting schema version.
+    Cheap to call repeatedly: after the first success in a process it returns
+    immediately for the default engine.
+    """
+    global _current
+    eng = engine or default_engine
+    if _current and eng is default_engine:
+        return LATEST_VERSION
+
+    with eng.begin() as conn:
+        _ensure_version_table(conn)
+        version = start = current_version(conn)
+
+    for num, name, fn in MIGRATIONS:
+        if num <= version:
+            continue
+        with eng.begin() as conn:
+            _lock(conn)
+            if current_version(conn) >= num:
+                version = num
+                continue  # another process applied it while we waited
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": num, "n": name, "t": datetime.utcnow().isoformat(timespec="seconds")},
+            )
+        print(f"migrations: applied {num:04d}_{name}")
+        version = num
+
+    if eng is default_engine:
+        _current = True
+    if version != start:
+        # Tenants are reflected by their router; make sure it sees the new schema
+        try:
+            from app.tenants.router import invalidate_tenants_table_cache
+
+            invalidate_tenants_table_cache()
+        except Exception:
+            pass
+    return version
@@ -19,10 +19,9 @@ def _date_str(v):
 # backend/app/payments/models.py
 from datetime import datetime
 
-from sqlalchemy import Table, Column, Integer, String, Text, Date, Numeric
-from sqlalchemy import text
+from sqlalchemy import Table, Column, Index, Integer, String, Text, Date, Numeric, func, literal_column
 
-from app.db_compat import metadata, engine
+from app.db_compat import metadata
 
 payments = Table(
     "payments",
@@ -51,57 +50,34 @@ payments = Table(
     Column("notes", Text, nullable=True),
 
     Column("created_at", String(32), nullable=True),
+
+    # (lease_id, payment_date) and (payment_month, status) also serve plain
+    # lease_id / payment_month lookups, so no separate single-column indexes
+    Index("ix_payments_tenant_id", "tenant_id"),
+    Index("ix_payments_unit_id", "unit_id"),
+    Index("ix_payments_lease_date", "lease_id", "payment_date"),
+    Index("ix_payments_month_status", "payment_month", "status"),
+    Index("ix_payments_date_id", "payment_date", "id"),
 )
 
-def _has_col(conn, table: str, col: str) -> bool:
-    rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    return any(r[1] == col for r in rows)
+def payment_month_key(c=payments.c):
+    """
+    The month a payment counts toward: payment_month when set, else derived
+    from payment_date. The ledger groups by this, so month filters use it too.
+    Constants are literals, not bind parameters, so SQLite matches the
+    expression to ix_payments_month_key.
+    """
+    return func.coalesce(
+        func.nullif(c.payment_month, literal_column("''")),
+        func.substr(c.payment_date, literal_column("1"), literal_column("7")),
+    )
 
-def _add_col(conn, table: str, col: str, ddl: str):
-    if not _has_col(conn, table, col):
-        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+Index("ix_payments_month_key", payment_month_key())
 
 def init_payments_tables():
-    metadata.create_all(engine)
-    with engine.begin() as conn:
-        # Ensure columns exist for older DBs
-        _add_col(conn, "payments", "channel", "channel TEXT")
-        _add_col(conn, "payments", "processor", "processor TEXT")
-        _add_col(conn, "payments", "external_reference", "external_reference TEXT")
-        _add_col(conn, "payments", "created_at", "created_at TEXT")
-        _add_col(conn, "payments", "tenant_id", "tenant_id INTEGER")
-        _add_col(conn, "payments", "unit_id", "unit_id INTEGER")
-        _add_col(conn, "payments", "payer_handle", "payer_handle TEXT")
-        _add_col(conn, "payments", "account_last4", "account_last4 TEXT")
-        _add_col(conn, "payments", "fee", "fee REAL")
-        _add_col(conn, "payments", "currency", "currency TEXT")
-        _add_col(conn, "payments", "payment_month", "payment_month TEXT")
-
-        # Backfill defaults
-        conn.execute(text("""
-            UPDATE payments
-            SET channel = COALESCE(NULLIF(TRIM(channel), ''), 'manual')
-            WHERE channel IS NULL OR TRIM(channel) = ''
-        """))
-        conn.execute(text("""
-            UPDATE payments
-            SET processor = COALESCE(NULLIF(TRIM(processor), ''), 'none')
-            WHERE processor IS NULL OR TRIM(processor) = ''
-        """))
-        conn.execute(text("""
-            UPDATE payments
-            SET created_at = COALESCE(NULLIF(TRIM(created_at), ''), datetime('now'))
-            WHERE created_at IS NULL OR TRIM(created_at) = ''
-        """))
-        conn.execute(text("""
-            UPDATE payments
-            SET fee = COALESCE(fee, 0)
-            WHERE fee IS NULL
-        """))
-        conn.execute(text("""
-            UPDATE payments
-            SET currency = COALESCE(NULLIF(TRIM(currency), ''), 'USD')
-            WHERE currency IS NULL OR TRIM(currency) = ''
-        """))
+    # Schema + backfills are versioned in app.migrations (no-op when current)
+    from app.migrations import run_migrations
+
+    run_migrations()
 
 
@@ -1,14 +1,23 @@
 ﻿from __future__ import annotations
 
+import base64
 from datetime import date
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.db_compat import get_db
+from app.db_writes import delete_returning, rows_by_id
+from app.etag import etag_guard
+from app.includes import include_tables, parse_include, related
+from app.leases.models import leases
+from app.ledger.models import refresh_lease_month
+from app.payments.models import payment_month_key
+from app.units.models import units
 
 
 router = APIRouter(prefix="/payments", tags=["payments"])
@@ -59,10 +68,21 @@ class PaymentOut(BaseModel):
     status: str
     notes: Optional[str] = None
 
+    # ?include=tenant,unit,property (resolved through the lease)
+    tenant: Optional[Dict[str, Any]] = None
+    unit: Optional[Dict[str, Any]] = None
+    property: Optional[Dict[str, Any]] = None
+
     class Config:
         from_attributes = True
 
 
+class PaymentPage(BaseModel):
+    items: List[PaymentOut]
+    # Opaque keyset cursor; pass back as ?cursor= to fetch the next page
+    next_cursor: Optional[str] = None
+
+
 def _coerce_date(v: Any) -> date:
     if isinstance(v, date):
         return v
@@ -93,47 +113,180 @@ def _to_out(obj: Any) -> PaymentOut:
     )
 
 
-@router.get("", response_model=List[PaymentOut])
-@router.get("/", response_model=List[PaymentOut])
-def list_payments(lease_id: int = Query(default=None), month: str = Query(default=None), db: Session = Depends(get_db)):
+def _month(month: str) -> str:
+    # Validates and normalizes "YYYY-MM"
+    return date.fromisoformat(f"{month.strip()}-01").isoformat()[:7]
+
+
+def _encode_cursor(payment_date: Any, payment_id: int) -> str:
+    raw = f"{_coerce_date(payment_date).isoformat()}|{int(payment_id)}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    s = cursor.strip()
+    raw = base64.urlsafe_b64decode(s + "=" * (-len(s) % 4)).decode("ascii")
+    d, i = raw.split("|", 1)
+    return date.fromisoformat(d).isoformat(), int(i)
+
+
+def _payment_filters(
+    c,
+    *,
+    lease_id: Optional[int],
+    tenant_id: Optional[int],
+    unit_id: Optional[int],
+    property_id: Optional[int],
+    status: Optional[str],
+    month: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    cursor: Optional[str],
+) -> list:
+    """
+    Build WHERE clauses for the payments list. payment_date is stored as
+    YYYY-MM-DD text, so date ranges compare lexically and stay index-friendly.
+    Tenant/unit/property are resolved through the lease, because older rows
+    (and rows created via POST /payments) don't carry tenant_id/unit_id.
+    """
+    conds = []
+    if lease_id is not None:
+        conds.append(c.lease_id == lease_id)
+    if tenant_id is not None:
+        conds.append(c.lease_id.in_(select(leases.c.id).where(leases.c.tenant_id == tenant_id)))
+    if unit_id is not None:
+        conds.append(c.lease_id.in_(select(leases.c.id).where(leases.c.unit_id == unit_id)))
+    if property_id is not None:
+        conds.append(
+            c.lease_id.in_(
+                select(leases.c.id).where(
+                    leases.c.unit_id.in_(select(units.c.id).where(units.c.property_id == property_id))
+                )
+            )
+        )
+    if status:
+        conds.append(c.status == status.strip().lower())
+    if month:
+        # payment_month, not the payment_date range: a January rent paid on
+        # Feb 2 belongs to January here just as it does in the ledger
+        conds.append(payment_month_key(c) == _month(month))
+    if date_from is not None:
+        conds.append(c.payment_date >= date_from.isoformat())
+    if date_to is not None:
+        conds.append(c.payment_date <= date_to.isoformat())
+    if cursor:
+        # keyset on (payment_date desc, id desc)
+        cur_date, cur_id = _decode_cursor(cursor)
+        conds.append(
+            or_(
+                c.payment_date < cur_date,
+                and_(c.payment_date == cur_date, c.id < cur_id),
+            )
+        )
+    return conds
+
+
+# tenant/unit/property filters resolve through leases and units, so those tables count too
+PAYMENT_INCLUDES = ("tenant", "unit", "property")
+_payments_etag = [
+    Depends(etag_guard("payments", "leases", "units", extra=include_tables(PAYMENT_INCLUDES, via_lease=True)))
+]
+
+
+@router.get("", response_model=PaymentPage, response_model_exclude_unset=True, dependencies=_payments_etag)
+@router.get("/", response_model=PaymentPage, response_model_exclude_unset=True, dependencies=_payments_etag)
+def list_payments(
+    lease_id: Optional[int] = Query(default=None),
+    tenant_id: Optional[int] = Query(default=None),
+    unit_id: Optional[int] = Query(default=None),
+    property_id: Optional[int] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+    month: Optional[str] = Query(default=None, description="YYYY-MM"),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None),
+    include: Optional[str] = Query(default=None, description="comma-separated: tenant,unit,property"),
+    db: Session = Depends(get_db),
+):
+    want = parse_include(include, PAYMENT_INCLUDES)
     try:
-        if ORM_MODE:
-            rows = db.query(Payment).order_by(Payment.payment_date.desc(), Payment.id.desc()).all()  # type: ignore
-            return [_to_out(r) for r in rows]
-
-        if payments_table is None:
+        if not ORM_MODE and payments_table is None:
             raise HTTPException(status_code=500, detail="Payments table/model not available")
 
-        from sqlalchemy import select  # type: ignore
-        rows = db.execute(select(payments_table).order_by(payments_table.c.payment_date.desc(), payments_table.c.id.desc())).all()  # type: ignore
-        return [_to_out(r) for r in rows]
+        c = Payment.__table__.c if ORM_MODE else payments_table.c  # type: ignore
+        try:
+            conds = _payment_filters(
+                c,
+                lease_id=lease_id,
+                tenant_id=tenant_id,
+                unit_id=unit_id,
+                property_id=property_id,
+                status=status,
+                month=month,
+                date_from=date_from,
+                date_to=date_to,
+                cursor=cursor,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"list_payments invalid filter: {e}")
+
+        order = (c.payment_date.desc(), c.id.desc())
+        # Fetch one extra row to know whether another page exists
+        fetch_n = limit + 1 if limit is not None else None
 
+        if ORM_MODE:
+            q = db.query(Payment).filter(*conds).order_by(*order)  # type: ignore
+            rows = (q.limit(fetch_n) if fetch_n else q).all()
+        else:
+            stmt = select(payments_table).where(*conds).order_by(*order)  # type: ignore
+            if fetch_n:
+                stmt = stmt.limit(fetch_n)
+            rows = db.execute(stmt).all()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = getattr(rows[-1], "_mapping", None)
+            if last is not None:
+                next_cursor = _encode_cursor(last["payment_date"], last["id"])
+            else:
+                next_cursor = _encode_cursor(rows[-1].payment_date, rows[-1].id)
+
+        extras = related(db, want, [{"lease_id": r.lease_id} for r in rows])
+        items = [_to_out(r).model_copy(update=x) for r, x in zip(rows, extras)]
+        return PaymentPage(items=items, next_cursor=next_cursor)
+
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"list_payments failed: {type(e).__name__}: {e}")
 
 
-@router.post("", response_model=PaymentOut)
-@router.post("/", response_model=PaymentOut)
+def _payment_values(payload: PaymentCreate) -> Dict[str, Any]:
+    d: Dict[str, Any] = payload.model_dump()
+    # Ensure payment_month exists (DB column is NOT NULL)
+    if not d.get("payment_month"):
+        pd = d.get("payment_date")
+        if pd is None:
+            raise HTTPException(status_code=422, detail="payment_date is required")
+        if isinstance(pd, str):
+            d["payment_month"] = pd[:7]  # YYYY-MM
+        else:
+            d["payment_month"] = f"{pd.year:04d}-{pd.month:02d}"
+    d["payment_date"] = _coerce_date(d["payment_date"])
+
+    # normalize numeric fields
+    d["amount"] = float(d.get("amount") or 0.0)
+    d["fee"] = float(d.get("fee") or 0.0)
+    return d
+
+
+@router.post("", response_model=PaymentOut, response_model_exclude_unset=True)
+@router.post("/", response_model=PaymentOut, response_model_exclude_unset=True)
 def create_payment(payload: PaymentCreate, db: Session = Depends(get_db)):
     try:
-        d: Dict[str, Any] = payload.model_dump()
-        # Ensure payment_month exists (DB column is NOT NULL)
-        if not d.get("payment_month"):
-            pd = d.get("payment_date")
-            if pd is None:
-                raise HTTPException(status_code=422, detail="payment_date is required")
-            if isinstance(pd, str):
-                d["payment_month"] = pd[:7]  # YYYY-MM
-            else:
-                d["payment_month"] = f"{pd.year:04d}-{pd.month:02d}"
-        # Ensure payment_month exists (DB column is NOT NULL)
-        if not d.get("payment_month") and d.get("payment_date"):
-            d["payment_month"] = str(d["payment_date"])[:7]  # YYYY-MM
-        d["payment_date"] = _coerce_date(d["payment_date"])
-
-        # normalize numeric fields
-        d["amount"] = float(d.get("amount") or 0.0)
-        d["fee"] = float(d.get("fee") or 0.0)
+        d = _payment_values(payload)
 
         if ORM_MODE:
             obj = Payment(**d)  # type: ignore
@@ -145,37 +298,11 @@ def create_payment(payload: PaymentCreate, db: Session = Depends(get_db)):
         if payments_table is None:
             raise HTTPException(status_code=500, detail="Payments table/model not available")
 
-        ins = payments_table.insert().values(**d)  # type: ignore
-        res = db.execute(ins)
+        # AFTER INSERT triggers may normalize channel/processor; RETURNING predates them
+        new_id = db.execute(payments_table.insert().values(**d).returning(payments_table.c.id)).scalar_one()  # type: ignore
+        refresh_lease_month(db, d["lease_id"], d.get("payment_month"))
+        (row,) = rows_by_id(db, payments_table, [new_id])  # type: ignore
         db.commit()
-
-        new_id = None
-        try:
-            new_id = res.inserted_primary_key[0]
-        except Exception:
-            pass
-
-        if new_id is None:
-            # last resort: fetch latest row for that lease/date/amount
-            from sqlalchemy import select, and_  # type: ignore
-            row = db.execute(
-                select(payments_table)
-                .where(
-                    and_(
-                        payments_table.c.lease_id == d["lease_id"],
-                        payments_table.c.payment_date == d["payment_date"],
-                        payments_table.c.amount == d["amount"],
-                    )
-                )
-                .order_by(payments_table.c.id.desc())
-            ).first()
-        else:
-            from sqlalchemy import select  # type: ignore
-            row = db.execute(select(payments_table).where(payments_table.c.id == new_id)).first()  # type: ignore
-
-        if not row:
-            raise HTTPException(status_code=500, detail="Payment inserted but could not be reloaded")
-
         return _to_out(row)
 
     except ValueError as e:
@@ -188,6 +315,48 @@ def create_payment(payload: PaymentCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"create_payment failed: {type(e).__name__}: {e}")
 
 
+@router.post("/bulk", response_model=List[PaymentOut], response_model_exclude_unset=True)
+def create_payments_bulk(payload: List[PaymentCreate], db: Session = Depends(get_db)):
+    """
+    Create many payments in one transaction (one executemany INSERT ... RETURNING id, then
+    one SELECT of the stored rows, which AFTER INSERT triggers may have normalized).
+    Each touched (lease, month) ledger row is refreshed once. Rows come back in request order.
+    """
+    if not payload:
+        return []
+    try:
+        values = [_payment_values(p) for p in payload]
+
+        if ORM_MODE:
+            objs = [Payment(**d) for d in values]  # type: ignore
+            db.add_all(objs)
+            db.commit()
+            return [_to_out(o) for o in objs]
+
+        if payments_table is None:
+            raise HTTPException(status_code=500, detail="Payments table/model not available")
+
+        ids = db.execute(
+            payments_table.insert().returning(payments_table.c.id, sort_by_parameter_order=True),  # type: ignore
+            values,
+        ).scalars().all()
+        for lease_id, month in sorted({(d["lease_id"], d["payment_month"]) for d in values}):
+            refresh_lease_month(db, lease_id, month)
+        rows = rows_by_id(db, payments_table, ids)  # type: ignore
+        db.commit()
+        return [_to_out(r) for r in rows]
+
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=422, detail=f"create_payments_bulk invalid input: {e}")
+    except HTTPException:
+        db.rollback()
+        raise
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"create_payments_bulk failed: {type(e).__name__}: {e}")
+
+
 @router.delete("/{payment_id}")
 def delete_payment(payment_id: int, db: Session = Depends(get_db)):
     try:
@@ -202,25 +371,26 @@ def delete_payment(payment_id: int, db: Session = Depends(get_db)):
         if payments_table is None:
             raise HTTPException(status_code=500, detail="Payments table/model not available")
 
-        res = db.execute(payments_table.delete().where(payments_table.c.id == payment_id))  # type: ignore
+        old = delete_returning(
+            db, payments_table, payments_table.c.id == payment_id, not_found="Payment not found"  # type: ignore
+        )
+        refresh_lease_month(db, old.lease_id, old.payment_month or str(old.payment_date or "")[:7])
         db.commit()
-        if getattr(res, "rowcount", 0) == 0:
-            raise HTTPException(status_code=404, detail="Payment not found")
         return {"ok": True}
 
     except HTTPException:
         raise
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=500, detail=f"delete_payment failed: {type(e).__name__}: {e}")
-
-
-
-
-
-
-
-
-
-
-
-
+        raise HTTPException(status_code=500, detail=f"delete_payment failed: {type(e).__name__}: {e}")
+
+
+
+
+
+
+
+
+
+
+
+
@@ -7,6 +7,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.properties import models, schemas
+from app.etag import etag_guard
 
 
 def _import_attr(module_candidates: list[str], attr: str):
@@ -61,7 +62,7 @@ def _clean_payload(data: dict) -> dict:
     return cleaned
 
 
-@router.get("", response_model=List[schemas.PropertyOut])
+@router.get("", response_model=List[schemas.PropertyOut], dependencies=[Depends(etag_guard("properties"))])
 def list_properties(db: Session = Depends(get_db)):
     return db.query(models.Property).order_by(models.Property.id.desc()).all()
 
@@ -81,7 +82,7 @@ def create_property(payload: schemas.PropertyCreate, db: Session = Depends(get_d
     return obj
 
 
-@router.get("/{property_id}", response_model=schemas.PropertyOut)
+@router.get("/{property_id}", response_model=schemas.PropertyOut, dependencies=[Depends(etag_guard("properties"))])
 def get_property(property_id: int, db: Session = Depends(get_db)):
     obj = db.query(models.Property).filter(models.Property.id == property_id).first()
     if not obj:
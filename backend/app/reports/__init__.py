@@ -0,0 +1,2 @@
+# backend/app/reports/__init__.py
+# Reports feature package
@@ -0,0 +1,197 @@
+# backend/app/reports/router.py
+import calendar
+from datetime import date
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case, func, literal, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_compat import get_db
+from app.leases.models import leases
+from app.ledger.models import lease_balances, ensure_through, NON_CHARGING_STATUSES
+from app.properties.models import Property
+from app.reports.schemas import RentRollOut, RentRollProperty, RentRollUnit
+from app.units.models import units
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+properties = Property.__table__
+
+
+def _tenant_join():
+    # Tenants are reflected (legacy schemas vary); report works without them
+    try:
+        from app.tenants.router import _tenants_meta
+
+        t, pk, cols = _tenants_meta()
+        return t, pk, cols
+    except Exception:
+        return None, None, frozenset()
+
+
+def _tenant_name(m: Dict[str, Any]) -> Optional[str]:
+    full = (m.get("t_full_name") or "").strip()
+    if full:
+        return full
+    name = f"{m.get('t_first_name') or ''} {m.get('t_last_name') or ''}".strip()
+    return name or None
+
+
+@router.get("/rent-roll", response_model=RentRollOut)
+def rent_roll(
+    month: Optional[str] = Query(default=None, description="YYYY-MM (default: current month)"),
+    property_id: Optional[int] = Query(default=None),
+    db=Depends(get_db),
+):
+    """
+    One row per unit for `month`: current lease/tenant, scheduled rent,
+    collected, cumulative arrears and vacancy days, plus per-property totals.
+    Everything is aggregated in SQL (correlated, indexed subqueries per unit);
+    Python only shapes the result rows.
+    """
+    try:
+        ms = date.fromisoformat(f"{(month or date.today().strftime('%Y-%m')).strip()}-01")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="month must be YYYY-MM")
+    days = calendar.monthrange(ms.year, ms.month)[1]
+    me = date(ms.year, ms.month, days)
+    nxt = date(ms.year + ms.month // 12, ms.month % 12 + 1, 1)
+    month_key = ms.strftime("%Y-%m")
+
+    try:
+        if ensure_through(db, month_key):
+            db.commit()
+
+        L = leases.alias("l")
+        overlap = and_(
+            L.c.unit_id == units.c.id,
+            L.c.status.notin_(NON_CHARGING_STATUSES),
+            L.c.start_date < nxt,
+            or_(L.c.end_date.is_(None), L.c.end_date > ms),
+        )
+
+        # Lease in force for the month (latest start wins)
+        cur_id = (
+            select(L.c.id).where(overlap)
+            .order_by(L.c.start_date.desc(), L.c.id.desc())
+            .limit(1).scalar_subquery()
+        )
+        # Days covered by any lease in the month; end_date is exclusive
+        occupied = (
+            select(
+                func.coalesce(
+                    func.sum(
+                        func.julianday(func.min(func.coalesce(L.c.end_date, nxt), literal(nxt)))
+                        - func.julianday(func.max(L.c.start_date, literal(ms)))
+                    ),
+                    0,
+                )
+            ).where(overlap).scalar_subquery()
+        )
+
+        cl = leases.alias("cl")
+        lbm = lease_balances.alias("lbm")
+        lb = lease_balances.c
+        arrears = (
+            select(func.coalesce(func.sum(lb.balance), 0))
+            .where(lb.lease_id == cl.c.id, lb.due_date <= me.isoformat())
+            .scalar_subquery()
+        )
+
+        cols = [
+            units.c.property_id,
+            properties.c.name.label("property_name"),
+            units.c.id.label("unit_id"),
+            units.c.label.label("unit_label"),
+            cl.c.id.label("lease_id"),
+            cl.c.tenant_id,
+            cl.c.lease_type,
+            cl.c.start_date.label("lease_start"),
+            cl.c.end_date.label("lease_end"),
+            func.coalesce(lbm.c.charge, 0).label("scheduled_rent"),
+            func.coalesce(lbm.c.paid, 0).label("collected"),
+            case((cl.c.id.is_(None), 0), else_=arrears).label("arrears"),
+            (literal(days) - func.min(literal(days), func.round(occupied))).label("vacancy_days"),
+        ]
+
+        frm = (
+            units.outerjoin(properties, properties.c.id == units.c.property_id)
+            .outerjoin(cl, cl.c.id == cur_id)
+            .outerjoin(lbm, and_(lbm.c.lease_id == cl.c.id, lbm.c.month == month_key))
+        )
+
+        t, t_pk, t_cols = _tenant_join()
+        if t is not None:
+            frm = frm.outerjoin(t, t_pk == cl.c.tenant_id)
+            for name in ("first_name", "last_name", "full_name"):
+                if name in t_cols:
+                    cols.append(t.c[name].label(f"t_{name}"))
+
+        stmt = select(*cols).select_from(frm)
+        if property_id is not None:
+            stmt = stmt.where(units.c.property_id == property_id)
+        stmt = stmt.order_by(units.c.property_id, units.c.id)
+
+        # Per-property totals over the same unit rows
+        per_unit = stmt.order_by(None).subquery()
+        totals = db.execute(
+            select(
+                per_unit.c.property_id,
+                func.max(per_unit.c.property_name).label("property_name"),
+                func.count().label("units"),
+                func.count(per_unit.c.lease_id).label("occupied_units"),
+                func.sum(per_unit.c.scheduled_rent).label("scheduled_rent"),
+                func.sum(per_unit.c.collected).label("collected"),
+                func.sum(per_unit.c.arrears).label("arrears"),
+                func.sum(per_unit.c.vacancy_days).label("vacancy_days"),
+            )
+            .group_by(per_unit.c.property_id)
+            .order_by(per_unit.c.property_id)
+        ).fetchall()
+
+        rows = db.execute(stmt).fetchall()
+
+        unit_rows = []
+        for r in rows:
+            m = r._mapping
+            arr = round(float(m["arrears"] or 0), 2)
+            unit_rows.append(RentRollUnit(
+                property_id=m["property_id"],
+                property_name=m["property_name"],
+                unit_id=m["unit_id"],
+                unit_label=(m["unit_label"] or "").strip() or f"Unit {m['unit_id']}",
+                lease_id=m["lease_id"],
+                tenant_id=m["tenant_id"],
+                tenant_name=_tenant_name(m),
+                lease_type=m["lease_type"],
+                lease_start=m["lease_start"],
+                lease_end=m["lease_end"],
+                scheduled_rent=round(float(m["scheduled_rent"] or 0), 2),
+                collected=round(float(m["collected"] or 0), 2),
+                arrears=arr,
+                delinquent=arr > 0.005,
+                vacancy_days=int(m["vacancy_days"] or 0),
+            ))
+
+        return RentRollOut(
+            month=month_key,
+            days_in_month=days,
+            properties=[
+                RentRollProperty(
+                    property_id=r.property_id,
+                    property_name=r.property_name,
+                    units=int(r.units or 0),
+                    occupied_units=int(r.occupied_units or 0),
+                    scheduled_rent=round(float(r.scheduled_rent or 0), 2),
+                    collected=round(float(r.collected or 0), 2),
+                    arrears=round(float(r.arrears or 0), 2),
+                    vacancy_days=int(r.vacancy_days or 0),
+                )
+                for r in totals
+            ],
+            units=unit_rows,
+        )
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"/reports/rent-roll failed: {type(e).__name__}: {str(e)}")
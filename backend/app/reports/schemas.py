@@ -0,0 +1,43 @@
+# backend/app/reports/schemas.py
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RentRollUnit(BaseModel):
+    property_id: int
+    property_name: Optional[str] = None
+    unit_id: int
+    unit_label: Optional[str] = None
+
+    lease_id: Optional[int] = None
+    tenant_id: Optional[int] = None
+    tenant_name: Optional[str] = None
+    lease_type: Optional[str] = None
+    lease_start: Optional[date] = None
+    lease_end: Optional[date] = None
+
+    scheduled_rent: float = 0
+    collected: float = 0          # completed payments attributed to the month
+    arrears: float = 0            # cumulative unpaid through month end
+    delinquent: bool = False
+    vacancy_days: int = 0
+
+
+class RentRollProperty(BaseModel):
+    property_id: int
+    property_name: Optional[str] = None
+    units: int
+    occupied_units: int
+    scheduled_rent: float
+    collected: float
+    arrears: float
+    vacancy_days: int
+
+
+class RentRollOut(BaseModel):
+    month: str
+    days_in_month: int
+    properties: List[RentRollProperty]
+    units: List[RentRollUnit]
@@ -19,8 +19,10 @@ def verify_password(pw: str, hashed: str) -> bool:
         return False
 
 def create_token(user_id: int, org_id: int, role: str) -> str:
-    exp = datetime.utcnow() + timedelta(days=30)
-    payload = {"sub": str(user_id), "org_id": org_id, "role": role, "exp": exp}
+    now = datetime.utcnow()
+    exp = now + timedelta(days=30)
+    # iat also keys the auth-context cache in app.saas.deps
+    payload = {"sub": str(user_id), "org_id": org_id, "role": role, "iat": now, "exp": exp}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
 def decode_token(token: str) -> dict:
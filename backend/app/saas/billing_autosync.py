@@ -1,22 +1,55 @@
 ﻿from __future__ import annotations
 
+from datetime import datetime, timedelta
+from typing import Optional
+
 from sqlalchemy.orm import Session
 from app.saas.config import settings
 from app.saas import models
+from app.saas.stripe_client import StripeClient, get_stripe_client
+from app.saas.usage import get_usage
+
+def enqueue_quantity_sync(db: Session, org_id: int) -> None:
+    """
+    Record that org usage changed. Call before the caller's commit so the
+    outbox row lands atomically with the change; one row per org, so bursts
+    coalesce into a single push once the debounce window (counted from the
+    first pending change) elapses. No network I/O here.
+    """
+    now = datetime.utcnow()
+    t = models.StripeSyncOutbox.__table__
+    values = {
+        "org_id": org_id,
+        "requested_at": now,
+        "due_at": now + timedelta(seconds=settings.STRIPE_SYNC_DEBOUNCE_SECONDS),
+        "attempts": 0,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        row = db.query(models.StripeSyncOutbox).filter(models.StripeSyncOutbox.org_id == org_id).first()
+        if row is None:
+            db.add(models.StripeSyncOutbox(**values))
+        else:
+            row.requested_at = now
+        return
 
-def _counts(db: Session, org_id: int) -> tuple[int, int]:
-    units = db.query(models.Unit).filter(models.Unit.org_id == org_id, models.Unit.is_active == True).count()
-    tenants = db.query(models.Tenant).filter(models.Tenant.org_id == org_id, models.Tenant.is_active == True).count()
-    return units, tenants
+    stmt = insert(t).values(**values)
+    db.execute(stmt.on_conflict_do_update(index_elements=[t.c.org_id], set_={"requested_at": stmt.excluded.requested_at}))
 
-def maybe_sync_stripe_quantity(db: Session, org_id: int) -> dict:
+def maybe_sync_stripe_quantity(db: Session, org_id: int, client: Optional[StripeClient] = None) -> dict:
     """
     Best-effort: keep Stripe subscription quantity in sync with billable usage.
     - No-ops if Stripe not configured
     - No-ops if org not subscribed yet (missing stripe_item_id/subscription_id)
     - Updates quantity based on org subscription plan_type (per_unit / per_tenant)
+    Runs off the request path (app.saas.stripe_outbox); CRUD calls enqueue_quantity_sync().
     """
-    if not settings.STRIPE_SECRET_KEY:
+    client = client or get_stripe_client()
+    if client is None:
         return {"ok": False, "reason": "stripe_not_configured"}
 
     sub = db.query(models.Subscription).filter(models.Subscription.org_id == org_id).first()
@@ -25,14 +58,12 @@ def maybe_sync_stripe_quantity(db: Session, org_id: int) -> dict:
     if not sub.stripe_subscription_id or not sub.stripe_item_id:
         return {"ok": False, "reason": "not_subscribed_yet"}
 
-    units, tenants = _counts(db, org_id)
+    units, tenants = get_usage(db, org_id)
     qty = units if (sub.plan_type or "per_unit") == "per_unit" else tenants
     qty = max(1, int(qty))
 
     try:
-        import stripe
-        stripe.api_key = settings.STRIPE_SECRET_KEY
-        stripe.SubscriptionItem.modify(sub.stripe_item_id, quantity=qty)
+        client.set_item_quantity(sub.stripe_item_id, qty)
         return {"ok": True, "plan_type": sub.plan_type, "quantity": qty, "units": units, "tenants": tenants}
     except Exception as e:
         # don't break normal CRUD if Stripe hiccups
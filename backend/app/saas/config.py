@@ -5,10 +5,25 @@ from dataclasses import dataclass
 @dataclass
 class Settings:
     APP_MODE: str = os.getenv("APP_MODE", "local")  # local | saas
+    APP_BASE_URL: str = os.getenv("APP_BASE_URL", "http://localhost:5173")  # links in outgoing mail
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./saas.db")
+    # Serve the resource routers on AsyncSession (aiosqlite/asyncpg) instead of the threadpool
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "").lower() in ("1", "true", "yes")
+
+    # Connection pool (app.saas.db), per process: size it so workers * (size + overflow) < max_connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # Postgres only; 0 = server default
+    DB_RLS: bool = os.getenv("DB_RLS", "").lower() in ("1", "true", "yes")  # Postgres row-level security on org tables (app.saas.rls)
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "").lower() in ("1", "true", "yes")  # transaction-pooling PgBouncer in front
+    ADMIN_EMAILS: str = os.getenv("ADMIN_EMAILS", "")  # comma-separated operator logins for /api/admin/*; empty = nobody
     JWT_SECRET: str = os.getenv("JWT_SECRET", "dev-secret-change-me")
     JWT_ALG: str = os.getenv("JWT_ALG", "HS256")
     JWT_EXPIRE_MIN: int = int(os.getenv("JWT_EXPIRE_MIN", "43200"))  # 30 days
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))  # 0 disables
 
     # Stripe (SaaS only)
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
@@ -19,4 +34,24 @@ class Settings:
     STRIPE_CANCEL_URL: str = os.getenv("STRIPE_CANCEL_URL", "http://localhost:5173/app?billing=cancel")
     STRIPE_PORTAL_RETURN_URL: str = os.getenv("STRIPE_PORTAL_RETURN_URL", "http://localhost:5173/app/billing")
 
+    # Quantity sync outbox (app.saas.stripe_outbox)
+    STRIPE_FAKE: bool = os.getenv("STRIPE_FAKE", "").lower() in ("1", "true", "yes")  # in-memory Stripe for dev/tests
+    STRIPE_SYNC_DEBOUNCE_SECONDS: float = float(os.getenv("STRIPE_SYNC_DEBOUNCE_SECONDS", "30"))
+    STRIPE_SYNC_POLL_SECONDS: float = float(os.getenv("STRIPE_SYNC_POLL_SECONDS", "5"))  # 0 disables the worker
+    STRIPE_SYNC_RETRY_MAX_SECONDS: float = float(os.getenv("STRIPE_SYNC_RETRY_MAX_SECONDS", "3600"))
+
+    # Usage counters (app.saas.usage): full recount of every org this often; 0 disables
+    USAGE_RECONCILE_SECONDS: float = float(os.getenv("USAGE_RECONCILE_SECONDS", "3600"))
+
+    # GET /api/lookups (app.saas.lookups): per-org LRU of built id -> label maps
+    LOOKUPS_CACHE_TTL_SECONDS: float = float(os.getenv("LOOKUPS_CACHE_TTL_SECONDS", "300"))  # 0 disables
+    LOOKUPS_CACHE_SIZE: int = int(os.getenv("LOOKUPS_CACHE_SIZE", "1000"))  # orgs
+
+    # Outgoing mail queue (app.saas.email_outbox); SMTP_* connection settings live in app.saas.notify
+    EMAIL_POLL_SECONDS: float = float(os.getenv("EMAIL_POLL_SECONDS", "2"))  # 0 disables the worker
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))      # then status=dead
+    EMAIL_RETRY_BASE_SECONDS: float = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))   # worker closes the pooled session after this long unused
+
 settings = Settings()
@@ -1,16 +1,125 @@
 ﻿from __future__ import annotations
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.saas.config import settings
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./saas.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
+# ---------------------------------------------------------------------------
+# Pool. QueuePool subclasses that count checkouts that had to wait for a free
+# connection (pool and overflow exhausted) and how long they waited; exposed
+# via pool_status() / GET /api/admin/pool.
+# ---------------------------------------------------------------------------
+
+class _PoolMetrics:
+    def _init_metrics(self) -> None:
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        exhausted = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkouts += 1
+                if exhausted:
+                    self.waits += 1
+                    self.wait_seconds += waited
+                    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+class MeteredQueuePool(_PoolMetrics, QueuePool):
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._init_metrics()
+
+class MeteredAsyncQueuePool(_PoolMetrics, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._init_metrics()
+
+def _engine_kwargs(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Pool + connection options from settings.DB_* for either engine flavour.
+
+    DB_PGBOUNCER: PgBouncer (transaction pooling) already pools server
+    connections, so the app keeps none (NullPool), asyncpg's prepared
+    statement cache is disabled, and statement_timeout is applied per
+    transaction with SET LOCAL because startup options are rejected.
+    """
+    u = make_url(url)
+    backend = u.get_backend_name()
+    kw: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = {}
+
+    if backend == "sqlite" and not is_async:
+        connect_args["check_same_thread"] = False
+
+    if backend == "sqlite" and u.database in (None, "", ":memory:"):
+        pass  # in-memory: keep SQLAlchemy's single-connection pool
+    elif backend == "postgresql" and settings.DB_PGBOUNCER:
+        kw["poolclass"] = NullPool
+        if is_async:
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+    else:
+        kw.update(
+            poolclass=MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_use_lifo=True,  # idle extras age out via recycle instead of staying warm
+        )
+
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if backend == "postgresql" and timeout_ms > 0 and not settings.DB_PGBOUNCER:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+
+    kw["connect_args"] = connect_args
+    return kw
+
+def _apply_transaction_timeout(sync_engine: Engine) -> None:
+    # PgBouncer mode: session-level SETs would leak to other clients, so scope to the transaction
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if not (settings.DB_PGBOUNCER and timeout_ms > 0 and sync_engine.dialect.name == "postgresql"):
+        return
+
+    @event.listens_for(sync_engine, "begin")
+    def _set_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+_apply_transaction_timeout(engine)
+
+class SaasSession(Session):
+    """Session class shared by the sync and async session factories (event hooks attach here)."""
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=SaasSession)
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +128,81 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# ---------------------------------------------------------------------------
+# Async variant (settings.DB_ASYNC). Same database, async driver:
+# sqlite -> aiosqlite, postgresql -> asyncpg. Both are optional installs, so
+# the engine is only built on first use.
+# ---------------------------------------------------------------------------
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    u = make_url(url)
+    driver = _ASYNC_DRIVERS.get(u.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {u.get_backend_name()!r}")
+    return u.set(drivername=driver).render_as_string(hide_password=False)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session: Optional[async_sessionmaker[AsyncSession]] = None
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_session
+    if _async_engine is None:
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **_engine_kwargs(url, is_async=True))
+        _apply_transaction_timeout(_async_engine.sync_engine)
+        # expire_on_commit=False: returned ORM objects are serialized after commit
+        # and must not lazy-load (no implicit IO under asyncio)
+        _async_session = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False, sync_session_class=SaasSession
+        )
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_session = None
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, _PoolMetrics):
+        with pool._metrics_lock:
+            out.update(
+                checkouts=pool.checkouts,
+                waits=pool.waits,
+                wait_seconds=round(pool.wait_seconds, 4),
+                max_wait_seconds=round(pool.max_wait_seconds, 4),
+                timeouts=pool.timeouts,
+            )
+    return out
+
+def pool_status() -> Dict[str, Any]:
+    """Snapshot of this process's pools (each uvicorn worker has its own)."""
+    out: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "backend": engine.dialect.name,
+        "pgbouncer": settings.DB_PGBOUNCER,
+        "sync": _pool_stats(engine.pool),
+    }
+    if _async_engine is not None:
+        out["async"] = _pool_stats(_async_engine.sync_engine.pool)
+    return out
@@ -1,11 +1,20 @@
 ﻿from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Dict, Optional, Tuple
+
 from fastapi import Depends, HTTPException, Request
+from sqlalchemy import and_, event, select, update
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 
-from app.saas.db import get_db
+from app.saas.db import SaasSession, get_db
 from app.saas import models
 from app.saas.auth import decode_token
+from app.saas.config import settings
+from app.saas.rls import bind_org
 
 def _get_token(req: Request) -> str:
     # Prefer Authorization Bearer; fallback to cookie
@@ -15,30 +24,179 @@ def _get_token(req: Request) -> str:
     c = req.cookies.get("hr_token", "")
     return (c or "").strip()
 
-def get_current_user(req: Request, db: Session = Depends(get_db)) -> models.User:
+@dataclass(frozen=True)
+class AuthContext:
+    """
+    Everything the dependency chain needs about the caller, loaded in one
+    joined query. Attribute names match models.User (id/org_id/email/role/
+    is_active) so route code that reads `user.x` works unchanged.
+    """
+    id: int
+    org_id: int
+    email: str
+    role: str
+    is_active: bool
+    org_name: Optional[str] = None
+    sub_status: Optional[str] = None       # None = org has no subscription row yet
+    sub_plan_type: Optional[str] = None
+    auth_version: int = 0                  # org's AUTH_RESOURCE stamp when loaded
+
+# (user_id, token iat) -> (expires_at monotonic, context), per process. A hit
+# is only used while the org's stamp in saas_resource_versions still matches
+# ctx.auth_version: every write to a user, org or subscription row bumps it in
+# the same transaction (_track_auth_changes), so a change made by any worker
+# invalidates the entry everywhere. A hit costs one primary-key read instead
+# of the joined load.
+AUTH_RESOURCE = "auth"
+_versions = models.ResourceVersion.__table__
+_auth_cache: Dict[Tuple[int, int], Tuple[float, AuthContext]] = {}
+_auth_lock = threading.Lock()
+_AUTH_CACHE_MAX = 10_000
+
+def invalidate_auth_cache(user_id: Optional[int] = None, org: Optional[int] = None) -> None:
+    """
+    Drop cached contexts for a user and/or a whole org (no args = everything).
+    Other workers notice the change through the DB stamp; this frees this
+    worker's entries right away.
+    """
+    with _auth_lock:
+        if user_id is None and org is None:
+            _auth_cache.clear()
+            return
+        for key, (_exp, ctx) in list(_auth_cache.items()):
+            if ctx.id == user_id or ctx.org_id == org:
+                _auth_cache.pop(key, None)
+
+def _load_auth_context(db: Session, uid: int) -> Optional[AuthContext]:
+    row = (
+        db.query(
+            models.User.id,
+            models.User.org_id,
+            models.User.email,
+            models.User.role,
+            models.User.is_active,
+            models.Organization.name,
+            models.Subscription.status,
+            models.Subscription.plan_type,
+            _versions.c.version,
+        )
+        .outerjoin(models.Organization, models.Organization.id == models.User.org_id)
+        .outerjoin(models.Subscription, models.Subscription.org_id == models.User.org_id)
+        .outerjoin(_versions, and_(_versions.c.org_id == models.User.org_id, _versions.c.resource == AUTH_RESOURCE))
+        .filter(models.User.id == uid)
+        .first()
+    )
+    if row is None:
+        return None
+    return AuthContext(
+        id=int(row[0]),
+        org_id=int(row[1]),
+        email=row[2],
+        role=row[3] or "",
+        is_active=bool(row[4]),
+        org_name=row[5],
+        sub_status=row[6],
+        sub_plan_type=row[7],
+        auth_version=int(row[8] or 0),
+    )
+
+def bump_version(conn: Connection, org_id: int, resource: str) -> None:
+    """Add one to an org's counter in saas_resource_versions, in conn's transaction."""
+    t = _versions
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(t).values(org_id=org_id, resource=resource, version=1)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[t.c.org_id, t.c.resource], set_={"version": t.c.version + 1}
+        ))
+        return
+    res = conn.execute(
+        update(t).where(t.c.org_id == org_id, t.c.resource == resource).values(version=t.c.version + 1)
+    )
+    if not res.rowcount:
+        conn.execute(t.insert().values(org_id=org_id, resource=resource, version=1))
+
+def _auth_version(db: Session, org: int) -> int:
+    v = db.execute(
+        select(_versions.c.version).where(_versions.c.org_id == org, _versions.c.resource == AUTH_RESOURCE)
+    ).scalar()
+    return int(v or 0)
+
+def _still_current(db: Session, ctx: AuthContext) -> bool:
+    # A cached context is stale once any worker has changed the org's users/subscription
+    return _auth_version(db, ctx.org_id) == ctx.auth_version
+
+@event.listens_for(SaasSession, "after_flush")
+def _track_auth_changes(session: Session, flush_context) -> None:
+    orgs: set[int] = set()
+    for objs in (session.new, session.dirty, session.deleted):
+        for obj in objs:
+            if objs is session.dirty and not session.is_modified(obj):
+                continue
+            if isinstance(obj, models.Organization) and obj.id is not None:
+                orgs.add(int(obj.id))
+            elif isinstance(obj, (models.User, models.Subscription)) and obj.org_id is not None:
+                orgs.add(int(obj.org_id))
+    if orgs:
+        conn = session.connection()
+        for oid in sorted(orgs):
+            bump_version(conn, oid, AUTH_RESOURCE)
+
+def _token_key(req: Request) -> Tuple[int, Tuple[int, int]]:
+    # (user id, cache key) from the request's JWT; 401 if absent or invalid
     token = _get_token(req)
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
         payload = decode_token(token)
+        uid = int(payload.get("sub") or 0)
+        return uid, (uid, int(payload.get("iat") or 0))
     except Exception:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    uid = int(payload.get("sub") or 0)
-    user = db.query(models.User).filter(models.User.id == uid).first()
-    if not user or not user.is_active:
+def _cached_context(key: Tuple[int, int]) -> Optional[AuthContext]:
+    hit = _auth_cache.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+def _remember_context(key: Tuple[int, int], ctx: Optional[AuthContext]) -> AuthContext:
+    if not ctx or not ctx.is_active:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return user
+    if settings.AUTH_CACHE_TTL_SECONDS > 0:
+        with _auth_lock:
+            if len(_auth_cache) >= _AUTH_CACHE_MAX:
+                _auth_cache.clear()
+            _auth_cache[key] = (time.monotonic() + settings.AUTH_CACHE_TTL_SECONDS, ctx)
+    return ctx
 
-def org_id(user: models.User = Depends(get_current_user)) -> int:
-    return int(user.org_id)
+def get_auth_context(req: Request, db: Session = Depends(get_db)) -> AuthContext:
+    # FastAPI resolves this once per request; the TTL cache spares the DB across requests
+    uid, key = _token_key(req)
+    ctx = _cached_context(key)
+    if ctx is None or not _still_current(db, ctx):
+        ctx = _remember_context(key, _load_auth_context(db, uid))
+    if settings.DB_RLS:
+        bind_org(db, ctx.org_id)
+    req.state.auth = ctx
+    return ctx
+
+def get_current_user(ctx: AuthContext = Depends(get_auth_context)) -> AuthContext:
+    return ctx
+
+def org_id(ctx: AuthContext = Depends(get_auth_context)) -> int:
+    return int(ctx.org_id)
 
 def require_roles(user: models.User, roles: list[str]):
     if (user.role or "").lower() not in [r.lower() for r in roles]:
         raise HTTPException(status_code=403, detail="Forbidden")
 
 def require_roles_dep(roles: list[str]):
-    def _dep(user: models.User = Depends(get_current_user)):
+    def _dep(user: AuthContext = Depends(get_current_user)):
         require_roles(user, roles)
         return True
     return _dep
@@ -48,16 +206,21 @@ def _get_sub(db: Session, oid: int) -> models.Subscription:
     if not sub:
         sub = models.Subscription(org_id=oid, plan_type="per_unit", status="trialing")
         db.add(sub); db.commit(); db.refresh(sub)
+        invalidate_auth_cache(org=oid)
     return sub
 
-def require_subscription_read(db: Session = Depends(get_db), oid: int = Depends(org_id)):
-    sub = _get_sub(db, oid)
-    if (sub.status or "") in ("trialing", "active", "past_due"):
-        return sub
+def _sub_status(db: Session, ctx: AuthContext) -> str:
+    if ctx.sub_status is None:
+        # First request for a new org: lazily create the row (rare path)
+        return _get_sub(db, ctx.org_id).status or ""
+    return ctx.sub_status
+
+def require_subscription_read(db: Session = Depends(get_db), ctx: AuthContext = Depends(get_auth_context)):
+    if _sub_status(db, ctx) in ("trialing", "active", "past_due"):
+        return ctx
     raise HTTPException(status_code=402, detail="Subscription required")
 
-def require_subscription_write(db: Session = Depends(get_db), oid: int = Depends(org_id)):
-    sub = _get_sub(db, oid)
-    if (sub.status or "") in ("trialing", "active"):
-        return sub
+def require_subscription_write(db: Session = Depends(get_db), ctx: AuthContext = Depends(get_auth_context)):
+    if _sub_status(db, ctx) in ("trialing", "active"):
+        return ctx
     raise HTTPException(status_code=402, detail="Subscription required (upgrade to continue)")
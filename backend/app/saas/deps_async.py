@@ -0,0 +1,54 @@
+﻿from __future__ import annotations
+"""
+Async counterparts of app.saas.deps for routers running on AsyncSession
+(settings.DB_ASYNC). Same names, same auth cache, same errors; only the DB
+access is awaited. Sync helpers run on the session via run_sync().
+"""
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.saas.config import settings
+from app.saas.db import get_async_db
+from app.saas.rls import bind_org
+from app.saas.deps import (
+    AuthContext, _cached_context, _get_sub, _load_auth_context, _remember_context, _still_current, _token_key,
+    require_roles,
+)
+
+async def get_auth_context(req: Request, db: AsyncSession = Depends(get_async_db)) -> AuthContext:
+    uid, key = _token_key(req)
+    ctx = _cached_context(key)
+    if ctx is None or not await db.run_sync(_still_current, ctx):
+        ctx = _remember_context(key, await db.run_sync(_load_auth_context, uid))
+    if settings.DB_RLS:
+        await db.run_sync(bind_org, ctx.org_id)
+    req.state.auth = ctx
+    return ctx
+
+async def get_current_user(ctx: AuthContext = Depends(get_auth_context)) -> AuthContext:
+    return ctx
+
+async def org_id(ctx: AuthContext = Depends(get_auth_context)) -> int:
+    return int(ctx.org_id)
+
+def require_roles_dep(roles: list[str]):
+    async def _dep(user: AuthContext = Depends(get_current_user)):
+        require_roles(user, roles)
+        return True
+    return _dep
+
+async def _sub_status(db: AsyncSession, ctx: AuthContext) -> str:
+    if ctx.sub_status is None:
+        sub = await db.run_sync(_get_sub, ctx.org_id)
+        return sub.status or ""
+    return ctx.sub_status
+
+async def require_subscription_read(db: AsyncSession = Depends(get_async_db), ctx: AuthContext = Depends(get_auth_context)):
+    if await _sub_status(db, ctx) in ("trialing", "active", "past_due"):
+        return ctx
+    raise HTTPException(status_code=402, detail="Subscription required")
+
+async def require_subscription_write(db: AsyncSession = Depends(get_async_db), ctx: AuthContext = Depends(get_auth_context)):
+    if await _sub_status(db, ctx) in ("trialing", "active"):
+        return ctx
+    raise HTTPException(status_code=402, detail="Subscription required (upgrade to continue)")
@@ -0,0 +1,112 @@
+﻿from __future__ import annotations
+"""
+Background delivery of saas_email_outbox.
+
+Each poll claims a batch of due messages and sends them over one pooled SMTP
+session. Failures retry with exponential backoff; after EMAIL_MAX_ATTEMPTS a
+message is dead-lettered (status="dead", last_error kept) for inspection.
+Without SMTP_HOST, messages are logged to stdout and marked sent (dev mode).
+
+For tests, point SMTP_HOST/SMTP_PORT at a local stand-in server (e.g.
+aiosmtpd on 127.0.0.1:8025, SMTP_STARTTLS=false) and call deliver_pending().
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.saas import models
+from app.saas.config import settings
+from app.saas.db import SessionLocal
+from app.saas.notify import SMTPPool, build_message
+
+Outbox = models.EmailOutbox
+
+pool = SMTPPool()
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+
+
+def deliver_pending(smtp: Optional[SMTPPool] = None, now: Optional[datetime] = None, limit: Optional[int] = None) -> dict:
+    smtp = smtp or pool
+    now = now or datetime.utcnow()
+    stats = {"sent": 0, "retry": 0, "dead": 0}
+    db = SessionLocal()
+    try:
+        due = (
+            db.query(Outbox)
+            .filter(Outbox.status == "queued", Outbox.next_attempt_at <= now)
+            .order_by(Outbox.next_attempt_at, Outbox.id)
+            .limit(limit or settings.EMAIL_BATCH_SIZE)
+            .all()
+        )
+        for row in due:
+            # Claim: push next_attempt_at past this batch so another worker skips it
+            claimed = db.query(Outbox).filter(
+                Outbox.id == row.id, Outbox.status == "queued", Outbox.next_attempt_at == row.next_attempt_at
+            ).update({"next_attempt_at": now + _backoff(row.attempts + 1)}, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                continue
+
+            to_list = [e for e in (row.to_emails or "").split(",") if e]
+            try:
+                if SMTPPool.configured():
+                    smtp.send(build_message(row.subject, row.body, to_list))
+                else:
+                    print("EMAIL (dev log):", row.subject)
+                    print("TO:", to_list)
+                    print(row.body)
+            except Exception as e:
+                row.attempts = (row.attempts or 0) + 1
+                row.last_error = f"{type(e).__name__}: {e}"[:2000]
+                if row.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                    row.status = "dead"
+                    stats["dead"] += 1
+                else:
+                    row.next_attempt_at = now + _backoff(row.attempts)
+                    stats["retry"] += 1
+                db.commit()
+                continue
+
+            row.status = "sent"
+            row.sent_at = datetime.utcnow()
+            row.attempts = (row.attempts or 0) + 1
+            db.commit()
+            stats["sent"] += 1
+        return stats
+    finally:
+        db.close()
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _run() -> None:
+    while not _stop.wait(settings.EMAIL_POLL_SECONDS):
+        try:
+            while sum(deliver_pending().values()) >= settings.EMAIL_BATCH_SIZE and not _stop.is_set():
+                pass  # full batch: drain the backlog before sleeping again
+        except Exception as e:
+            print("email outbox: drain failed:", type(e).__name__, e)
+        pool.close_idle()
+    pool.close()
+
+
+def start_worker() -> None:
+    global _thread
+    if settings.EMAIL_POLL_SECONDS <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="email-outbox", daemon=True)
+    _thread.start()
+
+
+def stop_worker(timeout: float = 5.0) -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
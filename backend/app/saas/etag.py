@@ -0,0 +1,133 @@
+﻿from __future__ import annotations
+"""
+Weak ETags for SaaS list/detail endpoints, per org and per resource.
+
+- Writes: an after_flush hook on SaasSession bumps saas_resource_versions for
+  every (org, table) the flush inserted, changed or deleted, in the same
+  transaction, so the tag can never run ahead of committed data. Bulk
+  insert()/delete() statements skip flush events; their callers call bump().
+- Reads: etag_guard(resource) / etag_guard_async(resource) read one row by
+  primary key and answer a matching If-None-Match with 304 before the
+  endpoint queries the resource table. Endpoints built from several
+  resources use current_versions() + respond() directly (app.saas.lookups).
+"""
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.saas import deps, deps_async, models
+from app.saas.db import SaasSession, get_async_db, get_db
+
+TRACKED = {
+    m.__tablename__: m
+    for m in (models.Property, models.Unit, models.Tenant, models.Lease, models.Payment, models.MaintenanceRequest)
+}
+_versions = models.ResourceVersion.__table__
+
+
+def bump(db: Session, org_id: int, resource: str) -> None:
+    """Mark a resource changed for an org (in the caller's transaction)."""
+    deps.bump_version(db.connection(), org_id, resource)
+
+
+@event.listens_for(SaasSession, "after_flush")
+def _track_changes(session: Session, flush_context) -> None:
+    touched: Set[Tuple[int, str]] = set()
+    for objs in (session.new, session.dirty, session.deleted):
+        for obj in objs:
+            table = getattr(type(obj), "__tablename__", None)
+            if table in TRACKED and obj.org_id is not None:
+                if objs is session.dirty and not session.is_modified(obj):
+                    continue
+                touched.add((int(obj.org_id), table))
+    if touched:
+        conn = session.connection()
+        for oid, table in sorted(touched):
+            deps.bump_version(conn, oid, table)
+
+
+def current_version(db: Session, org_id: int, resource: str) -> int:
+    v = db.execute(
+        select(_versions.c.version).where(_versions.c.org_id == org_id, _versions.c.resource == resource)
+    ).scalar()
+    return int(v or 0)
+
+
+def current_versions(db: Session, org_id: int, resources: Iterable[str]) -> Tuple[int, ...]:
+    """Versions of several resources in one query, in the order given."""
+    resources = tuple(resources)
+    rows = dict(db.execute(
+        select(_versions.c.resource, _versions.c.version)
+        .where(_versions.c.org_id == org_id, _versions.c.resource.in_(resources))
+    ).all())
+    return tuple(int(rows.get(r) or 0) for r in resources)
+
+
+def make_etag(org_id: int, resource: str, version: int) -> str:
+    return f'W/"{resource}-{org_id}-{version}"'
+
+
+def _matches(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    want = tag[2:]
+    return any((c.strip()[2:] if c.strip().startswith("W/") else c.strip()) == want for c in header.split(","))
+
+
+def respond(request: Request, response: Response, tag: str) -> None:
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    if _matches(request, tag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+Extra = Optional[Callable[[Request], Iterable[str]]]
+
+
+def _resources(request: Request, resource: str, extra: Extra) -> List[str]:
+    more = [r for r in (extra(request) if extra else ()) if r != resource]
+    return [resource, *dict.fromkeys(more)]
+
+
+def _tag(db: Session, oid: int, resources: List[str]) -> str:
+    if len(resources) == 1:
+        return make_etag(oid, resources[0], current_version(db, oid, resources[0]))
+    versions = current_versions(db, oid, resources)
+    return make_etag(oid, "+".join(resources), ".".join(map(str, versions)))
+
+
+def etag_guard(resource: str, extra: Extra = None):
+    """
+    Dependency for the sync routers. Runs the subscription check first so a
+    lapsed org gets 402, never a 304. `extra(request)` names more resources
+    the response reads for this request (app.saas.includes for ?include=).
+    """
+    def _dep(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        oid: int = Depends(deps.org_id),
+        _=Depends(deps.require_subscription_read),
+    ) -> None:
+        respond(request, response, _tag(db, oid, _resources(request, resource, extra)))
+    return _dep
+
+
+def etag_guard_async(resource: str, extra: Extra = None):
+    """etag_guard() for the AsyncSession routers."""
+    async def _dep(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        oid: int = Depends(deps_async.org_id),
+        _=Depends(deps_async.require_subscription_read),
+    ) -> None:
+        tag = await db.run_sync(_tag, oid, _resources(request, resource, extra))
+        respond(request, response, tag)
+    return _dep
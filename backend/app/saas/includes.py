@@ -0,0 +1,120 @@
+﻿from __future__ import annotations
+"""
+?include= for the SaaS lease, payment and unit lists: related tenant / unit /
+property labels attached to each row, so a table renders from one response.
+
+    GET /api/leases?include=tenant,unit,property
+    -> [{..., "tenant": {"id": 3, "name": "Ann Lee"},
+              "unit": {"id": 7, "label": "2B"},
+              "property": {"id": 1, "name": "Elm Court"}}]
+
+Each relation is one org-scoped `WHERE id IN (...)` query over the page's
+distinct ids (chunked for SQLite's parameter limit), never one per row.
+Payments reach tenant/unit/property through their lease. Async routers call
+related() through AsyncSession.run_sync.
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.saas import models
+
+IN_CHUNK = 500
+
+LEASE_INCLUDES = ("tenant", "unit", "property")
+PAYMENT_INCLUDES = ("tenant", "unit", "property")
+UNIT_INCLUDES = ("property",)
+
+# Resources each relation reads, for the list endpoints' ETags
+RELATION_RESOURCES: Dict[str, Tuple[str, ...]] = {
+    "tenant": ("tenants",),
+    "unit": ("units",),
+    "property": ("units", "properties"),
+}
+
+
+def parse_include(include: Optional[str], allowed: Sequence[str]) -> FrozenSet[str]:
+    if not include:
+        return frozenset()
+    want = {s.strip().lower() for s in include.split(",") if s.strip()}
+    unknown = sorted(want - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"unknown include(s) {unknown}; allowed: {list(allowed)}")
+    return frozenset(want)
+
+
+def include_resources(allowed: Sequence[str], *, via_lease: bool = False) -> Callable[[Request], List[str]]:
+    """For etag_guard(extra=...): the resources the request's ?include= reads."""
+    def _resources(request: Request) -> List[str]:
+        want = parse_include(request.query_params.get("include"), allowed)
+        out = ["leases"] if want and via_lease else []
+        for rel in sorted(want):
+            out.extend(RELATION_RESOURCES[rel])
+        return out
+    return _resources
+
+
+def _fetch_in(db: Session, oid: int, model: Type, cols: Sequence[Any], ids: Iterable[Optional[int]]) -> List[Any]:
+    ids = sorted({int(i) for i in ids if i is not None})
+    rows: List[Any] = []
+    for n in range(0, len(ids), IN_CHUNK):
+        chunk = ids[n:n + IN_CHUNK]
+        rows.extend(db.execute(select(*cols).where(model.org_id == oid, model.id.in_(chunk))).all())
+    return rows
+
+
+def related(db: Session, oid: int, want: FrozenSet[str], refs: Sequence[Dict[str, Optional[int]]]) -> List[Dict[str, Any]]:
+    """
+    refs: one {"tenant_id", "unit_id", "property_id", "lease_id"} dict per row
+    (any subset). Returns one dict of included objects per row, in order.
+    """
+    out: List[Dict[str, Any]] = [{} for _ in refs]
+    if not want:
+        return out
+    refs = [dict(r) for r in refs]
+    L, T, U, P = models.Lease, models.Tenant, models.Unit, models.Property
+
+    if any(r.get("lease_id") is not None for r in refs):
+        by_lease = {l.id: l for l in _fetch_in(db, oid, L, [L.id, L.tenant_id, L.unit_id], (r.get("lease_id") for r in refs))}
+        for r in refs:
+            lease = by_lease.get(r.get("lease_id"))
+            if lease is not None:
+                if r.get("tenant_id") is None:
+                    r["tenant_id"] = lease.tenant_id
+                if r.get("unit_id") is None:
+                    r["unit_id"] = lease.unit_id
+
+    if "tenant" in want:
+        names = {
+            t.id: f"{t.first_name or ''} {t.last_name or ''}".strip()
+            for t in _fetch_in(db, oid, T, [T.id, T.first_name, T.last_name], (r.get("tenant_id") for r in refs))
+        }
+        for o, r in zip(out, refs):
+            tid = r.get("tenant_id")
+            o["tenant"] = {"id": tid, "name": names[tid]} if tid in names else None
+
+    if want & {"unit", "property"}:
+        by_unit = {u.id: u for u in _fetch_in(db, oid, U, [U.id, U.unit_number, U.property_id], (r.get("unit_id") for r in refs))}
+        for o, r in zip(out, refs):
+            u = by_unit.get(r.get("unit_id"))
+            if "unit" in want:
+                o["unit"] = {"id": u.id, "label": u.unit_number} if u is not None else None
+            if u is not None and r.get("property_id") is None:
+                r["property_id"] = u.property_id
+
+    if "property" in want:
+        names = dict(_fetch_in(db, oid, P, [P.id, P.name], (r.get("property_id") for r in refs)))
+        for o, r in zip(out, refs):
+            pid = r.get("property_id")
+            o["property"] = {"id": pid, "name": names[pid]} if pid in names else None
+    return out
+
+
+def attach(rows: Sequence[Any], out_schema: Type[BaseModel], extras: Sequence[Dict[str, Any]]) -> list:
+    """ORM rows -> out_schema instances carrying their includes (rows as-is when there are none)."""
+    if not any(extras):
+        return list(rows)
+    return [out_schema.model_validate(o).model_copy(update=x) for o, x in zip(rows, extras)]
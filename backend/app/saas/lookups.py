@@ -0,0 +1,70 @@
+﻿from __future__ import annotations
+"""
+Compact id -> label maps for the SPA's <select> boxes (GET /api/lookups):
+property name, unit number and tenant full name, instead of three full lists.
+
+Built maps are cached per org in an in-process LRU (settings.LOOKUPS_CACHE_SIZE
+orgs, LOOKUPS_CACHE_TTL_SECONDS each). An entry is only served while the org's
+saas_resource_versions for properties, units and tenants still match the ones
+it was built at. Every write path bumps those in its own transaction (see
+app.saas.etag), so a write through any router, bulk path or worker process
+invalidates the entry on the next request; the same versions are the ETag.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.saas import models
+from app.saas.config import settings
+
+RESOURCES = ("properties", "units", "tenants")
+
+# org_id -> (expires_at monotonic, versions, maps), least recently used first
+_cache: "OrderedDict[int, Tuple[float, Tuple[int, ...], Dict[str, Any]]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate(org_id: Optional[int] = None) -> None:
+    """Drop one org's entry (no args = everything)."""
+    with _lock:
+        if org_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(org_id, None)
+
+
+def _build(db: Session, oid: int) -> Dict[str, Any]:
+    P, U, T = models.Property, models.Unit, models.Tenant
+    props = db.execute(select(P.id, P.name).where(P.org_id == oid).order_by(P.name)).all()
+    units = db.execute(select(U.id, U.unit_number).where(U.org_id == oid).order_by(U.unit_number, U.id)).all()
+    tenants = db.execute(
+        select(T.id, T.first_name, T.last_name).where(T.org_id == oid).order_by(T.last_name, T.first_name)
+    ).all()
+    return {
+        "properties": {str(i): name for i, name in props},
+        "units": {str(i): number for i, number in units},
+        "tenants": {str(i): f"{first or ''} {last or ''}".strip() for i, first, last in tenants},
+    }
+
+
+def get_lookups(db: Session, oid: int, versions: Tuple[int, ...]) -> Dict[str, Any]:
+    """Maps for an org at `versions` (from etag.current_versions(..., RESOURCES))."""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(oid)
+        if hit is not None and hit[0] > now and hit[1] == versions:
+            _cache.move_to_end(oid)
+            return hit[2]
+
+    maps = _build(db, oid)
+    if settings.LOOKUPS_CACHE_TTL_SECONDS > 0:
+        with _lock:
+            _cache[oid] = (now + settings.LOOKUPS_CACHE_TTL_SECONDS, versions, maps)
+            _cache.move_to_end(oid)
+            while len(_cache) > max(settings.LOOKUPS_CACHE_SIZE, 1):
+                _cache.popitem(last=False)
+    return maps
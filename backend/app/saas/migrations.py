@@ -0,0 +1,123 @@
+from __future__ import annotations
+"""
+Versioned schema migrations for the SaaS database (SQLite or Postgres).
+
+create_all() in saas_main creates missing tables but never adds columns to
+tables that already exist; columns added to app.saas.models after a table
+shipped need a migration here. Each migration runs once, in order, inside
+its own transaction, and is recorded in `saas_schema_version`. Migrations
+must be idempotent: on a fresh DB create_all has already made the columns.
+
+To change the schema: append a new (version, name, fn) to MIGRATIONS.
+Never edit or reorder a migration that has already shipped.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.saas import models
+
+# pg_advisory_xact_lock key: serializes workers that start at the same time
+_PG_LOCK = 0x5AA5_0001
+
+
+def _has_col(conn: Connection, table: str, col: str) -> bool:
+    return any(c["name"] == col for c in inspect(conn).get_columns(table))
+
+
+def _add_col(conn: Connection, col: Column, ddl_suffix: str = "") -> bool:
+    """ALTER TABLE ADD COLUMN from the model's Column (type rendered for this dialect)."""
+    table = col.table.name
+    if _has_col(conn, table, col.name):
+        return False
+    ddl = f"{col.name} {col.type.compile(dialect=conn.dialect)} {ddl_suffix}".strip()
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+def _m0001_stripe_item_id(conn: Connection) -> None:
+    # Subscription item whose quantity the Stripe outbox pushes (app.saas.stripe_outbox)
+    _add_col(conn, models.Subscription.__table__.c.stripe_item_id)
+
+
+def _m0002_updated_at(conn: Connection) -> None:
+    # Delta sync (?updated_since=, app.saas.pagination). Seeded from created_at;
+    # NOT NULL where the dialect can add it after the fact (SQLite can't, and
+    # the ORM default fills it on every insert anyway)
+    for model in (models.Property, models.Unit, models.Tenant, models.Lease, models.Payment):
+        t = model.__tablename__
+        _add_col(conn, model.__table__.c.updated_at)
+        conn.execute(text(f"UPDATE {t} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"))
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE {t} ALTER COLUMN updated_at SET NOT NULL"))
+
+
+def _m0003_row_versions(conn: Connection) -> None:
+    # Optimistic concurrency: version_id_col on these models (app.saas.versioning)
+    for model in (models.Unit, models.Lease, models.MaintenanceRequest):
+        _add_col(conn, model.__table__.c.version, "NOT NULL DEFAULT 1")
+
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "stripe_item_id", _m0001_stripe_item_id),
+    (2, "updated_at", _m0002_updated_at),
+    (3, "row_versions", _m0003_row_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS saas_schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at VARCHAR(32) NOT NULL
+        )
+    """))
+
+
+def current_version(conn: Connection) -> int:
+    return int(conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM saas_schema_version")).scalar() or 0)
+
+
+def _begin(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _PG_LOCK})
+        # backfills must see every org's rows when RLS is on (app.saas.rls)
+        conn.execute(text("SELECT set_config('app.bypass_rls', 'on', true)"))
+
+
+def run_migrations(engine: Engine) -> int:
+    """Apply pending migrations (call after create_all) and return the resulting version."""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        version = current_version(conn)
+
+    for num, name, fn in MIGRATIONS:
+        if num <= version:
+            continue
+        with engine.begin() as conn:
+            _begin(conn)
+            if current_version(conn) >= num:
+                continue  # another worker got here first
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO saas_schema_version (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": num, "n": name, "t": datetime.utcnow().isoformat(timespec="seconds")},
+            )
+        print(f"saas migrations: applied {num:04d}_{name}")
+        version = num
+    return version
@@ -40,14 +40,54 @@ class Subscription(Base):
     stripe_customer_id = Column(String(80), nullable=True)
     stripe_subscription_id = Column(String(80), nullable=True)
     stripe_price_id = Column(String(80), nullable=True)
+    stripe_item_id = Column(String(80), nullable=True)       # subscription item whose quantity we sync
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-# SaaS business tables (scoped by org_id)
+class OrgUsage(Base):
+    """
+    Active unit/tenant counts per org, kept current by app.saas.usage (ORM flush
+    hook + explicit recounts for bulk statements) and reconciled periodically.
+    """
+    __tablename__ = "saas_org_usage"
+    org_id = Column(Integer, primary_key=True)
+    active_units = Column(Integer, nullable=False, default=0)
+    active_tenants = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
+class ResourceVersion(Base):
+    """
+    Change counter per (org, resource), bumped in the writing transaction by
+    app.saas.etag; list/detail GETs turn it into a weak ETag. The "auth" row
+    is the org's auth-context stamp (app.saas.deps).
+    """
+    __tablename__ = "saas_resource_versions"
+    org_id = Column(Integer, primary_key=True)
+    resource = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class StripeSyncOutbox(Base):
+    """
+    Pending Stripe quantity push, one row per org (coalesced). Written in the
+    same transaction as the unit/tenant change; drained by app.saas.stripe_outbox.
+    """
+    __tablename__ = "saas_stripe_sync_outbox"
+    id = Column(Integer, primary_key=True)
+    org_id = Column(Integer, nullable=False, unique=True)
+    requested_at = Column(DateTime, default=datetime.utcnow, nullable=False)   # latest change
+    due_at = Column(DateTime, nullable=False, index=True)                      # debounce / retry time
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+# SaaS business tables (scoped by org_id). Every list query is
+# `WHERE org_id = ? ORDER BY id DESC`, so each table leads with a composite
+# (org_id, id DESC) index (it also serves plain org_id lookups); see the
+# Index() declarations after the classes.
 class Property(Base):
     __tablename__ = "properties"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     name = Column(String(255), nullable=False)
     address1 = Column(String(255), nullable=False, default="")
     address2 = Column(String(255), nullable=True)
@@ -57,11 +97,12 @@ class Property(Base):
     notes = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 class Unit(Base):
     __tablename__ = "units"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     property_id = Column(Integer, nullable=False, index=True)
     unit_number = Column(String(50), nullable=False)
     bedrooms = Column(Float, nullable=True)
@@ -70,11 +111,15 @@ class Unit(Base):
     notes = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Optimistic concurrency: the ORM bumps this on every UPDATE (app.saas.versioning)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
 class Tenant(Base):
     __tablename__ = "tenants"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     first_name = Column(String(80), nullable=False)
     last_name = Column(String(80), nullable=False)
     email = Column(String(255), nullable=True)
@@ -82,11 +127,12 @@ class Tenant(Base):
     notes = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 class Lease(Base):
     __tablename__ = "leases"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     unit_id = Column(Integer, nullable=False, index=True)
     tenant_id = Column(Integer, nullable=True, index=True)
     monthly_rent = Column(Float, nullable=False)
@@ -95,22 +141,44 @@ class Lease(Base):
     security_deposit = Column(Float, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Optimistic concurrency: the ORM bumps this on every UPDATE (app.saas.versioning)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
 class Payment(Base):
     __tablename__ = "payments"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     lease_id = Column(Integer, nullable=False, index=True)
     amount = Column(Float, nullable=False)
     payment_date = Column(String(20), nullable=False)
     method = Column(String(50), nullable=True)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class EmailOutbox(Base):
+    """Outgoing mail, queued by app.saas.notify and delivered by app.saas.email_outbox."""
+    __tablename__ = "saas_email_outbox"
+    id = Column(Integer, primary_key=True)
+    org_id = Column(Integer, nullable=True, index=True)
+    to_emails = Column(Text, nullable=False)                      # comma-separated
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued|sent|dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_saas_email_outbox_status_next", "status", "next_attempt_at"),)
 
 class MaintenanceRequest(Base):
     __tablename__ = "maintenance_requests"
     id = Column(Integer, primary_key=True)
-    org_id = Column(Integer, nullable=False, index=True)
+    org_id = Column(Integer, nullable=False)
     unit_id = Column(Integer, nullable=True, index=True)          # NO FK (keeps create_all stable)
     tenant_user_id = Column(Integer, nullable=True, index=True)   # tenant user id
     title = Column(String(255), nullable=False)
@@ -119,3 +187,16 @@ class MaintenanceRequest(Base):
     status = Column(String(30), nullable=False, default="open")
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Optimistic concurrency: the ORM bumps this on every UPDATE (app.saas.versioning)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
+# Per-org composite indexes (created on existing DBs by saas_main at startup)
+for _m in (Property, Unit, Tenant, Lease, Payment, MaintenanceRequest):
+    Index(f"ix_{_m.__tablename__}_org_id_id", _m.org_id, _m.id.desc())
+# Delta sync: GET /api/<resource>?updated_since=
+for _m in (Property, Unit, Tenant, Lease, Payment):
+    Index(f"ix_{_m.__tablename__}_org_id_updated_at", _m.org_id, _m.updated_at)
+Index("ix_payments_org_id_lease_id", Payment.org_id, Payment.lease_id)
+Index("ix_payments_org_id_payment_date", Payment.org_id, Payment.payment_date)
+Index("ix_maintenance_requests_org_id_tenant_user_id", MaintenanceRequest.org_id, MaintenanceRequest.tenant_user_id)
@@ -2,44 +2,131 @@
 
 import os
 import smtplib
+import threading
+import time
 from email.message import EmailMessage
-from typing import Iterable
+from typing import Iterable, Optional
 
-def _env(name: str, default: str = "") -> str:
-    return (os.getenv(name) or default).strip()
+from sqlalchemy.orm import Session
 
-def send_email(subject: str, body: str, to_emails: Iterable[str]) -> None:
-    host = _env("SMTP_HOST")
-    port = int(_env("SMTP_PORT", "587") or "587")
-    user = _env("SMTP_USER")
-    password = _env("SMTP_PASS")
-    from_email = _env("SMTP_FROM", user or "no-reply@happyrentals.local")
+from app.saas import models
+from app.saas.config import settings
 
-    to_list = [e.strip() for e in to_emails if (e or "").strip()]
-    if not to_list:
-        return
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
 
-    # Dev fallback: if SMTP not set, just log
-    if not host:
-        print("EMAIL (dev log):", subject)
-        print("TO:", to_list)
-        print(body)
-        return
+def _recipients(to_emails: Iterable[str]) -> list[str]:
+    return [e.strip() for e in to_emails if (e or "").strip()]
 
+def build_message(subject: str, body: str, to_list: list[str]) -> EmailMessage:
+    user = _env("SMTP_USER")
     msg = EmailMessage()
     msg["Subject"] = subject
-    msg["From"] = from_email
+    msg["From"] = _env("SMTP_FROM", user or "no-reply@happyrentals.local")
     msg["To"] = ", ".join(to_list)
     msg.set_content(body)
+    return msg
+
+class SMTPPool:
+    """
+    One reusable SMTP session (connect + STARTTLS + login once, then many
+    sends). Reconnects once if the server dropped the session. The delivery
+    worker (its only user) calls close_idle() every poll, so a session unused
+    for SMTP_IDLE_SECONDS is closed rather than left for the server to drop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._conn: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
 
-    with smtplib.SMTP(host, port, timeout=10) as s:
+    @staticmethod
+    def configured() -> bool:
+        return bool(_env("SMTP_HOST"))
+
+    def _connect(self) -> smtplib.SMTP:
+        host = _env("SMTP_HOST")
+        port = int(_env("SMTP_PORT", "587") or "587")
+        user = _env("SMTP_USER")
+        password = _env("SMTP_PASS")
+        starttls = _env("SMTP_STARTTLS", "auto").lower()
+
+        s = smtplib.SMTP(host, port, timeout=10)
         s.ehlo()
-        if port in (587, 25):
+        if starttls == "true" or (starttls == "auto" and port in (587, 25)):
             try:
                 s.starttls()
                 s.ehlo()
             except Exception:
-                pass
+                # Explicitly required: never fall through to a plaintext login
+                if starttls == "true":
+                    s.close()
+                    raise
         if user and password:
             s.login(user, password)
-        s.send_message(msg)
+        return s
+
+    def send(self, msg: EmailMessage) -> None:
+        with self._lock:
+            self._close_if_idle()
+            for attempt in (1, 2):
+                if self._conn is None:
+                    self._conn = self._connect()
+                try:
+                    self._conn.send_message(msg)
+                    self._last_used = time.monotonic()
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    # stale pooled session: reconnect once, then give up
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+
+    def _close_if_idle(self) -> None:
+        if self._conn is not None and time.monotonic() - self._last_used > settings.SMTP_IDLE_SECONDS:
+            self._close()
+
+    def close_idle(self) -> None:
+        with self._lock:
+            self._close_if_idle()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+            self._conn = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+def queue_email(
+    db: Session,
+    subject: str,
+    body: str,
+    to_emails: Iterable[str],
+    org_id: Optional[int] = None,
+) -> Optional[models.EmailOutbox]:
+    """
+    Add a message to the outbox in the caller's transaction (commit to send).
+    Delivery happens in app.saas.email_outbox, never on the request path.
+    """
+    to_list = _recipients(to_emails)
+    if not to_list:
+        return None
+    row = models.EmailOutbox(org_id=org_id, to_emails=",".join(to_list), subject=subject[:255], body=body)
+    db.add(row)
+    return row
+
+def send_email(subject: str, body: str, to_emails: Iterable[str]) -> None:
+    # Kept for callers without a session: queue and commit in a short-lived one
+    from app.saas.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if queue_email(db, subject, body, to_emails) is not None:
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+"""
+Keyset pages, sparse fields and delta sync for the SaaS resource lists
+(properties, units, tenants, leases, payments; sync and async routers, and
+make_crud):
+
+    GET /api/units?limit=200                       -> newest 200, X-Next-Cursor
+    GET /api/units?limit=200&cursor=<X-Next-Cursor> -> the next 200
+    GET /api/units?fields=id,unit_number           -> only those columns (+ id)
+    GET /api/units?updated_since=2026-01-01T00:00  -> rows changed since then
+
+Pages are `WHERE org_id = ? [AND id < cursor] ORDER BY id DESC LIMIT n + 1`
+on the (org_id, id DESC) index. The body stays a plain array; without
+`limit` the whole list comes back, as before.
+"""
+import base64
+from datetime import datetime
+from typing import Any, Optional, Type
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import select
+
+MAX_PAGE = 1000
+
+
+def _encode_cursor(item_id: int) -> str:
+    return base64.urlsafe_b64encode(str(int(item_id)).encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    s = cursor.strip()
+    return int(base64.urlsafe_b64decode(s + "=" * (-len(s) % 4)).decode("ascii"))
+
+
+class ListParams:
+    """Dependency bundling the list query parameters."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE),
+        cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+        fields: Optional[str] = Query(default=None, description="comma-separated columns, e.g. id,unit_number"),
+        updated_since: Optional[datetime] = Query(default=None, description="only rows changed at/after this time"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.updated_since = updated_since
+
+
+def sparse_schema(out: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    `out` with every field optional, for list responses: with
+    response_model_exclude_unset a fields= row carries only what was selected
+    (and an ORM row everything but the unrequested ?include= relations).
+    """
+    return create_model(
+        f"{out.__name__}Item",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (Optional[f.annotation], None) for name, f in out.model_fields.items()},
+    )
+
+
+def list_statement(name: str, model: Type, oid: int, params: ListParams):
+    """
+    SELECT for a list page, newest first: (stmt, sparse). With `fields` the
+    statement selects only those columns (plus id) and rows come back as
+    mappings; otherwise whole ORM objects. Fetches limit + 1 rows so the
+    caller can tell whether another page exists (see page_rows()). Callers
+    may add more .where() filters.
+    """
+    cols = model.__table__.c
+    if params.fields:
+        wanted = [f.strip() for f in params.fields.split(",") if f.strip()]
+        unknown = [f for f in wanted if f not in cols]
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"unknown field(s) for {name}: {unknown}")
+        stmt = select(*[cols[f] for f in dict.fromkeys(["id", *wanted])])
+    else:
+        stmt = select(model)
+
+    stmt = stmt.where(model.org_id == oid)
+    if params.cursor:
+        try:
+            stmt = stmt.where(model.id < _decode_cursor(params.cursor))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="invalid cursor")
+    if params.updated_since is not None:
+        if not hasattr(model, "updated_at"):
+            raise HTTPException(status_code=422, detail=f"{name} does not support updated_since")
+        stmt = stmt.where(model.updated_at >= params.updated_since)
+    stmt = stmt.order_by(model.id.desc())
+    if params.limit is not None:
+        stmt = stmt.limit(params.limit + 1)
+    return stmt, bool(params.fields)
+
+
+def page_rows(rows: list, params: ListParams, response: Response, sparse: bool) -> list:
+    # Trim the look-ahead row and advertise the next page in X-Next-Cursor
+    limit = params.limit
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1]["id"] if sparse else rows[-1].id)
+    return [dict(r) for r in rows] if sparse else list(rows)
+
+
+def rows_of(result: Any, sparse: bool) -> list:
+    return result.mappings().all() if sparse else result.scalars().all()
+
+
+def no_sparse_includes(params: ListParams, include: Optional[str]) -> None:
+    # ?include= resolves relations from the full row
+    if params.fields and include:
+        raise HTTPException(status_code=422, detail="fields and include can't be combined")
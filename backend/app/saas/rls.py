@@ -0,0 +1,78 @@
+﻿from __future__ import annotations
+"""
+Optional Postgres row-level security for the org-scoped business tables
+(settings.DB_RLS). The ORM filters on org_id stay in place; RLS is the
+backstop that makes a forgotten filter return nothing instead of another
+org's rows.
+
+- enable_rls(engine): idempotent DDL at startup (ENABLE + FORCE RLS and one
+  `org_isolation` policy per table).
+- bind_org(session, org_id): called by the auth dependencies; the org id is
+  applied with set_config(..., is_local => true) at the start of every
+  transaction on that session, so it never leaks through pooled connections
+  (or PgBouncer in transaction mode).
+- bypass_rls(session): for background workers that work across orgs.
+
+The application role must not be a superuser (superusers ignore policies).
+"""
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.saas.config import settings
+from app.saas.db import SaasSession
+
+ORG_TABLES = ("properties", "units", "tenants", "leases", "payments", "maintenance_requests")
+
+_POLICY = (
+    "current_setting('app.bypass_rls', true) = 'on' "
+    "OR org_id = NULLIF(current_setting('app.org_id', true), '')::integer"
+)
+
+def rls_active(bind) -> bool:
+    return settings.DB_RLS and bind.dialect.name == "postgresql"
+
+def enable_rls(engine: Engine) -> None:
+    if not rls_active(engine):
+        return
+    with engine.begin() as conn:
+        have = {
+            r[0]
+            for r in conn.execute(
+                text("SELECT tablename FROM pg_policies WHERE policyname = 'org_isolation' AND schemaname = current_schema()")
+            )
+        }
+        for t in ORG_TABLES:
+            conn.execute(text(f"ALTER TABLE {t} ENABLE ROW LEVEL SECURITY"))
+            conn.execute(text(f"ALTER TABLE {t} FORCE ROW LEVEL SECURITY"))
+            if t not in have:
+                conn.execute(text(f"CREATE POLICY org_isolation ON {t} USING ({_POLICY}) WITH CHECK ({_POLICY})"))
+
+def _apply(conn: Connection, org_id: Optional[int], bypass: bool) -> None:
+    conn.execute(
+        text("SELECT set_config('app.org_id', :oid, true), set_config('app.bypass_rls', :bypass, true)"),
+        {"oid": "" if org_id is None else str(int(org_id)), "bypass": "on" if bypass else "off"},
+    )
+
+def _bind(session: Session, org_id: Optional[int], bypass: bool) -> None:
+    if not rls_active(session.get_bind()):
+        return
+    session.info["rls_org_id"] = org_id
+    session.info["rls_bypass"] = bypass
+    if session.in_transaction():
+        _apply(session.connection(), org_id, bypass)
+
+def bind_org(session: Session, org_id: int) -> None:
+    """Scope this session's transactions to one org (no-op unless RLS is on)."""
+    _bind(session, org_id, False)
+
+def bypass_rls(session: Session) -> None:
+    """Let a worker session see every org (no-op unless RLS is on)."""
+    _bind(session, None, True)
+
+@event.listens_for(SaasSession, "after_begin")
+def _on_begin(session: Session, transaction, connection: Connection) -> None:
+    if "rls_org_id" in session.info or "rls_bypass" in session.info:
+        _apply(connection, session.info.get("rls_org_id"), session.info.get("rls_bypass", False))
@@ -0,0 +1,26 @@
+﻿from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.saas.config import settings
+from app.saas.db import pool_status
+from app.saas.deps import AuthContext, get_current_user
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+def require_admin(user: AuthContext = Depends(get_current_user)) -> AuthContext:
+    # Process-wide operational data, not org data: every org has an owner, so
+    # only the operators listed in ADMIN_EMAILS get in (nobody when it's unset)
+    allowed = {e.strip().lower() for e in settings.ADMIN_EMAILS.split(",") if e.strip()}
+    if (user.email or "").lower() not in allowed:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return user
+
+@router.get("/pool")
+def pool(_=Depends(require_admin)):
+    """
+    Connection pool counters for the worker that served this request:
+    checked_out/overflow right now, plus cumulative checkouts, waits (checkouts
+    that found the pool and overflow exhausted), wait time and timeouts.
+    """
+    return pool_status()
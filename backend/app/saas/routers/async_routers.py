@@ -0,0 +1,144 @@
+﻿"""
+AsyncSession versions of the hand-written resource routers (properties, units,
+tenants, leases, payments), mounted by saas_main when settings.DB_ASYNC is on.
+Routes, payload models, validation and responses match the sync modules.
+(No `from __future__ import annotations` here: the factory's payload
+annotations are local variables FastAPI must see as real classes.)
+"""
+from typing import Any, Callable, Optional, Sequence, Type
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.saas.billing_autosync import enqueue_quantity_sync
+from app.saas.db import get_async_db
+from app.saas import models
+from app.saas.deps_async import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard_async
+from app.saas.includes import (
+    LEASE_INCLUDES, PAYMENT_INCLUDES, UNIT_INCLUDES, attach, include_resources, parse_include, related,
+)
+from app.saas.pagination import ListParams, list_statement, no_sparse_includes, page_rows, rows_of, sparse_schema
+from app.saas.routers.crud import insert_rows, load_rows
+from app.saas.versioning import check_version, commit_versioned_async, if_match_version
+from app.saas.routers.properties_router import PropertyCreate, PropertyOut, PropertyUpdate
+from app.saas.routers.units_router import UnitCreate, UnitOut, UnitUpdate
+from app.saas.routers.tenants_router import TenantCreate, TenantOut, TenantUpdate
+from app.saas.routers.leases_router import LeaseCreate, LeaseOut, LeaseUpdate
+from app.saas.routers.payments_router import PaymentCreate, PaymentOut
+
+def _resource_router(
+    prefix: str,
+    model: Type,
+    create_schema: Type[BaseModel],
+    update_schema: Type[BaseModel],
+    out_schema: Type[BaseModel],
+    validate: Callable[[BaseModel], None],
+    includes: Sequence[str] = (),
+    refs: Callable[[Any], dict] = lambda obj: {},
+    billable: bool = False,
+    bulk: bool = False,
+) -> APIRouter:
+    router = APIRouter(prefix=f"/api/{prefix}", tags=[prefix])
+
+    async def _sync_quantity(db: AsyncSession, oid: int) -> None:
+        # Stripe quantity follows active units/tenants; queued in the write's transaction
+        if billable: await db.run_sync(enqueue_quantity_sync, oid)
+
+    async def _get(db: AsyncSession, oid: int, obj_id: int):
+        obj = await db.scalar(select(model).where(model.org_id==oid, model.id==obj_id))
+        if not obj: raise HTTPException(status_code=404, detail="Not found")
+        return obj
+
+    # ?include= only where the sync router has it (units, leases); ignored elsewhere, as there
+    extra = include_resources(includes) if includes else None
+
+    @router.get("", response_model=list[sparse_schema(out_schema)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard_async(prefix, extra))])
+    async def list_(response: Response, include: Optional[str] = Query(default=None, description=f"comma-separated: {','.join(includes)}", include_in_schema=bool(includes)), params: ListParams = Depends(), db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+        want = parse_include(include, includes) if includes else frozenset()
+        if want: no_sparse_includes(params, include)
+        stmt, sparse = list_statement(prefix, model, oid, params)
+        rows = page_rows(rows_of(await db.execute(stmt), sparse), params, response, sparse)
+        if not want: return rows
+        return attach(rows, out_schema, await db.run_sync(related, oid, want, [refs(r) for r in rows]))
+
+    @router.post("", response_model=out_schema, response_model_exclude_unset=True)
+    async def create_(payload: create_schema, db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+        validate(payload)
+        obj = model(org_id=oid, **payload.dict())
+        db.add(obj); await _sync_quantity(db, oid); await db.commit(); await db.refresh(obj)
+        return obj
+
+    if bulk:
+        @router.post("/bulk", response_model=list[out_schema], response_model_exclude_unset=True)
+        async def create_bulk(payload: list[create_schema], db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+            # One executemany INSERT and (for units/tenants) one Stripe sync for the whole batch
+            for p in payload: validate(p)
+            ids = await db.run_sync(insert_rows, model, oid, [p.dict() for p in payload])
+            if ids: await _sync_quantity(db, oid)
+            await db.commit()
+            return await db.run_sync(load_rows, model, oid, ids)
+
+    @router.put("/{obj_id}", response_model=out_schema, response_model_exclude_unset=True)
+    async def update_(obj_id: int, payload: update_schema, db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write), expected: Optional[int] = Depends(if_match_version)):
+        obj = await _get(db, oid, obj_id)
+        check_version(obj, expected, out_schema)
+        patch = payload.dict(exclude_unset=True)
+        for k,v in patch.items(): setattr(obj,k,v)
+        if "is_active" in patch: await _sync_quantity(db, oid)
+        await commit_versioned_async(db, obj, out_schema); await db.refresh(obj)
+        return obj
+
+    @router.delete("/{obj_id}")
+    async def delete_(obj_id: int, db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+        obj = await _get(db, oid, obj_id)
+        await db.delete(obj); await _sync_quantity(db, oid); await db.commit()
+        return {"ok": True}
+
+    return router
+
+def _require(field: str, detail: str) -> Callable[[BaseModel], None]:
+    def check(payload: BaseModel) -> None:
+        if not (getattr(payload, field) or "").strip(): raise HTTPException(status_code=422, detail=detail)
+    return check
+
+def _check_tenant(payload: TenantCreate) -> None:
+    _require("first_name", "first_name required")(payload)
+    _require("last_name", "last_name required")(payload)
+
+def _check_lease(payload: LeaseCreate) -> None:
+    if payload.monthly_rent is None: raise HTTPException(status_code=422, detail="monthly_rent required")
+
+properties_router = _resource_router("properties", models.Property, PropertyCreate, PropertyUpdate, PropertyOut, _require("name", "name is required"))
+units_router = _resource_router("units", models.Unit, UnitCreate, UnitUpdate, UnitOut, _require("unit_number", "unit_number required"),
+                                UNIT_INCLUDES, lambda u: {"property_id": u.property_id}, billable=True, bulk=True)
+tenants_router = _resource_router("tenants", models.Tenant, TenantCreate, TenantUpdate, TenantOut, _check_tenant, billable=True, bulk=True)
+leases_router = _resource_router("leases", models.Lease, LeaseCreate, LeaseUpdate, LeaseOut, _check_lease,
+                                 LEASE_INCLUDES, lambda l: {"tenant_id": l.tenant_id, "unit_id": l.unit_id}, bulk=True)
+
+payments_router = APIRouter(prefix="/api/payments", tags=["payments"])
+
+@payments_router.get("", response_model=list[sparse_schema(PaymentOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard_async("payments", include_resources(PAYMENT_INCLUDES, via_lease=True)))])
+async def list_payments(response: Response, month: str | None = Query(default=None), include: str | None = Query(default=None, description="comma-separated: tenant,unit,property"), params: ListParams = Depends(), db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    want = parse_include(include, PAYMENT_INCLUDES)
+    no_sparse_includes(params, include)
+    stmt, sparse = list_statement("payments", models.Payment, oid, params)
+    if month:
+        stmt = stmt.where(models.Payment.payment_date.like(f"{month}%"))
+    rows = page_rows(rows_of(await db.execute(stmt), sparse), params, response, sparse)
+    if not want: return rows
+    return attach(rows, PaymentOut, await db.run_sync(related, oid, want, [{"lease_id": r.lease_id} for r in rows]))
+
+@payments_router.post("", response_model=PaymentOut, response_model_exclude_unset=True)
+async def create_payment(payload: PaymentCreate, db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    obj = models.Payment(org_id=oid, **payload.dict())
+    db.add(obj); await db.commit(); await db.refresh(obj)
+    return obj
+
+@payments_router.post("/bulk", response_model=list[PaymentOut], response_model_exclude_unset=True)
+async def create_payments_bulk(payload: list[PaymentCreate], db: AsyncSession = Depends(get_async_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    ids = await db.run_sync(insert_rows, models.Payment, oid, [p.dict() for p in payload])
+    await db.commit()
+    return await db.run_sync(load_rows, models.Payment, oid, ids)
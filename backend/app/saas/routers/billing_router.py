@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 
 from app.saas.db import get_db
 from app.saas import models
-from app.saas.deps import org_id, get_current_user, require_roles, require_subscription_read, require_subscription_write
+from app.saas.deps import org_id, get_current_user, invalidate_auth_cache, require_roles, require_subscription_read, require_subscription_write
+from app.saas.usage import get_usage
 
 router = APIRouter(prefix="/api/billing", tags=["billing"])
 
@@ -14,6 +15,7 @@ def _sub(db: Session, oid: int) -> models.Subscription:
     if not sub:
         sub = models.Subscription(org_id=oid, plan_type="per_unit", status="trialing")
         db.add(sub); db.commit(); db.refresh(sub)
+        invalidate_auth_cache(org=oid)
     return sub
 
 @router.get("/usage")
@@ -25,8 +27,7 @@ def usage(
 ):
     require_roles(user, ["owner", "manager"])
     sub = _sub(db, oid)
-    units = db.query(models.Unit).filter(models.Unit.org_id == oid, models.Unit.is_active == True).count()
-    tenants = db.query(models.Tenant).filter(models.Tenant.org_id == oid, models.Tenant.is_active == True).count()
+    units, tenants = get_usage(db, oid)
     return {
         "plan_type": sub.plan_type,
         "status": sub.status,
@@ -49,6 +50,7 @@ def set_plan(
     sub = _sub(db, oid)
     sub.plan_type = plan_type
     db.commit()
+    invalidate_auth_cache(org=oid)
     return {"ok": True, "plan_type": plan_type}
 
 @router.post("/checkout")
@@ -1,13 +1,66 @@
 ﻿from __future__ import annotations
 
-from typing import Callable, Type
+from typing import Any, Callable, Optional, Type
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
 
+from app.saas import models
 from app.saas.db import get_db
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
-from app.saas.billing_autosync import maybe_sync_stripe_quantity
+from app.saas.billing_autosync import enqueue_quantity_sync
+from app.saas.usage import recount_org
+from app.saas.etag import TRACKED, bump, etag_guard
+from app.saas.pagination import ListParams, list_statement, page_rows, rows_of
+from app.saas.versioning import check_version, commit_versioned, if_match_version
+
+
+def orm_schema(model: Type) -> Type[BaseModel]:
+    """
+    Response model mirroring the table's columns. Every field is optional so
+    the same model serves sparse (fields=) rows; routes that use it set
+    response_model_exclude_unset so absent columns are omitted, not nulled.
+    """
+    fields: dict[str, Any] = {}
+    for col in model.__table__.columns:
+        try:
+            py = col.type.python_type
+        except NotImplementedError:
+            py = Any
+        fields[col.name] = (Optional[py], None)
+    return create_model(
+        f"{model.__name__}Out",
+        __config__=ConfigDict(from_attributes=True),
+        **fields,
+    )
+
+
+def insert_rows(db: Session, model: Type, oid: int, rows: list[dict]) -> list[int]:
+    """
+    One executemany INSERT ... RETURNING id for a /bulk create, in the
+    caller's transaction; ids come back in request order. Bulk statements
+    skip the flush hooks, so the usage counters and ETag version are updated
+    here. Callers queue the Stripe sync (once per batch) and commit.
+    """
+    if not rows:
+        return []
+    ids = db.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        [{**r, "org_id": oid} for r in rows],
+    ).all()
+    if model in (models.Unit, models.Tenant):
+        recount_org(db, oid)
+    if model.__tablename__ in TRACKED:
+        bump(db, oid, model.__tablename__)
+    return list(ids)
+
+
+def load_rows(db: Session, model: Type, oid: int, ids: list[int]) -> list:
+    # One SELECT for rows written by a bulk route, returned in request order
+    objs = {o.id: o for o in db.scalars(select(model).where(model.org_id == oid, model.id.in_(ids)))}
+    return [objs[i] for i in ids if i in objs]
 
 
 def make_crud(
@@ -16,23 +69,102 @@ def make_crud(
     create_fields: Callable[[dict], dict],
 ) -> APIRouter:
     router = APIRouter(prefix=f"/api/{name}", tags=[name])
+    out = orm_schema(model)
+    table = model.__tablename__
+    # Conditional GETs only where writes are tracked (see app.saas.etag.TRACKED)
+    etag = [Depends(etag_guard(table))] if table in TRACKED else []
 
     def _maybe_sync(db: Session, oid: int) -> None:
+        # Queue a Stripe quantity push; call before commit so it lands with the change
+        if name in ("units", "tenants"):
+            enqueue_quantity_sync(db, oid)
+
+    def _after_bulk(db: Session, oid: int) -> None:
+        # Bulk delete() skips the ORM flush hooks that keep saas_org_usage and
+        # the ETag versions current; update both here
         if name in ("units", "tenants"):
-            try:
-                maybe_sync_stripe_quantity(db, oid)
-            except Exception:
-                pass
+            recount_org(db, oid)
+        if table in TRACKED:
+            bump(db, oid, table)
 
-    @router.get("")
+    @router.get("", response_model=list[out], response_model_exclude_unset=True, dependencies=etag)
     def list_items(
+        response: Response,
+        params: ListParams = Depends(),
         db: Session = Depends(get_db),
         oid: int = Depends(org_id),
         _=Depends(require_subscription_read),
     ):
-        return db.query(model).filter(model.org_id == oid).order_by(model.id.desc()).all()
+        stmt, sparse = list_statement(name, model, oid, params)
+        return page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
+
+    # Bulk routes are declared before "/{item_id}" so "bulk" isn't parsed as an id.
+    # Each is one transaction and queues one Stripe quantity sync per batch.
+
+    @router.post("/bulk", response_model=list[out])
+    def create_items_bulk(
+        payload: list[dict],
+        db: Session = Depends(get_db),
+        oid: int = Depends(org_id),
+        _=Depends(require_subscription_write),
+    ):
+        if not payload:
+            return []
+        ids = insert_rows(db, model, oid, [create_fields(p) for p in payload])
+        _maybe_sync(db, oid)
+        db.commit()
+        return load_rows(db, model, oid, ids)
 
-    @router.get("/{item_id}")
+    @router.put("/bulk", response_model=list[out])
+    def update_items_bulk(
+        payload: list[dict],
+        db: Session = Depends(get_db),
+        oid: int = Depends(org_id),
+        _=Depends(require_subscription_write),
+    ):
+        ids = [p.get("id") for p in payload]
+        if any(not isinstance(i, int) for i in ids):
+            raise HTTPException(status_code=422, detail="each item needs an integer id")
+        if not ids:
+            return []
+
+        objs = {o.id: o for o in db.query(model).filter(model.org_id == oid, model.id.in_(ids)).all()}
+        missing = [i for i in ids if i not in objs]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"{name} not found: {missing}")
+
+        # Items may carry the "version" they were read at; any stale one fails the batch
+        for p in payload:
+            check_version(objs[p["id"]], p.get("version"), out)
+        for p in payload:
+            obj = objs[p["id"]]
+            for k, v in p.items():
+                if k not in ("id", "org_id", "version") and hasattr(obj, k):
+                    setattr(obj, k, v)
+
+        _maybe_sync(db, oid)
+        commit_versioned(db)
+        return load_rows(db, model, oid, ids)
+
+    @router.post("/bulk/delete")
+    def delete_items_bulk(
+        ids: list[int],
+        db: Session = Depends(get_db),
+        oid: int = Depends(org_id),
+        _=Depends(require_subscription_write),
+    ):
+        if not ids:
+            return {"ok": True, "deleted": 0}
+        res = db.execute(
+            delete(model).where(model.org_id == oid, model.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        _after_bulk(db, oid)
+        _maybe_sync(db, oid)
+        db.commit()
+        return {"ok": True, "deleted": res.rowcount}
+
+    @router.get("/{item_id}", response_model=out, dependencies=etag)
     def get_item(
         item_id: int,
         db: Session = Depends(get_db),
@@ -44,7 +176,7 @@ def make_crud(
             raise HTTPException(status_code=404, detail=f"{name} not found")
         return obj
 
-    @router.post("")
+    @router.post("", response_model=out)
     def create_item(
         payload: dict,
         db: Session = Depends(get_db),
@@ -55,30 +187,33 @@ def make_crud(
         data["org_id"] = oid
         obj = model(**data)
         db.add(obj)
+        _maybe_sync(db, oid)
         db.commit()
         db.refresh(obj)
-        _maybe_sync(db, oid)
         return obj
 
-    @router.put("/{item_id}")
+    @router.put("/{item_id}", response_model=out)
     def update_item(
         item_id: int,
         payload: dict,
         db: Session = Depends(get_db),
         oid: int = Depends(org_id),
         _=Depends(require_subscription_write),
+        expected: Optional[int] = Depends(if_match_version),
     ):
         obj = db.query(model).filter(model.org_id == oid, model.id == item_id).first()
         if not obj:
             raise HTTPException(status_code=404, detail=f"{name} not found")
 
+        # If-Match, or the "version" echoed back from a GET
+        check_version(obj, expected if expected is not None else payload.get("version"), out)
         for k, v in payload.items():
-            if hasattr(obj, k):
+            if k != "version" and hasattr(obj, k):
                 setattr(obj, k, v)
 
-        db.commit()
-        db.refresh(obj)
         _maybe_sync(db, oid)
+        commit_versioned(db, obj, out)
+        db.refresh(obj)
         return obj
 
     @router.delete("/{item_id}")
@@ -92,8 +227,8 @@ def make_crud(
         if not obj:
             raise HTTPException(status_code=404, detail=f"{name} not found")
         db.delete(obj)
-        db.commit()
         _maybe_sync(db, oid)
+        db.commit()
         return {"ok": True}
 
     return router
@@ -8,7 +8,9 @@ from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
 from app.saas.auth import hash_password
-from app.saas.deps import get_current_user, org_id, require_roles, require_subscription_write
+from app.saas.config import settings
+from app.saas.deps import get_current_user, invalidate_auth_cache, org_id, require_roles, require_subscription_write
+from app.saas.notify import queue_email
 
 router = APIRouter(prefix="/api/invites", tags=["invites"])
 INVITE_TTL_HOURS = 72
@@ -50,9 +52,19 @@ def create_invite(
     existing.invite_expires_at = expires
     existing.role = "tenant"
     existing.is_active = False
+    invite_url = f"/accept-invite?token={token}"
+    queue_email(
+        db,
+        "You're invited to HappyRentals",
+        f"You've been invited to the tenant portal.\n\nSet your password here (link expires in {INVITE_TTL_HOURS} hours):\n"
+        f"{settings.APP_BASE_URL.rstrip('/')}{invite_url}\n",
+        [email],
+        org_id=oid,
+    )
     db.commit()
+    invalidate_auth_cache(user_id=existing.id)
 
-    return {"invite_url": f"/accept-invite?token={token}", "email": email}
+    return {"invite_url": invite_url, "email": email}
 
 @router.post("/accept")
 def accept_invite(payload: InviteAcceptIn, db: Session = Depends(get_db)):
@@ -1,10 +1,16 @@
 ﻿from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard
+from app.saas.pagination import ListParams, list_statement, no_sparse_includes, page_rows, rows_of, sparse_schema
+from app.saas.routers.crud import insert_rows, load_rows
+from app.saas.includes import LEASE_INCLUDES, attach, include_resources, parse_include, related
+from app.saas.versioning import check_version, commit_versioned, if_match_version
 
 router = APIRouter(prefix="/api/leases", tags=["leases"])
 
@@ -25,23 +31,58 @@ class LeaseUpdate(BaseModel):
     security_deposit: float | None = None
     is_active: bool | None = None
 
-@router.get("")
-def list_(db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
-    return db.query(models.Lease).filter(models.Lease.org_id==oid).order_by(models.Lease.id.desc()).all()
+class LeaseOut(BaseModel):
+    id: int
+    org_id: int
+    unit_id: int
+    tenant_id: int | None = None
+    monthly_rent: float
+    start_date: str | None = None
+    end_date: str | None = None
+    security_deposit: float | None = None
+    is_active: bool = True
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    version: int = 1
+    # ?include=tenant,unit,property
+    tenant: dict | None = None
+    unit: dict | None = None
+    property: dict | None = None
+    class Config:
+        from_attributes = True
 
-@router.post("")
+@router.get("", response_model=list[sparse_schema(LeaseOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard("leases", include_resources(LEASE_INCLUDES)))])
+def list_(response: Response, include: str | None = Query(default=None, description="comma-separated: tenant,unit,property"), params: ListParams = Depends(), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    want = parse_include(include, LEASE_INCLUDES)
+    no_sparse_includes(params, include)
+    stmt, sparse = list_statement("leases", models.Lease, oid, params)
+    rows = page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
+    if not want: return rows
+    return attach(rows, LeaseOut, related(db, oid, want, [{"tenant_id": r.tenant_id, "unit_id": r.unit_id} for r in rows]))
+
+@router.post("", response_model=LeaseOut, response_model_exclude_unset=True)
 def create_(payload: LeaseCreate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     if payload.monthly_rent is None: raise HTTPException(status_code=422, detail="monthly_rent required")
     obj = models.Lease(org_id=oid, **payload.dict())
     db.add(obj); db.commit(); db.refresh(obj)
     return obj
 
-@router.put("/{lid}")
-def update_(lid: int, payload: LeaseUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+@router.post("/bulk", response_model=list[LeaseOut], response_model_exclude_unset=True)
+def create_bulk(payload: list[LeaseCreate], db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    # One executemany INSERT for the whole batch
+    for p in payload:
+        if p.monthly_rent is None: raise HTTPException(status_code=422, detail="monthly_rent required")
+    ids = insert_rows(db, models.Lease, oid, [p.dict() for p in payload])
+    db.commit()
+    return load_rows(db, models.Lease, oid, ids)
+
+@router.put("/{lid}", response_model=LeaseOut, response_model_exclude_unset=True)
+def update_(lid: int, payload: LeaseUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write), expected: int | None = Depends(if_match_version)):
     obj = db.query(models.Lease).filter(models.Lease.org_id==oid, models.Lease.id==lid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
+    check_version(obj, expected, LeaseOut)
     for k,v in payload.dict(exclude_unset=True).items(): setattr(obj,k,v)
-    db.commit(); db.refresh(obj)
+    commit_versioned(db, obj, LeaseOut); db.refresh(obj)
     return obj
 
 @router.delete("/{lid}")
@@ -0,0 +1,23 @@
+﻿from __future__ import annotations
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+
+from app.saas.db import get_db
+from app.saas.deps import org_id, require_subscription_read
+from app.saas.etag import current_versions, make_etag, respond
+from app.saas.lookups import RESOURCES, get_lookups
+
+router = APIRouter(prefix="/api/lookups", tags=["lookups"])
+
+@router.get("")
+def lookups(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    oid: int = Depends(org_id),
+    _=Depends(require_subscription_read),
+):
+    # One indexed read decides both the 304 and whether the cached maps are current
+    versions = current_versions(db, oid, RESOURCES)
+    respond(request, response, make_etag(oid, "lookups", ".".join(map(str, versions))))
+    return get_lookups(db, oid, versions)
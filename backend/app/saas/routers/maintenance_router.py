@@ -6,7 +6,10 @@ from sqlalchemy.orm import Session
 
 from app.saas.db import get_db
 from app.saas import models
+from app.saas.config import settings
 from app.saas.deps import org_id, get_current_user, require_subscription_read, require_subscription_write
+from app.saas.notify import queue_email
+from app.saas.versioning import check_version, commit_versioned, if_match_version
 
 router = APIRouter(prefix="/api/maintenance", tags=["maintenance"])
 
@@ -59,7 +62,21 @@ def create_request(
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
-    db.add(mr); db.commit(); db.refresh(mr)
+    db.add(mr)
+    if (user.role or "") == "tenant":
+        # Let the landlord side know; delivered by the mail worker after commit
+        staff = db.query(models.User.email).filter(
+            models.User.org_id == oid, models.User.is_active == True, models.User.role.in_(("owner", "manager"))
+        ).all()
+        queue_email(
+            db,
+            f"New maintenance request: {title}",
+            f"Priority: {pr}\nUnit: {payload.unit_id or '-'}\nFrom: {user.email}\n\n{payload.description or ''}\n\n"
+            f"{settings.APP_BASE_URL.rstrip('/')}/maintenance\n",
+            [e for (e,) in staff],
+            org_id=oid,
+        )
+    db.commit(); db.refresh(mr)
     return mr
 
 @router.put("/{mr_id}")
@@ -70,6 +87,7 @@ def update_request(
     oid: int = Depends(org_id),
     user=Depends(get_current_user),
     _=Depends(require_subscription_write),
+    expected: int | None = Depends(if_match_version),
 ):
     mr = db.query(models.MaintenanceRequest).filter(models.MaintenanceRequest.org_id==oid, models.MaintenanceRequest.id==mr_id).first()
     if not mr:
@@ -77,6 +95,7 @@ def update_request(
 
     if (user.role or "") == "tenant" and mr.tenant_user_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
+    check_version(mr, expected)
 
     if (user.role or "") == "tenant":
         if payload.title is not None: mr.title = payload.title.strip()
@@ -92,7 +111,7 @@ def update_request(
             if st in ("open","in_progress","resolved","closed"): mr.status = st
 
     mr.updated_at = datetime.utcnow()
-    db.commit(); db.refresh(mr)
+    commit_versioned(db, mr); db.refresh(mr)
     return mr
 
 @router.delete("/{mr_id}")
@@ -1,10 +1,15 @@
 ﻿from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard
+from app.saas.pagination import ListParams, list_statement, no_sparse_includes, page_rows, rows_of, sparse_schema
+from app.saas.routers.crud import insert_rows, load_rows
+from app.saas.includes import PAYMENT_INCLUDES, attach, include_resources, parse_include, related
 
 router = APIRouter(prefix="/api/payments", tags=["payments"])
 
@@ -15,15 +20,43 @@ class PaymentCreate(BaseModel):
     method: str | None = None
     notes: str | None = None
 
-@router.get("")
-def list_(month: str | None = Query(default=None), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
-    q = db.query(models.Payment).filter(models.Payment.org_id==oid)
+class PaymentOut(BaseModel):
+    id: int
+    org_id: int
+    lease_id: int
+    amount: float
+    payment_date: str
+    method: str | None = None
+    notes: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    # ?include=tenant,unit,property (resolved through the lease)
+    tenant: dict | None = None
+    unit: dict | None = None
+    property: dict | None = None
+    class Config:
+        from_attributes = True
+
+@router.get("", response_model=list[sparse_schema(PaymentOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard("payments", include_resources(PAYMENT_INCLUDES, via_lease=True)))])
+def list_(response: Response, month: str | None = Query(default=None), include: str | None = Query(default=None, description="comma-separated: tenant,unit,property"), params: ListParams = Depends(), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    want = parse_include(include, PAYMENT_INCLUDES)
+    no_sparse_includes(params, include)
+    stmt, sparse = list_statement("payments", models.Payment, oid, params)
     if month:
-        q = q.filter(models.Payment.payment_date.like(f"{month}%"))
-    return q.order_by(models.Payment.id.desc()).all()
+        stmt = stmt.where(models.Payment.payment_date.like(f"{month}%"))
+    rows = page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
+    if not want: return rows
+    return attach(rows, PaymentOut, related(db, oid, want, [{"lease_id": r.lease_id} for r in rows]))
 
-@router.post("")
+@router.post("", response_model=PaymentOut, response_model_exclude_unset=True)
 def create_(payload: PaymentCreate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     obj = models.Payment(org_id=oid, **payload.dict())
     db.add(obj); db.commit(); db.refresh(obj)
     return obj
+
+@router.post("/bulk", response_model=list[PaymentOut], response_model_exclude_unset=True)
+def create_bulk(payload: list[PaymentCreate], db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    # One executemany INSERT for the whole batch
+    ids = insert_rows(db, models.Payment, oid, [p.dict() for p in payload])
+    db.commit()
+    return load_rows(db, models.Payment, oid, ids)
@@ -1,11 +1,14 @@
 ﻿from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.saas.db import get_db
 from app.saas import models
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard
+from app.saas.pagination import ListParams, list_statement, page_rows, rows_of, sparse_schema
 
 router = APIRouter(prefix="/api/properties", tags=["properties"])
 
@@ -28,11 +31,28 @@ class PropertyUpdate(BaseModel):
     notes: str | None = None
     is_active: bool | None = None
 
-@router.get("")
-def list_(db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
-    return db.query(models.Property).filter(models.Property.org_id==oid).order_by(models.Property.id.desc()).all()
+class PropertyOut(BaseModel):
+    id: int
+    org_id: int
+    name: str
+    address1: str | None = None
+    address2: str | None = None
+    city: str | None = None
+    state: str | None = None
+    zip: str | None = None
+    notes: str | None = None
+    is_active: bool = True
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    class Config:
+        from_attributes = True
+
+@router.get("", response_model=list[sparse_schema(PropertyOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard("properties"))])
+def list_(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    stmt, sparse = list_statement("properties", models.Property, oid, params)
+    return page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
 
-@router.post("")
+@router.post("", response_model=PropertyOut)
 def create_(payload: PropertyCreate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     if not (payload.name or "").strip():
         raise HTTPException(status_code=422, detail="name is required")
@@ -40,7 +60,7 @@ def create_(payload: PropertyCreate, db: Session = Depends(get_db), oid: int = D
     db.add(obj); db.commit(); db.refresh(obj)
     return obj
 
-@router.put("/{pid}")
+@router.put("/{pid}", response_model=PropertyOut)
 def update_(pid: int, payload: PropertyUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     obj = db.query(models.Property).filter(models.Property.org_id==oid, models.Property.id==pid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
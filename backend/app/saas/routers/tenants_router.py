@@ -1,10 +1,15 @@
 ﻿from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
+from app.saas.billing_autosync import enqueue_quantity_sync
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard
+from app.saas.pagination import ListParams, list_statement, page_rows, rows_of, sparse_schema
+from app.saas.routers.crud import insert_rows, load_rows
 
 router = APIRouter(prefix="/api/tenants", tags=["tenants"])
 
@@ -23,23 +28,51 @@ class TenantUpdate(BaseModel):
     notes: str | None = None
     is_active: bool | None = None
 
-@router.get("")
-def list_(db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
-    return db.query(models.Tenant).filter(models.Tenant.org_id==oid).order_by(models.Tenant.id.desc()).all()
+class TenantOut(BaseModel):
+    id: int
+    org_id: int
+    first_name: str
+    last_name: str
+    email: str | None = None
+    phone: str | None = None
+    notes: str | None = None
+    is_active: bool = True
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    class Config:
+        from_attributes = True
+
+@router.get("", response_model=list[sparse_schema(TenantOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard("tenants"))])
+def list_(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    stmt, sparse = list_statement("tenants", models.Tenant, oid, params)
+    return page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
 
-@router.post("")
+@router.post("", response_model=TenantOut)
 def create_(payload: TenantCreate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     if not (payload.first_name or "").strip(): raise HTTPException(status_code=422, detail="first_name required")
     if not (payload.last_name or "").strip(): raise HTTPException(status_code=422, detail="last_name required")
     obj = models.Tenant(org_id=oid, **payload.dict())
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj); enqueue_quantity_sync(db, oid); db.commit(); db.refresh(obj)
     return obj
 
-@router.put("/{tid}")
+@router.post("/bulk", response_model=list[TenantOut])
+def create_bulk(payload: list[TenantCreate], db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    # One executemany INSERT and one Stripe sync for the whole batch
+    for p in payload:
+        if not (p.first_name or "").strip(): raise HTTPException(status_code=422, detail="first_name required")
+        if not (p.last_name or "").strip(): raise HTTPException(status_code=422, detail="last_name required")
+    ids = insert_rows(db, models.Tenant, oid, [p.dict() for p in payload])
+    if ids: enqueue_quantity_sync(db, oid)
+    db.commit()
+    return load_rows(db, models.Tenant, oid, ids)
+
+@router.put("/{tid}", response_model=TenantOut)
 def update_(tid: int, payload: TenantUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     obj = db.query(models.Tenant).filter(models.Tenant.org_id==oid, models.Tenant.id==tid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
-    for k,v in payload.dict(exclude_unset=True).items(): setattr(obj,k,v)
+    patch = payload.dict(exclude_unset=True)
+    for k,v in patch.items(): setattr(obj,k,v)
+    if "is_active" in patch: enqueue_quantity_sync(db, oid)  # billable count may change
     db.commit(); db.refresh(obj)
     return obj
 
@@ -47,5 +80,5 @@ def update_(tid: int, payload: TenantUpdate, db: Session = Depends(get_db), oid:
 def delete_(tid: int, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     obj = db.query(models.Tenant).filter(models.Tenant.org_id==oid, models.Tenant.id==tid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
-    db.delete(obj); db.commit()
+    db.delete(obj); enqueue_quantity_sync(db, oid); db.commit()
     return {"ok": True}
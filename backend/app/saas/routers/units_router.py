@@ -1,10 +1,17 @@
 ﻿from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
+from app.saas.billing_autosync import enqueue_quantity_sync
 from app.saas.deps import org_id, require_subscription_read, require_subscription_write
+from app.saas.etag import etag_guard
+from app.saas.pagination import ListParams, list_statement, no_sparse_includes, page_rows, rows_of, sparse_schema
+from app.saas.routers.crud import insert_rows, load_rows
+from app.saas.includes import UNIT_INCLUDES, attach, include_resources, parse_include, related
+from app.saas.versioning import check_version, commit_versioned, if_match_version
 
 router = APIRouter(prefix="/api/units", tags=["units"])
 
@@ -25,28 +32,63 @@ class UnitUpdate(BaseModel):
     notes: str | None = None
     is_active: bool | None = None
 
-@router.get("")
-def list_(db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
-    return db.query(models.Unit).filter(models.Unit.org_id==oid).order_by(models.Unit.id.desc()).all()
+class UnitOut(BaseModel):
+    id: int
+    org_id: int
+    property_id: int
+    unit_number: str
+    bedrooms: float | None = None
+    bathrooms: float | None = None
+    sq_ft: float | None = None
+    notes: str | None = None
+    is_active: bool = True
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    version: int = 1
+    property: dict | None = None   # ?include=property
+    class Config:
+        from_attributes = True
 
-@router.post("")
+@router.get("", response_model=list[sparse_schema(UnitOut)], response_model_exclude_unset=True, dependencies=[Depends(etag_guard("units", include_resources(UNIT_INCLUDES)))])
+def list_(response: Response, include: str | None = Query(default=None, description="comma-separated: property"), params: ListParams = Depends(), db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_read)):
+    want = parse_include(include, UNIT_INCLUDES)
+    no_sparse_includes(params, include)
+    stmt, sparse = list_statement("units", models.Unit, oid, params)
+    rows = page_rows(rows_of(db.execute(stmt), sparse), params, response, sparse)
+    if not want: return rows
+    return attach(rows, UnitOut, related(db, oid, want, [{"property_id": r.property_id} for r in rows]))
+
+@router.post("", response_model=UnitOut, response_model_exclude_unset=True)
 def create_(payload: UnitCreate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     if not (payload.unit_number or "").strip(): raise HTTPException(status_code=422, detail="unit_number required")
     obj = models.Unit(org_id=oid, **payload.dict())
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj); enqueue_quantity_sync(db, oid); db.commit(); db.refresh(obj)
     return obj
 
-@router.put("/{uid}")
-def update_(uid: int, payload: UnitUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+@router.post("/bulk", response_model=list[UnitOut], response_model_exclude_unset=True)
+def create_bulk(payload: list[UnitCreate], db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
+    # One executemany INSERT and one Stripe sync for the whole batch
+    for p in payload:
+        if not (p.unit_number or "").strip(): raise HTTPException(status_code=422, detail="unit_number required")
+    ids = insert_rows(db, models.Unit, oid, [p.dict() for p in payload])
+    if ids: enqueue_quantity_sync(db, oid)
+    db.commit()
+    return load_rows(db, models.Unit, oid, ids)
+
+@router.put("/{uid}", response_model=UnitOut, response_model_exclude_unset=True)
+def update_(uid: int, payload: UnitUpdate, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write), expected: int | None = Depends(if_match_version)):
     obj = db.query(models.Unit).filter(models.Unit.org_id==oid, models.Unit.id==uid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
-    for k,v in payload.dict(exclude_unset=True).items(): setattr(obj,k,v)
-    db.commit(); db.refresh(obj)
+    check_version(obj, expected, UnitOut)
+    patch = payload.dict(exclude_unset=True)
+    for k,v in patch.items(): setattr(obj,k,v)
+    if "is_active" in patch: enqueue_quantity_sync(db, oid)  # billable count may change
+    commit_versioned(db, obj, UnitOut); db.refresh(obj)
     return obj
 
 @router.delete("/{uid}")
 def delete_(uid: int, db: Session = Depends(get_db), oid: int = Depends(org_id), _=Depends(require_subscription_write)):
     obj = db.query(models.Unit).filter(models.Unit.org_id==oid, models.Unit.id==uid).first()
     if not obj: raise HTTPException(status_code=404, detail="Not found")
-    db.delete(obj); db.commit()
+    db.delete(obj); enqueue_quantity_sync(db, oid); db.commit()
     return {"ok": True}
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from app.saas.db import get_db
 from app.saas import models
 from app.saas.auth import hash_password
-from app.saas.deps import org_id, require_roles, require_subscription_read, require_subscription_write
+from app.saas.deps import invalidate_auth_cache, org_id, require_roles, require_subscription_read, require_subscription_write
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -118,4 +118,5 @@ def deactivate_user(
         raise HTTPException(status_code=400, detail="Cannot deactivate owner")
     user.is_active = False
     db.commit(); db.refresh(user)
+    invalidate_auth_cache(user_id=user.id)
     return user
@@ -0,0 +1,57 @@
+﻿from __future__ import annotations
+
+import threading
+from typing import Optional, Protocol
+
+from app.saas.config import settings
+
+
+class StripeClient(Protocol):
+    def set_item_quantity(self, item_id: str, quantity: int) -> None: ...
+
+
+class LiveStripe:
+    """The one Stripe call the quantity sync makes, via the official SDK."""
+
+    def set_item_quantity(self, item_id: str, quantity: int) -> None:
+        import stripe
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        stripe.SubscriptionItem.modify(item_id, quantity=quantity)
+
+
+class FakeStripe:
+    """
+    In-memory Stripe for local dev and tests (STRIPE_FAKE=1).
+    Records every call; set fail_next = n to make the next n calls raise.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.quantities: dict[str, int] = {}
+        self.calls: list[tuple[str, int]] = []
+        self.fail_next = 0
+
+    def set_item_quantity(self, item_id: str, quantity: int) -> None:
+        with self._lock:
+            self.calls.append((item_id, quantity))
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                raise RuntimeError("fake stripe: injected failure")
+            self.quantities[item_id] = quantity
+
+    def reset(self) -> None:
+        with self._lock:
+            self.quantities.clear()
+            self.calls.clear()
+            self.fail_next = 0
+
+
+fake_stripe = FakeStripe()
+
+
+def get_stripe_client() -> Optional[StripeClient]:
+    if settings.STRIPE_FAKE:
+        return fake_stripe
+    if settings.STRIPE_SECRET_KEY:
+        return LiveStripe()
+    return None
@@ -0,0 +1,113 @@
+﻿from __future__ import annotations
+"""
+Background drain of saas_stripe_sync_outbox.
+
+CRUD handlers only enqueue (app.saas.billing_autosync.enqueue_quantity_sync);
+this worker pushes at most one quantity update per org per debounce window,
+off the request path, retrying failed pushes with capped exponential backoff.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.saas import models
+from app.saas.billing_autosync import maybe_sync_stripe_quantity
+from app.saas.config import settings
+from app.saas.db import SessionLocal
+from app.saas.rls import bypass_rls
+from app.saas.stripe_client import StripeClient
+
+Outbox = models.StripeSyncOutbox
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = max(settings.STRIPE_SYNC_DEBOUNCE_SECONDS, 1.0)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), settings.STRIPE_SYNC_RETRY_MAX_SECONDS))
+
+
+def process_due(client: Optional[StripeClient] = None, now: Optional[datetime] = None, limit: int = 100) -> dict:
+    """
+    Push every outbox row whose due_at has passed. Safe to call from tests or a
+    cron, and from several workers at once: each row is claimed before its push.
+    Returns counts. A row is only deleted if no newer change arrived while its
+    push was in flight, otherwise it is re-armed for another window.
+    """
+    now = now or datetime.utcnow()
+    stats = {"pushed": 0, "skipped": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        bypass_rls(db)  # recount_org() may read units/tenants of any org
+        due = (
+            db.query(Outbox.id, Outbox.org_id, Outbox.requested_at, Outbox.attempts, Outbox.due_at)
+            .filter(Outbox.due_at <= now)
+            .order_by(Outbox.due_at)
+            .limit(limit)
+            .all()
+        )
+        for row_id, oid, seen, attempts, due_at in due:
+            # Claim: push due_at past this push so another worker/process skips the row;
+            # if this worker dies mid-push the row comes due again after the lease
+            claimed = db.query(Outbox).filter(Outbox.id == row_id, Outbox.due_at == due_at).update(
+                {"due_at": now + _backoff((attempts or 0) + 1)}, synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                continue
+
+            res = maybe_sync_stripe_quantity(db, oid, client=client)
+
+            if res.get("reason") == "stripe_error":
+                tries = (attempts or 0) + 1
+                db.query(Outbox).filter(Outbox.id == row_id).update(
+                    {"attempts": tries, "last_error": res.get("error"), "due_at": now + _backoff(tries)},
+                    synchronize_session=False,
+                )
+                db.commit()
+                stats["failed"] += 1
+                continue
+
+            # pushed, or nothing to push (not configured / not subscribed yet)
+            stats["pushed" if res.get("ok") else "skipped"] += 1
+            gone = db.query(Outbox).filter(Outbox.id == row_id, Outbox.requested_at == seen).delete(
+                synchronize_session=False
+            )
+            if not gone:
+                db.query(Outbox).filter(Outbox.id == row_id).update(
+                    {"attempts": 0, "last_error": None,
+                     "due_at": now + timedelta(seconds=settings.STRIPE_SYNC_DEBOUNCE_SECONDS)},
+                    synchronize_session=False,
+                )
+            db.commit()
+        return stats
+    finally:
+        db.close()
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _run() -> None:
+    while not _stop.wait(settings.STRIPE_SYNC_POLL_SECONDS):
+        try:
+            process_due()
+        except Exception as e:
+            # keep the worker alive; rows stay queued for the next poll
+            print("stripe outbox: drain failed:", type(e).__name__, e)
+
+
+def start_worker() -> None:
+    global _thread
+    if settings.STRIPE_SYNC_POLL_SECONDS <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="stripe-outbox", daemon=True)
+    _thread.start()
+
+
+def stop_worker(timeout: float = 5.0) -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
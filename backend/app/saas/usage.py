@@ -0,0 +1,203 @@
+﻿from __future__ import annotations
+"""
+Per-org active unit/tenant counters (saas_org_usage).
+
+- Writes: an after_flush hook on the SaaS session class (sync and async
+  sessions alike) turns ORM inserts, deletes and is_active flips of
+  Unit/Tenant into +/- deltas applied in the same transaction. ORM bulk
+  statements (insert()/delete() executed directly) skip flush events, so
+  callers using them call recount_org() before commit.
+- Reads: get_usage() is a primary-key lookup; an org without a row is seeded
+  from COUNT(*) once.
+- Drift (raw SQL, scripts, races on first seed) is corrected by
+  reconcile_all(), run periodically by the worker here.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import NO_VALUE
+
+from app.saas import models
+from app.saas.config import settings
+from app.saas.db import SaasSession, SessionLocal
+from app.saas.rls import bypass_rls
+
+_COUNTED = {models.Unit: "active_units", models.Tenant: "active_tenants"}
+_usage = models.OrgUsage.__table__
+
+
+def _count_active(conn, model, org_id: Optional[int] = None):
+    stmt = select(model.org_id, func.count()).where(model.is_active == True).group_by(model.org_id)
+    if org_id is not None:
+        stmt = stmt.where(model.org_id == org_id)
+    return {oid: int(n) for oid, n in conn.execute(stmt).all()}
+
+
+def _upsert(conn, org_id: int, units: int, tenants: int, reconciled: bool = False) -> None:
+    now = datetime.utcnow()
+    values = {"active_units": units, "active_tenants": tenants, "updated_at": now}
+    if reconciled:
+        values["reconciled_at"] = now
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # One statement, so concurrent first writes for an org can't both INSERT
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(_usage).values(org_id=org_id, **values)
+        conn.execute(stmt.on_conflict_do_update(index_elements=[_usage.c.org_id], set_=values))
+        return
+    res = conn.execute(update(_usage).where(_usage.c.org_id == org_id).values(**values))
+    if not res.rowcount:
+        conn.execute(_usage.insert().values(org_id=org_id, **values))
+
+
+def recount_org(db: Session, org_id: int) -> Tuple[int, int]:
+    """Recompute one org's counters from the tables (in the caller's transaction)."""
+    conn = db.connection()
+    units = _count_active(conn, models.Unit, org_id).get(org_id, 0)
+    tenants = _count_active(conn, models.Tenant, org_id).get(org_id, 0)
+    _upsert(conn, org_id, units, tenants)
+    return units, tenants
+
+
+def get_usage(db: Session, org_id: int) -> Tuple[int, int]:
+    """(active_units, active_tenants) for an org; O(1) once the row exists."""
+    row = db.execute(
+        select(_usage.c.active_units, _usage.c.active_tenants).where(_usage.c.org_id == org_id)
+    ).first()
+    if row is not None:
+        return int(row[0]), int(row[1])
+    counts = recount_org(db, org_id)
+    db.commit()
+    return counts
+
+
+def _was_active(obj) -> Optional[bool]:
+    # Value before this flush; None if unknown (attribute never loaded)
+    attr = inspect(obj).attrs.is_active
+    hist = attr.history
+    if hist.deleted:
+        return bool(hist.deleted[0])
+    if hist.unchanged:
+        return bool(hist.unchanged[0])
+    return None if attr.loaded_value is NO_VALUE else bool(attr.loaded_value)
+
+
+@event.listens_for(SaasSession, "after_flush")
+def _track_usage(session: Session, flush_context) -> None:
+    deltas: Dict[int, Dict[str, int]] = {}
+    recount: set[int] = set()
+
+    def bump(obj, n: int) -> None:
+        col = _COUNTED[type(obj)]
+        d = deltas.setdefault(int(obj.org_id), {"active_units": 0, "active_tenants": 0})
+        d[col] += n
+
+    for obj in session.new:
+        if type(obj) in _COUNTED and obj.is_active is not False:
+            bump(obj, 1)
+    for obj in session.deleted:
+        if type(obj) in _COUNTED:
+            was = _was_active(obj)
+            if was is None:
+                recount.add(int(obj.org_id))
+            elif was:
+                bump(obj, -1)
+    for obj in session.dirty:
+        if type(obj) not in _COUNTED or obj in session.deleted:
+            continue
+        hist = inspect(obj).attrs.is_active.history
+        if not hist.added:
+            continue
+        old = bool(hist.deleted[0]) if hist.deleted else None
+        if old is None:
+            recount.add(int(obj.org_id))
+        else:
+            bump(obj, int(bool(hist.added[0])) - int(old))
+
+    if not deltas and not recount:
+        return
+    conn = session.connection()
+    now = datetime.utcnow()
+    for oid, d in deltas.items():
+        if oid in recount or not (d["active_units"] or d["active_tenants"]):
+            continue
+        res = conn.execute(
+            update(_usage)
+            .where(_usage.c.org_id == oid)
+            .values(
+                active_units=_usage.c.active_units + d["active_units"],
+                active_tenants=_usage.c.active_tenants + d["active_tenants"],
+                updated_at=now,
+            )
+        )
+        if not res.rowcount:
+            recount.add(oid)  # first write for this org: seed from the (post-flush) tables
+    for oid in recount:
+        recount_org(session, oid)
+
+
+def reconcile_all(db: Optional[Session] = None) -> int:
+    """
+    Recount every org with two GROUP BY queries and fix any drift.
+    Returns how many orgs had wrong (or missing) counters.
+    """
+    own = db is None
+    db = db or SessionLocal()
+    try:
+        if own:
+            bypass_rls(db)
+        conn = db.connection()
+        units = _count_active(conn, models.Unit)
+        tenants = _count_active(conn, models.Tenant)
+        current = {
+            r.org_id: (r.active_units, r.active_tenants)
+            for r in conn.execute(select(_usage.c.org_id, _usage.c.active_units, _usage.c.active_tenants)).all()
+        }
+        fixed = 0
+        for oid in set(units) | set(tenants) | set(current):
+            want = (units.get(oid, 0), tenants.get(oid, 0))
+            if current.get(oid) != want:
+                fixed += 1
+            _upsert(conn, oid, want[0], want[1], reconciled=True)
+        db.commit()
+        return fixed
+    finally:
+        if own:
+            db.close()
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _run() -> None:
+    while not _stop.wait(settings.USAGE_RECONCILE_SECONDS):
+        try:
+            fixed = reconcile_all()
+            if fixed:
+                print(f"usage reconcile: corrected {fixed} org(s)")
+        except Exception as e:
+            print("usage reconcile failed:", type(e).__name__, e)
+
+
+def start_worker() -> None:
+    global _thread
+    if settings.USAGE_RECONCILE_SECONDS <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="usage-reconcile", daemon=True)
+    _thread.start()
+
+
+def stop_worker(timeout: float = 5.0) -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
@@ -0,0 +1,88 @@
+﻿from __future__ import annotations
+"""
+Optimistic concurrency for the versioned SaaS tables (units, leases,
+maintenance_requests).
+
+Each of those models maps `version` as its SQLAlchemy version_id_col, so
+every ORM flush writes `UPDATE ... SET version = version + 1 WHERE id = ?
+AND version = ?` and no row lock is taken. A client that sends the version
+it last read in If-Match ("3" or W/"3") gets 409 with the current row when
+someone else wrote first, instead of silently overwriting them. Without
+If-Match an update is unconditional, as before.
+"""
+from typing import Any, Optional, Type
+
+from fastapi import Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+
+def if_match_version(if_match: Optional[str] = Header(default=None)) -> Optional[int]:
+    """Dependency: the row version from If-Match; None when absent or `*`."""
+    if if_match is None or if_match.strip() in ("", "*"):
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"If-Match must be a row version, got {if_match!r}")
+
+
+_STALE = "Version conflict: the row was changed by someone else"
+
+
+def _render(obj: Any, out: Optional[Type[BaseModel]]) -> Any:
+    # exclude_unset: no null ?include= relations in the 409 body
+    return out.model_validate(obj).model_dump(mode="json", exclude_unset=True) if out else jsonable_encoder(obj)
+
+
+def conflict(obj: Any, out: Optional[Type[BaseModel]] = None) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={"message": _STALE, "current": _render(obj, out)},
+    )
+
+
+def check_version(obj: Any, expected: Optional[int], out: Optional[Type[BaseModel]] = None) -> None:
+    """409 before writing anything when the client's version is already stale."""
+    if expected is not None and hasattr(obj, "version") and obj.version != expected:
+        raise conflict(obj, out)
+
+
+def commit_versioned(db: Session, obj: Any = None, out: Optional[Type[BaseModel]] = None) -> None:
+    """
+    Commit; a concurrent writer that got in after `obj` was loaded makes the
+    versioned UPDATE match no row, which is answered with 409 carrying the
+    current row (404 if it is gone). Batches pass no `obj` and get a bare 409.
+    """
+    model, pk = (type(obj), obj.id) if obj is not None else (None, None)
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        if model is None:
+            raise HTTPException(status_code=409, detail=_STALE)
+        current = db.get(model, pk, populate_existing=True)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        raise conflict(current, out)
+
+
+async def commit_versioned_async(db: AsyncSession, obj: Any = None, out: Optional[Type[BaseModel]] = None) -> None:
+    """commit_versioned() for AsyncSession."""
+    model, pk = (type(obj), obj.id) if obj is not None else (None, None)
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        if model is None:
+            raise HTTPException(status_code=409, detail=_STALE)
+        current = await db.get(model, pk, populate_existing=True)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        raise conflict(current, out)
@@ -5,32 +5,73 @@ from pathlib import Path
 
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.saas.db import Base, engine
+from app.saas.config import settings
+from app.saas.db import Base, dispose_async_engine, engine
 from app.saas.deps import require_roles_dep
+from app.saas.migrations import run_migrations
+from app.saas.rls import enable_rls
+from app.saas.stripe_outbox import start_worker as start_stripe_outbox, stop_worker as stop_stripe_outbox
+from app.saas.email_outbox import start_worker as start_email_outbox, stop_worker as stop_email_outbox
+from app.saas.usage import start_worker as start_usage_reconcile, stop_worker as stop_usage_reconcile
 
+from app.saas.routers.admin_router import router as admin_router
 from app.saas.routers.auth_router import router as auth_router
 from app.saas.routers.billing_router import router as billing_router
 from app.saas.routers.invite_router import router as invite_router
+from app.saas.routers.lookups_router import router as lookups_router
 from app.saas.routers.maintenance_router import router as maintenance_router
 
-from app.saas.routers.properties_router import router as properties_router
-from app.saas.routers.units_router import router as units_router
-from app.saas.routers.tenants_router import router as tenants_router
-from app.saas.routers.leases_router import router as leases_router
-from app.saas.routers.payments_router import router as payments_router
-
-app = FastAPI(title="HappyRentals SaaS")
+if settings.DB_ASYNC:
+    # Same routes on AsyncSession: no threadpool slot held while waiting on the DB
+    from app.saas.deps_async import require_roles_dep as resource_roles_dep
+    from app.saas.routers.async_routers import (
+        properties_router, units_router, tenants_router, leases_router, payments_router,
+    )
+else:
+    resource_roles_dep = require_roles_dep
+    from app.saas.routers.properties_router import router as properties_router
+    from app.saas.routers.units_router import router as units_router
+    from app.saas.routers.tenants_router import router as tenants_router
+    from app.saas.routers.leases_router import router as leases_router
+    from app.saas.routers.payments_router import router as payments_router
+
+app = FastAPI(title="HappyRentals SaaS", default_response_class=ORJSONResponse)
 
 @app.get("/api/health", include_in_schema=False)
-def health():
+async def health():
     return {"ok": True}
 
 @app.on_event("startup")
 def _init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips new columns on tables that already exist
+    run_migrations(engine)
+    # create_all also skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for idx in table.indexes:
+            idx.create(bind=engine, checkfirst=True)
+    enable_rls(engine)
+
+@app.on_event("startup")
+def _start_workers():
+    # Drain queued Stripe quantity syncs and outgoing mail off the request path;
+    # periodically recount usage counters to correct any drift
+    start_stripe_outbox()
+    start_email_outbox()
+    start_usage_reconcile()
+
+@app.on_event("shutdown")
+def _stop_workers():
+    stop_stripe_outbox()
+    stop_email_outbox()
+    stop_usage_reconcile()
+
+@app.on_event("shutdown")
+async def _close_async_engine():
+    await dispose_async_engine()
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +79,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # list pagination (app.saas.pagination)
 )
 
 # Public-ish auth routes
@@ -45,15 +87,17 @@ app.include_router(auth_router)
 app.include_router(invite_router)       # accept invite is public; create invite is role-gated
 app.include_router(billing_router)      # role-gated inside router
 app.include_router(maintenance_router)  # tenant-safe inside router
+app.include_router(admin_router)        # ADMIN_EMAILS operators only
 
 # Landlord resources: owner/manager only
-_owner_mgr = [Depends(require_roles_dep(["owner","manager"]))]
+_owner_mgr = [Depends(resource_roles_dep(["owner","manager"]))]
 
 app.include_router(properties_router, dependencies=_owner_mgr)
 app.include_router(units_router, dependencies=_owner_mgr)
 app.include_router(tenants_router, dependencies=_owner_mgr)
 app.include_router(leases_router, dependencies=_owner_mgr)
 app.include_router(payments_router, dependencies=_owner_mgr)
+app.include_router(lookups_router, dependencies=_owner_mgr)
 
 # Static SPA
 static_path = Path(os.getenv("STATIC_DIR", Path(__file__).resolve().parents[1] / "static"))
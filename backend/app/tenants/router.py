@@ -1,11 +1,14 @@
 # backend/app/tenants/router.py
-from typing import List, Optional, Dict, Any
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import MetaData, Table, select, insert, update, delete, text
+from sqlalchemy import MetaData, Table, func, literal, select, insert, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from . import schemas
+from app.db_writes import delete_returning, insert_returning, update_returning
+from app.etag import etag_guard
 
 
 # --- DB imports (robust) ---
@@ -25,6 +28,10 @@ router = APIRouter(prefix="/tenants", tags=["tenants"])
 
 _migrated = False
 
+# Reflected tenants table, resolved once and reused by every request.
+# (table, pk column, column names) - reset via invalidate_tenants_table_cache().
+_tenants_cache: Optional[Tuple[Table, Any, FrozenSet[str]]] = None
+
 
 def _pragma_table_info(db: Session, table_name: str):
     return db.execute(text(f"PRAGMA table_info({table_name})")).mappings().all()
@@ -118,6 +125,9 @@ def _migrate_tenants_if_needed(db: Session):
         db.execute(text("ALTER TABLE tenants__new RENAME TO tenants"))
         db.execute(text("COMMIT"))
 
+        # Schema changed underneath any cached reflection
+        invalidate_tenants_table_cache()
+
     _migrated = True
 
 
@@ -126,6 +136,39 @@ def _reflect_tenants_table() -> Table:
     return Table("tenants", md, autoload_with=engine)
 
 
+def invalidate_tenants_table_cache() -> None:
+    """
+    Drop the cached reflection; call after any DDL on the tenants table.
+    """
+    global _tenants_cache
+    _tenants_cache = None
+
+
+def _tenants_meta() -> Tuple[Table, Any, FrozenSet[str]]:
+    global _tenants_cache
+    if _tenants_cache is None:
+        t = _reflect_tenants_table()
+        _tenants_cache = (t, _pk_col(t), frozenset(c.name for c in t.c))
+    return _tenants_cache
+
+
+@router.on_event("startup")
+def _startup():
+    # Run the legacy-schema fix and warm the reflection cache once, so
+    # requests don't pay for PRAGMA/reflection queries.
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _migrate_tenants_if_needed(db)
+        _tenants_meta()
+    except Exception as e:
+        # e.g. tenants table not created yet; first request will retry
+        print("tenants startup: reflection deferred:", type(e).__name__, e)
+    finally:
+        db.close()
+
+
 def _pk_col(t: Table):
     if t.primary_key and len(t.primary_key.columns) > 0:
         return list(t.primary_key.columns)[0]
@@ -140,7 +183,7 @@ def _pk_col(t: Table):
 
 def _row_to_tenant_out(t: Table, row) -> Dict[str, Any]:
     m = dict(row._mapping)
-    pk = _pk_col(t).name
+    pk = _tenants_meta()[1].name
     if "id" not in m and pk in m:
         m["id"] = m[pk]
 
@@ -164,22 +207,21 @@ def _row_to_tenant_out(t: Table, row) -> Dict[str, Any]:
     }
 
 
-@router.get("", response_model=List[schemas.TenantOut])
+@router.get("", response_model=List[schemas.TenantOut], dependencies=[Depends(etag_guard("tenants"))])
 def list_tenants(db: Session = Depends(get_db)):
     _migrate_tenants_if_needed(db)
-    t = _reflect_tenants_table()
+    t, pk, _cols = _tenants_meta()
 
     # IMPORTANT: always select actual columns (prevents "SELECT FROM tenants" bug)
-    stmt = select(*t.c).order_by(_pk_col(t).desc())
+    stmt = select(*t.c).order_by(pk.desc())
     rows = db.execute(stmt).fetchall()
     return [_row_to_tenant_out(t, r) for r in rows]
 
 
-@router.get("/{tenant_id}", response_model=schemas.TenantOut)
+@router.get("/{tenant_id}", response_model=schemas.TenantOut, dependencies=[Depends(etag_guard("tenants"))])
 def get_tenant(tenant_id: int, db: Session = Depends(get_db)):
     _migrate_tenants_if_needed(db)
-    t = _reflect_tenants_table()
-    pk = _pk_col(t)
+    t, pk, cols = _tenants_meta()
 
     row = db.execute(select(*t.c).where(pk == tenant_id)).fetchone()
     if not row:
@@ -187,89 +229,97 @@ def get_tenant(tenant_id: int, db: Session = Depends(get_db)):
     return _row_to_tenant_out(t, row)
 
 
-@router.post("", response_model=schemas.TenantOut)
-def create_tenant(payload: schemas.TenantCreate, db: Session = Depends(get_db)):
-    _migrate_tenants_if_needed(db)
-    t = _reflect_tenants_table()
-
+def _tenant_values(payload: schemas.TenantCreate, cols: FrozenSet[str]) -> Dict[str, Any]:
     data = payload.model_dump()
     values: Dict[str, Any] = {}
 
     # Write whatever columns exist
-    if "first_name" in t.c:
+    if "first_name" in cols:
         values["first_name"] = data.get("first_name") or ""
-    if "last_name" in t.c:
+    if "last_name" in cols:
         values["last_name"] = data.get("last_name") or ""
 
     full_name = (f"{data.get('first_name') or ''} {data.get('last_name') or ''}").strip()
-    if "full_name" in t.c:
+    if "full_name" in cols:
         values["full_name"] = full_name
 
     for f in ("email", "phone", "notes"):
-        if f in t.c:
+        if f in cols:
             values[f] = data.get(f)
+    return values
 
-    res = db.execute(insert(t).values(**values))
-    db.commit()
 
-    pk = _pk_col(t)
-    new_id = res.inserted_primary_key[0] if res.inserted_primary_key else None
-    if new_id is None:
-        row = db.execute(select(*t.c).order_by(pk.desc())).fetchone()
-    else:
-        row = db.execute(select(*t.c).where(pk == new_id)).fetchone()
+@router.post("", response_model=schemas.TenantOut)
+def create_tenant(payload: schemas.TenantCreate, db: Session = Depends(get_db)):
+    _migrate_tenants_if_needed(db)
+    t, pk, cols = _tenants_meta()
 
-    if not row:
-        raise HTTPException(status_code=500, detail="Failed to read created tenant")
+    row = insert_returning(db, t, _tenant_values(payload, cols))
+    db.commit()
     return _row_to_tenant_out(t, row)
 
 
+@router.post("/bulk", response_model=List[schemas.TenantOut])
+def create_tenants_bulk(payload: List[schemas.TenantCreate], db: Session = Depends(get_db)):
+    """
+    Create many tenants in one transaction (single executemany INSERT ... RETURNING).
+    Rows come back in request order.
+    """
+    _migrate_tenants_if_needed(db)
+    t, pk, cols = _tenants_meta()
+    if not payload:
+        return []
+
+    try:
+        # Reflected PK has no sentinel metadata, so order by the new ids instead
+        rows = db.execute(
+            insert(t).returning(*t.c),
+            [_tenant_values(p, cols) for p in payload],
+        ).fetchall()
+        db.commit()
+        rows.sort(key=lambda r: r._mapping[pk.name])
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"create_tenants_bulk failed: {type(e).__name__}: {e}")
+    return [_row_to_tenant_out(t, r) for r in rows]
+
+
 @router.put("/{tenant_id}", response_model=schemas.TenantOut)
 def update_tenant(tenant_id: int, payload: schemas.TenantUpdate, db: Session = Depends(get_db)):
     _migrate_tenants_if_needed(db)
-    t = _reflect_tenants_table()
-    pk = _pk_col(t)
+    t, pk, cols = _tenants_meta()
 
     patch = payload.model_dump(exclude_unset=True)
     values: Dict[str, Any] = {}
 
-    if "first_name" in patch and "first_name" in t.c:
+    if "first_name" in patch and "first_name" in cols:
         values["first_name"] = patch["first_name"]
-    if "last_name" in patch and "last_name" in t.c:
+    if "last_name" in patch and "last_name" in cols:
         values["last_name"] = patch["last_name"]
 
-    if "full_name" in t.c and ("first_name" in patch or "last_name" in patch):
-        fn = patch.get("first_name") or ""
-        ln = patch.get("last_name") or ""
-        values["full_name"] = f"{fn} {ln}".strip()
+    if "full_name" in cols and ("first_name" in patch or "last_name" in patch):
+        # The half that wasn't patched comes from the row itself, inside the same UPDATE
+        def _part(name: str):
+            if name in patch:
+                return literal(patch[name] or "")
+            return func.coalesce(t.c[name], "") if name in cols else literal("")
+
+        values["full_name"] = func.trim(_part("first_name") + " " + _part("last_name"))
 
     for f in ("email", "phone", "notes"):
-        if f in patch and f in t.c:
+        if f in patch and f in cols:
             values[f] = patch[f]
 
-    if not values:
-        row = db.execute(select(*t.c).where(pk == tenant_id)).fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Tenant not found")
-        return _row_to_tenant_out(t, row)
-
-    res = db.execute(update(t).where(pk == tenant_id).values(**values))
+    row = update_returning(db, t, pk == tenant_id, values, not_found="Tenant not found")
     db.commit()
-    if res.rowcount == 0:
-        raise HTTPException(status_code=404, detail="Tenant not found")
-
-    row = db.execute(select(*t.c).where(pk == tenant_id)).fetchone()
     return _row_to_tenant_out(t, row)
 
 
 @router.delete("/{tenant_id}")
 def delete_tenant(tenant_id: int, db: Session = Depends(get_db)):
     _migrate_tenants_if_needed(db)
-    t = _reflect_tenants_table()
-    pk = _pk_col(t)
+    t, pk, cols = _tenants_meta()
 
-    res = db.execute(delete(t).where(pk == tenant_id))
+    delete_returning(db, t, pk == tenant_id, not_found="Tenant not found")
     db.commit()
-    if res.rowcount == 0:
-        raise HTTPException(status_code=404, detail="Tenant not found")
     return {"ok": True}
@@ -1,7 +1,6 @@
 # backend/app/units/models.py
-from sqlalchemy import Table, Column, Integer, String, Numeric, Text
-from sqlalchemy import text
-from app.db_compat import metadata, engine
+from sqlalchemy import Table, Column, Index, Integer, String, Numeric, Text
+from app.db_compat import metadata
 
 units = Table(
     "units",
@@ -16,30 +15,18 @@ units = Table(
     Column("rent", Numeric(12, 2), nullable=True),
     Column("status", String(32), nullable=True),
     Column("notes", Text, nullable=True),
-)
+    # Optimistic concurrency: bumped by every UPDATE (app.db_writes.update_returning)
+    Column("version", Integer, nullable=False, server_default="1"),
 
-def _sqlite_has_column(conn, table: str, col: str) -> bool:
-    rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    # pragma row: (cid, name, type, notnull, dflt_value, pk)
-    return any((r[1] == col) for r in rows)
+    # list_units(property_id=) + delete_property guard
+    Index("ix_units_property_id", "property_id"),
+)
 
 def init_units_tables():
     """
-    Ensures:
-    - units table exists
-    - label column exists
-    - existing rows have a default label if missing
+    Ensures the units table and its columns/labels are current.
+    Schema + label backfill are versioned in app.migrations (no-op when current).
     """
-    metadata.create_all(bind=engine)
+    from app.migrations import run_migrations
 
-    # If table existed before without 'label', add it (SQLite)
-    if engine.url.get_backend_name() == "sqlite":
-        with engine.begin() as conn:
-            if not _sqlite_has_column(conn, "units", "label"):
-                conn.execute(text("ALTER TABLE units ADD COLUMN label VARCHAR(64)"))
-            # backfill labels for existing units
-            conn.execute(text("""
-                UPDATE units
-                SET label = COALESCE(NULLIF(TRIM(label), ''), 'Unit ' || id)
-                WHERE label IS NULL OR TRIM(label) = ''
-            """))
+    run_migrations()
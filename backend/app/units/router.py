@@ -1,10 +1,13 @@
 ﻿# backend/app/units/router.py
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, insert, update
+from sqlalchemy import select, insert
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db_compat import get_db
+from app.db_writes import if_match_version, insert_returning, update_returning
+from app.etag import etag_guard
+from app.includes import include_tables, parse_include, related
 from app.units.models import units, init_units_tables
 from app.units.schemas import UnitCreate, UnitUpdate, UnitOut
 
@@ -24,40 +27,48 @@ def _row_to_out(row) -> UnitOut:
         m["label"] = f"Unit {m.get('id')}"
     return UnitOut(**m)
 
-@router.get("", response_model=List[UnitOut])
+UNIT_INCLUDES = ("property",)
+
+@router.get(
+    "",
+    response_model=List[UnitOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(etag_guard("units", extra=include_tables(UNIT_INCLUDES)))],
+)
 def list_units(
     property_id: Optional[int] = Query(default=None),
+    include: Optional[str] = Query(default=None, description="comma-separated: property"),
     db=Depends(get_db),
 ):
+    want = parse_include(include, UNIT_INCLUDES)
     try:
         stmt = select(units)
         if property_id is not None:
             stmt = stmt.where(units.c.property_id == property_id)
         rows = db.execute(stmt.order_by(units.c.id.desc())).fetchall()
-        return [_row_to_out(r) for r in rows]
+        extras = related(db, want, [{"property_id": r.property_id} for r in rows])
+        return [_row_to_out(r).model_copy(update=x) for r, x in zip(rows, extras)]
     except Exception as e:
         # show actual failure reason
         raise HTTPException(status_code=500, detail=f"/units failed: {type(e).__name__}: {str(e)}")
 
-@router.post("", response_model=UnitOut)
+def _unit_values(payload: UnitCreate) -> dict:
+    return dict(
+        property_id=payload.property_id,
+        label=(payload.label or "").strip() or "Unit",
+        bedrooms=payload.bedrooms,
+        bathrooms=payload.bathrooms,
+        sqft=payload.sqft,
+        rent=payload.rent,
+        status=payload.status,
+        notes=payload.notes,
+    )
+
+@router.post("", response_model=UnitOut, response_model_exclude_unset=True)
 def create_unit(payload: UnitCreate, db=Depends(get_db)):
-    label = (payload.label or "").strip() or "Unit"
     try:
-        res = db.execute(
-            insert(units).values(
-                property_id=payload.property_id,
-                label=label,
-                bedrooms=payload.bedrooms,
-                bathrooms=payload.bathrooms,
-                sqft=payload.sqft,
-                rent=payload.rent,
-                status=payload.status,
-                notes=payload.notes,
-            )
-        )
+        row = insert_returning(db, units, _unit_values(payload))
         db.commit()
-        new_id = res.inserted_primary_key[0]
-        row = db.execute(select(units).where(units.c.id == new_id)).fetchone()
         return _row_to_out(row)
     except SQLAlchemyError as e:
         db.rollback()
@@ -66,22 +77,47 @@ def create_unit(payload: UnitCreate, db=Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"create_unit failed: {type(e).__name__}: {str(e)}")
 
-@router.put("/{unit_id}", response_model=UnitOut)
-def update_unit(unit_id: int, payload: UnitUpdate, db=Depends(get_db)):
+@router.post("/bulk", response_model=List[UnitOut], response_model_exclude_unset=True)
+def create_units_bulk(payload: List[UnitCreate], db=Depends(get_db)):
+    """
+    Create many units in one transaction (single executemany INSERT ... RETURNING).
+    Rows come back in request order.
+    """
+    if not payload:
+        return []
     try:
-        existing = db.execute(select(units).where(units.c.id == unit_id)).fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Unit not found")
+        rows = db.execute(
+            insert(units).returning(*units.c, sort_by_parameter_order=True),
+            [_unit_values(p) for p in payload],
+        ).fetchall()
+        db.commit()
+        return [_row_to_out(r) for r in rows]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"DB error creating units: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"create_units_bulk failed: {type(e).__name__}: {str(e)}")
 
+@router.put("/{unit_id}", response_model=UnitOut, response_model_exclude_unset=True)
+def update_unit(
+    unit_id: int,
+    payload: UnitUpdate,
+    version: Optional[int] = Depends(if_match_version),
+    db=Depends(get_db),
+):
+    try:
         values = payload.model_dump(exclude_unset=True)
         if "label" in values and values["label"] is not None:
             values["label"] = values["label"].strip() or f"Unit {unit_id}"
 
-        db.execute(update(units).where(units.c.id == unit_id).values(**values))
+        row = update_returning(
+            db, units, units.c.id == unit_id, values, not_found="Unit not found", version=version, out=_row_to_out
+        )
         db.commit()
-        row = db.execute(select(units).where(units.c.id == unit_id)).fetchone()
         return _row_to_out(row)
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
         db.rollback()
@@ -1,5 +1,5 @@
 # backend/app/units/schemas.py
-from typing import Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 class UnitCreate(BaseModel):
@@ -32,3 +32,6 @@ class UnitOut(BaseModel):
     rent: Optional[float] = None
     status: Optional[str] = None
     notes: Optional[str] = None
+    version: int = 1
+    # ?include=property
+    property: Optional[Dict[str, Any]] = None
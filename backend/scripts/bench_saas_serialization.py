@@ -0,0 +1,81 @@
+﻿"""
+Per-row cost of serializing a SaaS list response, before/after typed
+response models + ORJSONResponse (saas_main's default_response_class).
+
+  before: no response_model -> jsonable_encoder(ORM objects) -> JSONResponse
+  after:  response_model=list[UnitOut] -> pydantic validate + JSON-mode dump -> ORJSONResponse
+          (the same two steps FastAPI's serialize_response runs)
+
+Uses a throwaway SQLite file; nothing touches saas.db.
+
+Run from backend/:  python scripts/bench_saas_serialization.py [rows] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.saas import models
+from app.saas.db import Base
+from app.saas.routers.units_router import UnitOut
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+def _before(rows):
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+_adapter = TypeAdapter(list[UnitOut])
+
+
+def _after(rows):
+    content = _adapter.dump_python(_adapter.validate_python(rows, from_attributes=True), mode="json")
+    return ORJSONResponse(content).body
+
+
+def _best(fn, rows) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    path = Path(tempfile.mkdtemp()) / "bench.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Unit), [
+            {"org_id": 1, "property_id": 1 + i % 50, "unit_number": f"U{i}", "bedrooms": 2,
+             "bathrooms": 1.5, "sq_ft": 850, "notes": "Corner unit, south-facing windows. " * 4}
+            for i in range(ROWS)
+        ])
+        db.commit()
+        rows = db.query(models.Unit).order_by(models.Unit.id.desc()).all()
+
+        assert len(_before(rows)) > 0 and len(_after(rows)) > 0
+        before, after = _best(_before, rows), _best(_after, rows)
+
+    print(f"{ROWS} rows, best of {REPEATS}")
+    print(f"  before (jsonable_encoder + JSONResponse): {before * 1000:8.1f} ms  {before / ROWS * 1e6:6.2f} us/row")
+    print(f"  after  (response_model + ORJSONResponse): {after * 1000:8.1f} ms  {after / ROWS * 1e6:6.2f} us/row")
+    print(f"  speedup: {before / after:.1f}x")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
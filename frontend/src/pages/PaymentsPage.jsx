@@ -107,7 +107,12 @@ export default function PaymentsPage() {
     setLoading(true);
     setErr("");
     try {
-      const q = month ? `?month=${encodeURIComponent(month)}` : "";
+      const params = new URLSearchParams();
+      if (month) params.set("month", month);
+      if (leaseId) params.set("lease_id", leaseId);
+      if (tenantId) params.set("tenant_id", tenantId);
+      if (propertyId) params.set("property_id", propertyId);
+      const q = params.toString() ? `?${params}` : "";
       const [pR, lR, tR, uR, prR] = await Promise.all([
         fetch(`${API}/payments${q}`),
         fetch(`${API}/leases`),
@@ -128,7 +133,7 @@ export default function PaymentsPage() {
     }
   }
 
-  useEffect(() => { loadAll(); }, [month]);
+  useEffect(() => { loadAll(); }, [month, leaseId, tenantId, propertyId]);
 
   const propertyOptions = useMemo(
     () => properties.map((p) => ({ value: String(p.id), label: propertyName(p) })),